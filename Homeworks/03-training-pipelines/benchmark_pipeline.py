@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Benchmark the pipeline blocks on synthetic taxi trips.
+
+Generates deterministic yellow-taxi parquet files (cached under
+benchmarks/data), then times prepare_data, train_model, register_model and
+batch scoring of the whole file at each requested size. Models are
+registered into a throwaway MLflow database, so mlflow.db is not touched.
+
+Every run is appended to a local history file. A block whose time exceeds
+the median of its last few comparable runs (same size, settings and host)
+by more than --max-regression percent fails the run with exit code 1.
+
+Usage:
+    python benchmark_pipeline.py                       # 10k, 1M and 10M rows
+    python benchmark_pipeline.py --sizes 10k,1M --repeat 3
+    python benchmark_pipeline.py --max-regression 10 --lean
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Add taxi_training_pipeline to path
+sys.path.append('./taxi_training_pipeline')
+
+BLOCKS = ['prepare_data', 'train_model', 'register_model', 'batch_scoring']
+DEFAULT_SIZES = '10k,1M,10M'
+DEFAULT_HISTORY = 'benchmarks/history.json'
+DEFAULT_DATA_DIR = 'benchmarks/data'
+
+
+def parse_size(text):
+    """
+    Parse a row count like '10k', '1M' or '2500000'.
+    """
+    text = text.strip().lower().replace('_', '')
+    multiplier = {'k': 1_000, 'm': 1_000_000}.get(text[-1:], 1)
+    return int(float(text.rstrip('km')) * multiplier)
+
+
+def synthetic_file(n_rows, seed, data_dir):
+    """
+    Path of the synthetic parquet file for n_rows, generating it on first use.
+    """
+    from utils.synthetic_trips import write_trips_parquet
+
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, f"synthetic_trips_{n_rows}_seed{seed}.parquet")
+    if not os.path.exists(path):
+        print(f"🧪 Generating {n_rows:,} synthetic trips -> {path}")
+        tmp_path = path + '.tmp'
+        write_trips_parquet(tmp_path, n_rows, seed=seed)
+        os.replace(tmp_path, path)
+    return path
+
+
+def score_batch(model_info, path, output_path, n_workers):
+    """
+    Score the raw trip file with the trained model, as the score_trips block does.
+    """
+    from utils.batch_scoring import score_parquet
+
+    return score_parquet(path, output_path, model_info['model'], model_info['vectorizer'],
+                         n_workers=n_workers)
+
+
+def timed(func, repeat, verbose, *args, **kwargs):
+    """
+    Best wall time of repeat calls, and the result of the last call.
+    """
+    best = None
+    for _ in range(repeat):
+        output = io.StringIO()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(sys.stdout if verbose else output):
+            result = func(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def benchmark_size(n_rows, args, work_dir):
+    """
+    Time every block once per repeat on n_rows synthetic trips.
+    """
+    import mlflow
+
+    from data_loaders.load_taxi_data import load_data
+    from transformers.prepare_data import transform_data as prepare_data
+    from transformers.train_model import transform_data as train_model
+    from data_exporters.register_model import export_data as register_model
+    from utils.parquet_stream import TRIP_COLUMNS
+    from utils.registry import EXPERIMENT_NAME
+
+    path = synthetic_file(n_rows, args.seed, args.data_dir)
+    with contextlib.redirect_stdout(io.StringIO()):
+        raw = load_data(file_path=path, columns=TRIP_COLUMNS if args.lean else None)
+
+    results = {}
+    results['prepare_data'], prepared = timed(prepare_data, args.repeat, args.verbose, raw, lean=args.lean)
+    del raw
+    results['train_model'], model_info = timed(train_model, args.repeat, args.verbose, prepared,
+                                               training_mode=args.training_mode)
+
+    # Keep the run artifacts next to the throwaway database instead of ./mlruns
+    tracking_uri = f"sqlite:///{os.path.join(work_dir, 'mlflow.db')}"
+    client = mlflow.MlflowClient(tracking_uri=tracking_uri)
+    if client.get_experiment_by_name(EXPERIMENT_NAME) is None:
+        client.create_experiment(EXPERIMENT_NAME, artifact_location=os.path.join(work_dir, 'artifacts'))
+    results['register_model'], _ = timed(register_model, args.repeat, args.verbose, model_info,
+                                         tracking_uri=tracking_uri)
+    output_path = os.path.join(work_dir, 'predictions.parquet')
+    results['batch_scoring'], _ = timed(score_batch, args.repeat, args.verbose, model_info, path,
+                                        output_path, args.score_workers)
+    return results
+
+
+def machine_id():
+    return f"{platform.node()}/{platform.machine()}/{os.cpu_count()}cpu/py{platform.python_version()}"
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_history(path):
+    if not os.path.exists(path):
+        return {'runs': []}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_history(path, history):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(history, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def find_regressions(run, history, max_regression, baseline_runs, min_seconds):
+    """
+    Compare a run against the median of the last comparable runs in history.
+
+    Returns a list of (size, block, seconds, baseline_seconds, percent) for
+    every block slower than the baseline by more than max_regression percent
+    and by at least min_seconds.
+    """
+    comparable = [
+        past for past in history['runs']
+        if past['machine'] == run['machine'] and past['config'] == run['config']
+    ]
+    regressions = []
+    for size, blocks in run['results'].items():
+        for block, seconds in blocks.items():
+            previous = [past['results'][size][block] for past in comparable
+                        if block in past['results'].get(size, {})][-baseline_runs:]
+            if not previous:
+                continue
+            baseline = statistics.median(previous)
+            percent = (seconds / baseline - 1) * 100 if baseline > 0 else 0.0
+            if percent > max_regression and seconds - baseline >= min_seconds:
+                regressions.append((size, block, seconds, baseline, percent))
+    return regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Benchmark the pipeline blocks on synthetic taxi trips')
+    parser.add_argument('--sizes', default=DEFAULT_SIZES,
+                        help=f'comma-separated row counts (default: {DEFAULT_SIZES})')
+    parser.add_argument('--repeat', type=int, default=1,
+                        help='time each block this many times and keep the best (default: 1)')
+    parser.add_argument('--seed', type=int, default=42, help='synthetic data seed (default: 42)')
+    parser.add_argument('--training-mode', default='sample', choices=['sample', 'full'],
+                        help='train_model training_mode (default: sample)')
+    parser.add_argument('--lean', action='store_true',
+                        help='load only the trip columns and prepare them with lean=True')
+    parser.add_argument('--score-workers', type=int, default=os.cpu_count(),
+                        help='batch scoring processes (default: all cores)')
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR,
+                        help=f'where synthetic parquet files are kept (default: {DEFAULT_DATA_DIR})')
+    parser.add_argument('--history', default=DEFAULT_HISTORY,
+                        help=f'results history file (default: {DEFAULT_HISTORY})')
+    parser.add_argument('--max-regression', type=float, default=20.0,
+                        help='fail when a block is this many percent slower than its baseline (default: 20)')
+    parser.add_argument('--baseline-runs', type=int, default=5,
+                        help='baseline is the median of this many previous comparable runs (default: 5)')
+    parser.add_argument('--min-seconds', type=float, default=0.05,
+                        help='ignore slowdowns smaller than this many seconds (default: 0.05)')
+    parser.add_argument('--no-save', action='store_true', help='do not append this run to the history')
+    parser.add_argument('--no-gate', action='store_true', help='report regressions without failing')
+    parser.add_argument('--verbose', action='store_true', help='show the blocks\' own output')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    sizes = [parse_size(size) for size in args.sizes.split(',') if size.strip()]
+
+    print("🏁 Pipeline benchmark")
+    print("=" * 60)
+
+    run = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'git_commit': git_commit(),
+        'machine': machine_id(),
+        'config': {
+            'repeat': args.repeat,
+            'seed': args.seed,
+            'training_mode': args.training_mode,
+            'lean': args.lean,
+            'score_workers': args.score_workers,
+        },
+        'results': {},
+    }
+
+    with tempfile.TemporaryDirectory(prefix='benchmark-') as work_dir:
+        for n_rows in sizes:
+            print(f"\n📏 {n_rows:,} rows")
+            results = benchmark_size(n_rows, args, work_dir)
+            for block in BLOCKS:
+                print(f"   {block:<16} {results[block]:>9.3f}s  ({n_rows / results[block]:>12,.0f} rows/s)")
+            run['results'][str(n_rows)] = results
+
+    history = load_history(args.history)
+    regressions = find_regressions(run, history, args.max_regression, args.baseline_runs, args.min_seconds)
+
+    if not args.no_save:
+        history['runs'].append(run)
+        save_history(args.history, history)
+        print(f"\n💾 Results appended to {args.history}")
+
+    print("\n" + "=" * 60)
+    if not regressions:
+        print(f"✅ No block regressed by more than {args.max_regression:g}%")
+        return 0
+
+    for size, block, seconds, baseline, percent in regressions:
+        print(f"❌ {block} at {int(size):,} rows: {seconds:.3f}s vs baseline {baseline:.3f}s (+{percent:.1f}%)")
+    return 0 if args.no_gate else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
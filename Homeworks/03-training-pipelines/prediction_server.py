@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Local HTTP server for online trip-duration predictions.
+
+Loads the registered model and vectorizer once at startup (rebuilt from the
+.txm file logged by register_model, see utils.registry) and serves them over a small
+asyncio HTTP/1.1 server - no web framework and no external services.
+Concurrent requests are coalesced into micro-batches: the first waiting
+request opens a batch, which is closed after max_batch_size trips or
+max_wait_ms milliseconds, and the whole batch is scored with one vectorized
+predict.
+
+Endpoints:
+    POST /predict   {"PULocationID": 161, "DOLocationID": 236, "trip_distance": 2.5}
+                    or a list of such objects -> {"predictions": [...]}
+    GET  /metrics   request/batch counters, throughput and p50/p99 latency
+    GET  /health
+
+Usage:
+    python prediction_server.py --port 8000 --max-batch-size 64 --max-wait-ms 2
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Add taxi_training_pipeline to path
+sys.path.append('./taxi_training_pipeline')
+
+from utils.feature_encoding import ColumnarEncoder
+
+REQUIRED_FIELDS = ['PULocationID', 'DOLocationID', 'trip_distance']
+MAX_BODY_BYTES = 10 * 1024 * 1024
+
+
+class TripPredictor:
+    """
+    Model plus columnar encoder; predicts durations for a list of trip dicts.
+    """
+
+    def __init__(self, model, vectorizer):
+        self.model = model
+        self.encoder = ColumnarEncoder.from_dict_vectorizer(vectorizer)
+
+    def predict(self, trips):
+        df = pd.DataFrame.from_records(trips, columns=REQUIRED_FIELDS)
+        return self.model.predict(self.encoder.transform(df))
+
+
+class LatencyStats:
+    """
+    Request counters and a sliding window of latencies for percentiles.
+    """
+
+    def __init__(self, window=10000):
+        self.started = time.monotonic()
+        self.latencies = deque(maxlen=window)
+        self.requests = 0
+        self.errors = 0
+        self.predictions = 0
+        self.batches = 0
+
+    def record_batch(self, n_trips):
+        self.batches += 1
+        self.predictions += n_trips
+
+    def record_request(self, seconds):
+        self.requests += 1
+        self.latencies.append(seconds)
+
+    def snapshot(self):
+        uptime = time.monotonic() - self.started
+        latencies_ms = np.array(self.latencies) * 1000
+        p50, p99 = np.percentile(latencies_ms, [50, 99]) if len(latencies_ms) else (None, None)
+        return {
+            'uptime_seconds': uptime,
+            'requests': self.requests,
+            'errors': self.errors,
+            'predictions': self.predictions,
+            'batches': self.batches,
+            'mean_batch_size': self.predictions / self.batches if self.batches else None,
+            'requests_per_second': self.requests / uptime if uptime > 0 else None,
+            'predictions_per_second': self.predictions / uptime if uptime > 0 else None,
+            'latency_p50_ms': None if p50 is None else float(p50),
+            'latency_p99_ms': None if p99 is None else float(p99),
+            'latency_window': len(latencies_ms),
+        }
+
+
+class MicroBatcher:
+    """
+    Coalesce concurrent predict calls into batched calls of predict_fn.
+
+    Batches are scored on a single background thread, so the event loop
+    keeps accepting requests (and filling the next batch) while one is
+    being predicted.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=64, max_wait_ms=2.0, stats=None):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.stats = stats or LatencyStats()
+        self.queue = asyncio.Queue()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='predict')
+        self.task = None
+
+    def start(self):
+        self.task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        self.executor.shutdown(wait=True)
+
+    async def predict(self, trips):
+        """
+        Queue trips for the next batch and wait for their predictions.
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((trips, future))
+        return await future
+
+    async def _collect(self):
+        items = [await self.queue.get()]
+        size = len(items[0][0])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self.queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            items.append(item)
+            size += len(item[0])
+        return items, size
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            items, size = await self._collect()
+            trips = [trip for request_trips, _ in items for trip in request_trips]
+            try:
+                predictions = await loop.run_in_executor(self.executor, self.predict_fn, trips)
+            except Exception as e:
+                if len(items) == 1:
+                    if not items[0][1].done():
+                        items[0][1].set_exception(e)
+                else:
+                    # One bad request must not fail the others batched with it
+                    await self._run_separately(loop, items)
+                continue
+            self.stats.record_batch(size)
+
+            offset = 0
+            for request_trips, future in items:
+                if not future.done():
+                    future.set_result(predictions[offset:offset + len(request_trips)].tolist())
+                offset += len(request_trips)
+
+    async def _run_separately(self, loop, items):
+        for request_trips, future in items:
+            try:
+                predictions = await loop.run_in_executor(self.executor, self.predict_fn, request_trips)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+                continue
+            self.stats.record_batch(len(request_trips))
+            if not future.done():
+                future.set_result(predictions.tolist())
+
+
+def _location_id(trip, field):
+    """
+    A location ID as an int; integral numbers and digit strings are accepted.
+    """
+    value = trip[field]
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value)
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"{field} must be an integer location ID, got {json.dumps(value)}")
+    if not math.isfinite(value) or value != int(value):
+        raise ValueError(f"{field} must be an integer location ID, got {value}")
+    return int(value)
+
+
+def parse_trips(body):
+    """
+    Validate a /predict body and return it as a list of trip dicts.
+    """
+    payload = json.loads(body)
+    trips = payload if isinstance(payload, list) else [payload]
+    if not trips:
+        raise ValueError('no trips in request')
+    for trip in trips:
+        if not isinstance(trip, dict):
+            raise ValueError('each trip must be a JSON object')
+        missing = [field for field in REQUIRED_FIELDS if field not in trip]
+        if missing:
+            raise ValueError(f"missing fields: {', '.join(missing)}")
+        for field in ('PULocationID', 'DOLocationID'):
+            trip[field] = _location_id(trip, field)
+        distance = trip['trip_distance']
+        if isinstance(distance, bool) or not isinstance(distance, (int, float, str)):
+            raise ValueError(f"trip_distance must be a number, got {json.dumps(distance)}")
+        try:
+            distance = float(distance)
+        except ValueError:
+            raise ValueError(f"trip_distance must be a number, got {json.dumps(trip['trip_distance'])}")
+        if not math.isfinite(distance):
+            raise ValueError('trip_distance must be finite')
+        trip['trip_distance'] = distance
+    return trips
+
+
+class PredictionServer:
+    """
+    Minimal keep-alive HTTP/1.1 server in front of a MicroBatcher.
+    """
+
+    def __init__(self, batcher, host='127.0.0.1', port=8000):
+        self.batcher = batcher
+        self.stats = batcher.stats
+        self.host = host
+        self.port = port
+        self.server = None
+
+    async def start(self):
+        self.batcher.start()
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        # Port 0 picks a free port
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+        await self.batcher.stop()
+
+    async def serve_forever(self):
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, version = request_line.decode('latin-1').split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get('content-length', 0))
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, 413, {'error': 'request body too large'}, False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+
+                keep_alive = (headers.get('connection', '').lower() != 'close'
+                              and version == 'HTTP/1.1')
+                status, payload = await self._route(method, path, body)
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method, path, body):
+        if method == 'POST' and path == '/predict':
+            start = time.perf_counter()
+            try:
+                trips = parse_trips(body)
+                predictions = await self.batcher.predict(trips)
+            except (ValueError, TypeError) as e:
+                self.stats.errors += 1
+                return 400, {'error': str(e)}
+            except Exception as e:
+                self.stats.errors += 1
+                return 500, {'error': str(e)}
+            self.stats.record_request(time.perf_counter() - start)
+            return 200, {'predictions': predictions}
+        if method == 'GET' and path == '/metrics':
+            return 200, self.stats.snapshot()
+        if method == 'GET' and path == '/health':
+            return 200, {'status': 'ok'}
+        return 404, {'error': f'no route for {method} {path}'}
+
+    @staticmethod
+    async def _respond(writer, status, payload, keep_alive):
+        reasons = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 413: 'Payload Too Large',
+                   500: 'Internal Server Error'}
+        body = json.dumps(payload).encode()
+        head = (f"HTTP/1.1 {status} {reasons[status]}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode() + body)
+        await writer.drain()
+
+
+def load_predictor(tracking_uri, model_name, model_version=None):
+    """
+    Load the model bundle from the registry once and wrap it for serving.
+    """
+    from utils.registry import load_model_bundle
+
+    bundle, version = load_model_bundle(model_name, model_version, tracking_uri)
+    print(f"✅ Loaded {version.name} version {version.version} (run {version.run_id})")
+    return TripPredictor(bundle['model'], bundle['vectorizer'])
+
+
+def parse_args():
+    from utils.registry import MODEL_NAME, TRACKING_URI
+
+    parser = argparse.ArgumentParser(description="Serve taxi trip-duration predictions over HTTP")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--tracking-uri', default=TRACKING_URI)
+    parser.add_argument('--model-name', default=MODEL_NAME)
+    parser.add_argument('--model-version', help="registered version to serve (default: newest)")
+    parser.add_argument('--max-batch-size', type=int, default=64, help="trips per micro-batch")
+    parser.add_argument('--max-wait-ms', type=float, default=2.0,
+                        help="how long a batch waits for more requests")
+    return parser.parse_args()
+
+
+async def serve(args):
+    predictor = load_predictor(args.tracking_uri, args.model_name, args.model_version)
+    batcher = MicroBatcher(predictor.predict, args.max_batch_size, args.max_wait_ms)
+    server = await PredictionServer(batcher, args.host, args.port).start()
+    print(f"🚀 Serving predictions on http://{args.host}:{server.port}/predict "
+          f"(batch ≤ {args.max_batch_size}, wait ≤ {args.max_wait_ms} ms)")
+    try:
+        await server.serve_forever()
+    finally:
+        await batcher.stop()
+
+
+def main():
+    args = parse_args()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        print("\n👋 Server stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,44 +4,124 @@ Complete pipeline execution script that ensures MLflow and Mage integration work
 This script will run the pipeline and verify the results are visible in both UIs.
 """
 
-import os
 import sys
 import time
-import requests
-import json
 
 # Add taxi_training_pipeline to path
 sys.path.append('./taxi_training_pipeline')
 
-def run_pipeline():
-    """Run the complete ML pipeline"""
+def run_pipeline(cache=None, profiler=None, background_upload=False, feature_cache_dir=None):
+    """Run the complete ML pipeline
+
+    With a BlockCache, the load/prepare/train outputs are cached and a rerun
+    with unchanged inputs resumes after the last cached block. With a
+    BlockProfiler, every block call is instrumented and the results are
+    logged as metrics on the MLflow run created by register_model. With
+    background_upload, register_model uploads and registers on a background
+    thread; main() waits for it before verifying MLflow. With
+    feature_cache_dir, train_model keeps its encoded features there, keyed
+    by the prepare_data cache key when there is one.
+    """
     print("🚀 Starting Complete Pipeline Execution...")
     print("=" * 60)
     
-    # Import and run all blocks in sequence
+    # Import and run all blocks in sequence (register_model, and with it
+    # mlflow, is only imported once there is a model to register)
     try:
-        # Block 1: Load data
-        print("\n📊 Block 1: Loading taxi data...")
-        from data_loaders.load_taxi_data import load_data
-        df = load_data()
-        print(f"✅ Loaded {len(df):,} records")
-        
-        # Block 2: Prepare data
-        print("\n🔧 Block 2: Preparing data...")
+        import_start = time.perf_counter()
+        from data_loaders.load_taxi_data import load_data, resolve_file_path
         from transformers.prepare_data import transform_data
-        df_prepared = transform_data(df)
-        print(f"✅ Prepared {len(df_prepared):,} records")
-        
-        # Block 3: Train model
-        print("\n🤖 Block 3: Training model...")
         from transformers.train_model import transform_data as train_model
-        model_info = train_model(df_prepared)
-        print(f"✅ Model trained (intercept: {model_info['intercept']:.2f})")
+        print(f"📦 Blocks imported in {time.perf_counter() - import_start:.2f}s")
+        
+        steps = [
+            ('load_taxi_data', load_data, {}),
+            ('prepare_data', transform_data, {}),
+            ('train_model', train_model, {}),
+        ]
+        headers = [
+            "\n📊 Block 1: Loading taxi data...",
+            "\n🔧 Block 2: Preparing data...",
+            "\n🤖 Block 3: Training model...",
+        ]
+        keys, start = cache.plan(steps, resolve_file_path()) if cache is not None else (None, 0)
+        
+        data = None
+        for i, (name, func, params) in enumerate(steps):
+            print(headers[i])
+            if i < start - 1:
+                print("⏭️  Skipped (a later block is cached)")
+                continue
+            if name == 'train_model' and feature_cache_dir:
+                # Passed at call time so the train_model cache key stays the same
+                params = {**params, 'feature_cache_dir': feature_cache_dir,
+                          'data_fingerprint': keys[i - 1] if keys is not None else None}
+            if i == start - 1:
+                data = cache.get(keys[i])
+                print("⚡ Loaded from cache")
+            elif profiler is not None:
+                data = profiler.run(name, func, data, **params)
+                if cache is not None:
+                    cache.put(keys[i], data, name)
+            else:
+                data = func(data, **params)
+                if cache is not None:
+                    cache.put(keys[i], data, name)
+            
+            if name == 'load_taxi_data':
+                print(f"✅ Loaded {len(data):,} records")
+            elif name == 'prepare_data':
+                print(f"✅ Prepared {len(data):,} records")
+            else:
+                print(f"✅ Model trained (intercept: {data['intercept']:.2f})")
+        model_info = data
         
         # Block 4: Register with MLflow
         print("\n📝 Block 4: Registering model with MLflow...")
+        import_start = time.perf_counter()
         from data_exporters.register_model import export_data
-        result = export_data(model_info)
+        print(f"📦 register_model imported in {time.perf_counter() - import_start:.2f}s")
+        if profiler is not None:
+            result = profiler.run('register_model', export_data, model_info,
+                                  block_metrics=profiler.metrics(),
+                                  background_upload=background_upload)
+            # register_model's own numbers are only known once its run has closed
+            profiler.log_to_mlflow(result['run_id'], blocks=['register_model'])
+        else:
+            result = export_data(model_info, background_upload=background_upload)
+        print(f"✅ Model registered (size: {result['model_size']} bytes)")
+        
+        return True, result
+        
+    except Exception as e:
+        print(f"❌ Pipeline failed: {e}")
+        return False, None
+
+def run_project_dag(background_upload=False, max_workers=None, mode='thread'):
+    """Run every pipeline of the project as one concurrent block DAG
+
+    Builds the graph from pipelines/*/metadata.yaml (utils/dag.py), so the
+    Titanic pipeline runs alongside the taxi one, and each block's @test
+    runs while its downstream blocks continue. In process mode the model is
+    always uploaded before register_model returns: its worker process exits
+    when the block does, which would drop a queued background upload.
+    """
+    print("🚀 Starting Project DAG Execution...")
+    print("=" * 60)
+    
+    if mode == 'process' and background_upload:
+        print("⚠️  Background upload is not available in process mode; uploading in the block")
+        background_upload = False
+    
+    try:
+        from utils.dag import run_project
+        
+        summary = run_project('taxi_training_pipeline', max_workers=max_workers, mode=mode,
+                              variables={'background_upload': background_upload})
+        print(f"\n⏱️  Wall time {summary['wall_seconds']:.2f}s for {summary['sum_seconds']:.2f}s of blocks; "
+              f"critical path {summary['critical_path_seconds']:.2f}s "
+              f"({' → '.join(summary['critical_path'])})")
+        result = summary['outputs']['register_model']
         print(f"✅ Model registered (size: {result['model_size']} bytes)")
         
         return True, result
@@ -51,34 +131,38 @@ def run_pipeline():
         return False, None
 
 def verify_mlflow():
-    """Verify MLflow has the data"""
+    """Verify MLflow has the data
+
+    Reads the local run summary index (utils/run_index.py) after an
+    incremental sync, instead of loading every run of every experiment.
+    """
     print("\n🔍 Verifying MLflow Integration...")
     
     try:
-        import mlflow
-        mlflow.set_tracking_uri("sqlite:///mlflow.db")
-        
-        # Check experiments
-        experiments = mlflow.search_experiments()
-        print(f"✅ MLflow: Found {len(experiments)} experiments")
+        from utils.run_index import RunIndex
         
-        # Check runs in taxi-duration-prediction experiment
-        for exp in experiments:
-            if exp.name == "taxi-duration-prediction":
-                runs = mlflow.search_runs(experiment_ids=[exp.experiment_id])
-                print(f"✅ MLflow: {len(runs)} runs in {exp.name}")
-                
-                if len(runs) > 0:
-                    latest_run = runs.iloc[0]
-                    print(f"✅ MLflow: Latest run status: {latest_run['status']}")
-                
-        # Check registered models
-        client = mlflow.MlflowClient()
-        try:
-            models = client.search_model_versions("name='taxi-duration-model'")
-            print(f"✅ MLflow: {len(models)} model versions registered")
-        except Exception as e:
-            print(f"⚠️  MLflow: Model check failed: {e}")
+        with RunIndex(tracking_uri="sqlite:///mlflow.db") as index:
+            index.sync()
+            
+            # Check experiments
+            experiments = index.experiments()
+            print(f"✅ MLflow: Found {len(experiments)} experiments")
+            
+            # Check runs in taxi-duration-prediction experiment
+            for exp in experiments:
+                if exp['name'] == "taxi-duration-prediction":
+                    print(f"✅ MLflow: {exp['n_runs']} runs in {exp['name']}")
+                    
+                    latest_run = index.latest_run(exp['name'])
+                    if latest_run is not None:
+                        print(f"✅ MLflow: Latest run status: {latest_run['status']}")
+                    
+            # Check registered models
+            try:
+                models = index.versions('taxi-duration-model')
+                print(f"✅ MLflow: {len(models)} model versions registered")
+            except Exception as e:
+                print(f"⚠️  MLflow: Model check failed: {e}")
             
         return True
         
@@ -89,6 +173,7 @@ def verify_mlflow():
 def check_web_interfaces():
     """Check that web interfaces are accessible"""
     print("\n🌐 Checking Web Interfaces...")
+    import requests
     
     # Check MLflow
     try:
@@ -110,18 +195,68 @@ def check_web_interfaces():
     except Exception as e:
         print(f"❌ Mage UI: Not accessible - {e}")
 
+def parse_args():
+    import argparse
+    from utils.block_cache import DEFAULT_CACHE_DIR
+    from utils.feature_cache import DEFAULT_FEATURE_CACHE_DIR
+    
+    parser = argparse.ArgumentParser(description="Run the taxi pipeline and verify MLflow/Mage")
+    parser.add_argument('--no-cache', action='store_true', help="always recompute every block")
+    parser.add_argument('--clear-cache', action='store_true', help="invalidate cached block outputs first")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR)
+    parser.add_argument('--cache-max-gb', type=float, default=4.0)
+    parser.add_argument('--feature-cache-dir', default=DEFAULT_FEATURE_CACHE_DIR,
+                        help="keep encoded training features here (disabled by --no-cache)")
+    parser.add_argument('--profile', action='store_true', help="record per-block time, CPU, memory and rows")
+    parser.add_argument('--profile-report', default='reports/pipeline_profile.json')
+    parser.add_argument('--trace-memory', action='store_true', help="also track the tracemalloc peak (slower)")
+    parser.add_argument('--cprofile-dir', help="write a cProfile dump per block into this directory")
+    parser.add_argument('--background-upload', action='store_true',
+                        help="upload and register the model on a background thread")
+    parser.add_argument('--dag', action='store_true',
+                        help="run all project pipelines as one concurrent DAG (no block cache or profiling)")
+    parser.add_argument('--dag-workers', type=int, help="blocks to run at once in --dag mode")
+    parser.add_argument('--dag-mode', choices=['thread', 'process'], default='thread')
+    args = parser.parse_args()
+    if args.dag and args.dag_mode == 'process' and args.background_upload:
+        parser.error("--background-upload cannot be used with --dag-mode process: "
+                     "the block's worker process exits before the upload finishes")
+    return args
+
 def main():
+    args = parse_args()
     print("🔄 MLflow + Mage Integration Test")
     print("=" * 60)
     
+    cache = None
+    if not args.no_cache:
+        from utils.block_cache import BlockCache
+        cache = BlockCache(args.cache_dir, max_bytes=int(args.cache_max_gb * 1024 ** 3))
+        if args.clear_cache:
+            print(f"🧹 Cleared {cache.clear()} cached block outputs")
+    
+    profiler = None
+    if args.profile:
+        from utils.profiling import BlockProfiler
+        profiler = BlockProfiler(trace_memory=args.trace_memory, cprofile_dir=args.cprofile_dir)
+    
     # 1. Run the pipeline
-    pipeline_success, result = run_pipeline()
+    if args.dag:
+        pipeline_success, result = run_project_dag(args.background_upload, args.dag_workers, args.dag_mode)
+    else:
+        pipeline_success, result = run_pipeline(cache, profiler, args.background_upload,
+                                                None if args.no_cache else args.feature_cache_dir)
+    if profiler is not None:
+        print(f"\n⏱️  Profile report: {profiler.write_report(args.profile_report)}")
     
     if not pipeline_success:
         print("\n❌ FAILED: Pipeline execution failed")
         sys.exit(1)
     
     # 2. Verify MLflow
+    if args.background_upload:
+        from utils.tracking import wait_for_uploads
+        wait_for_uploads()
     mlflow_success = verify_mlflow()
     
     # 3. Check web interfaces
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Train and register several pipeline configurations in parallel.
+
+Every combination of --files and --sample-sizes (or --training-mode full)
+is one job. Jobs train in a process pool; the finished models are
+registered one at a time by this process, so the SQLite tracking store
+only ever has one writer (see utils/coordinator.py).
+
+Usage:
+    python run_parallel_training.py --files ../data/yellow_tripdata_2023-0{1,2,3}.parquet
+    python run_parallel_training.py --sample-sizes 50k,100k,200k --workers 3
+    python run_parallel_training.py --files a.parquet b.parquet --training-mode full
+"""
+
+import argparse
+import itertools
+import sys
+import time
+
+# Add taxi_training_pipeline to path
+sys.path.append('./taxi_training_pipeline')
+
+
+def build_jobs(args):
+    """
+    One job (a dict of block kwargs) per file and sample size.
+    """
+    from benchmark_pipeline import parse_size
+    from data_loaders.load_taxi_data import resolve_file_path
+
+    files = args.files or [resolve_file_path()]
+    sizes = [parse_size(size) for size in args.sample_sizes.split(',')] if args.training_mode == 'sample' else [None]
+    jobs = []
+    for file_path, sample_size in itertools.product(files, sizes):
+        job = {'file_path': file_path, 'training_mode': args.training_mode}
+        if sample_size is not None:
+            job['sample_size'] = sample_size
+        else:
+            job['streaming'] = True
+            job['data_source'] = file_path
+        jobs.append(job)
+    return jobs
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Train pipeline jobs in parallel with a single MLflow writer")
+    parser.add_argument('--files', nargs='+', help="parquet files to train on (default: the March 2023 file)")
+    parser.add_argument('--sample-sizes', default='100k', help="comma-separated sample sizes for sample mode")
+    parser.add_argument('--training-mode', choices=['sample', 'full'], default='sample')
+    parser.add_argument('--workers', type=int, help="training processes (default: CPU count)")
+    parser.add_argument('--tracking-uri', default='sqlite:///mlflow.db')
+    return parser.parse_args()
+
+
+def main():
+    from utils.coordinator import RunCoordinator
+
+    args = parse_args()
+    jobs = build_jobs(args)
+    coordinator = RunCoordinator(args.workers, tracking_uri=args.tracking_uri)
+    print(f"🚀 Training {len(jobs)} jobs on {min(coordinator.n_workers, len(jobs))} workers")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    results = coordinator.run(jobs)
+    elapsed = time.perf_counter() - start
+
+    print("\n" + "=" * 60)
+    for result in results:
+        job = result['job']
+        label = f"{job['file_path']} ({job.get('sample_size', job['training_mode'])})"
+        if 'error' in result:
+            print(f"❌ {label}: {result['error']}")
+        else:
+            print(f"✅ {label}: run {result['run_id']}, intercept {result['intercept']:.2f}")
+    failed = sum('error' in result for result in results)
+    print(f"⏱️  {len(jobs)} jobs in {elapsed:.1f}s ({failed} failed)")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
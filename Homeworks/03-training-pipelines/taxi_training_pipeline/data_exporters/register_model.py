@@ -1,110 +1,193 @@
 import mlflow
-import pickle
+import shutil
 import tempfile
 import os
 import pandas as pd
-import numpy as np
-from datetime import datetime
-from mlflow.models.signature import infer_signature
+
+from utils.artifact_store import dedupe_run_artifacts
+from utils.registry import (
+    COMPACT_MODEL_PATH, EXPERIMENT_NAME, MODEL_NAME, TRACKING_URI,
+    get_or_create_experiment, register_run_artifact, stage_compact_model, stage_training_state,
+)
+from utils.run_index import RunIndex
+from utils.tracking import BatchedRunLogger, get_uploader, tracking_lock
 
 if 'data_exporter' not in globals():
-    from mage_ai.data_preparation.decorators import data_exporter
+    from utils.decorators import data_exporter
+
+
+def upload_and_register(client, run_id, staging_dir, registered_path, tracking_uri, dedupe=True):
+    """
+    Upload the staged artifacts, register the model version and close the run.
+
+    With dedupe, uploaded files identical to earlier runs' artifacts are
+    hard-linked to one shared copy (see utils.artifact_store).
+    """
+    try:
+        client.log_artifacts(run_id, staging_dir)
+        if dedupe:
+            deduped = dedupe_run_artifacts(client, run_id)
+            if deduped and deduped['linked']:
+                print(f"Linked {deduped['linked']} of {deduped['files']} artifacts to existing copies "
+                      f"({deduped['bytes_saved']:,} bytes saved)")
+        with tracking_lock(tracking_uri):
+            version = register_run_artifact(run_id, registered_path, MODEL_NAME, tracking_uri)
+            client.set_terminated(run_id)
+        print(f"Registered {MODEL_NAME} version {version.version}")
+        try:
+            with RunIndex(tracking_uri=tracking_uri) as index:
+                index.record_run(run_id, version)
+        except Exception as e:
+            # Not fatal: the next RunIndex.sync() picks the run up
+            print(f"⚠️  Run index not updated: {e}")
+        return version.version
+    except BaseException:
+        with tracking_lock(tracking_uri):
+            client.set_terminated(run_id, status='FAILED')
+        raise
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
 
 
 @data_exporter
 def export_data(data, *args, **kwargs):
     """
     Register the trained model with MLflow and calculate its size.
+
+    When the model was trained from sufficient statistics, the statistics
+    and vocabulary are logged with it so the next month can be added
+    incrementally (train_model training_mode='incremental'). Profiling
+    results of upstream blocks passed as block_metrics are logged as metrics
+    of the same run, as are the hyperparameters and metrics of a model
+    chosen by sweep_models, whose registration run becomes a child of the
+    sweep run. The model is serialized once, as the memory-mappable .txm
+    file (model_compact/): that file is what gets registered and its size is
+    the reported model size. utils.registry rebuilds the sklearn pair or the
+    LookupPredictor from it. sklearn_flavor=True additionally saves an
+    MLflow sklearn model (model/) with a signature, for the MLflow UI.
+
+    Params, metrics and tags (plus any run_tags) are written in one
+    log_batch call, and every write to the store happens under
+    utils.tracking.tracking_lock so parallel pipelines take turns. All
+    artifacts are serialized into a staging directory, then uploaded and
+    registered as one job; with background_upload=True that job runs on a
+    background thread (see utils.tracking) and the block returns at once.
+    Local artifacts are deduplicated against earlier runs unless
+    dedupe_artifacts=False, and the finished run is added to the run
+    summary index (utils.run_index).
     """
     model_info = data
-    
+
     # Set MLflow tracking URI to local SQLite database
-    mlflow.set_tracking_uri("sqlite:///mlflow.db")
-    
-    # Set experiment
-    experiment_name = "taxi-duration-prediction"
-    try:
-        experiment = mlflow.get_experiment_by_name(experiment_name)
-        if experiment is None:
-            experiment_id = mlflow.create_experiment(experiment_name)
-        else:
-            experiment_id = experiment.experiment_id
-    except Exception:
-        experiment_id = mlflow.create_experiment(experiment_name)
-    
-    mlflow.set_experiment(experiment_name)
-    
+    tracking_uri = kwargs.get('tracking_uri', TRACKING_URI)
+    mlflow.set_tracking_uri(tracking_uri)
+    client = mlflow.MlflowClient(tracking_uri=tracking_uri)
+
+    # Set experiment; idempotent, so parallel pipelines can race here
+    experiment_id = get_or_create_experiment(EXPERIMENT_NAME, tracking_uri)
+
     # Start MLflow run
-    with mlflow.start_run():
-        # Log parameters
-        mlflow.log_param("model_type", "LinearRegression")
-        mlflow.log_param("vectorizer_type", "DictVectorizer")
-        mlflow.log_param("n_features", model_info['n_features'])
-        mlflow.log_param("training_samples", model_info['training_samples'])
-        
-        # Log metrics
-        mlflow.log_metric("intercept", model_info['intercept'])
-        
-        # Create input example and signature
-        # Create sample input data that matches the training format
-        input_example = pd.DataFrame([
-            {
-                'PULocationID': '161',
-                'DOLocationID': '236', 
-                'trip_distance': 2.5
-            },
-            {
-                'PULocationID': '43',
-                'DOLocationID': '151',
-                'trip_distance': 1.8
-            }
-        ])
-        
-        # Transform the input example using the vectorizer to match model expectations
+    with tracking_lock(tracking_uri):
+        run = client.create_run(experiment_id)
+    run_id = run.info.run_id
+    logger = BatchedRunLogger(client, run_id)
+
+    # Log parameters
+    logger.log_param("model_type", model_info.get('model_type', "LinearRegression"))
+    logger.log_param("vectorizer_type", "DictVectorizer")
+    logger.log_param("n_features", model_info['n_features'])
+    logger.log_param("training_samples", model_info['training_samples'])
+    logger.log_param("training_mode", model_info.get('training_mode', 'sample'))
+    logger.log_param("model_format", 'compact')
+    if model_info.get('base_model_version') is not None:
+        logger.log_param("base_model_version", model_info['base_model_version'])
+    if model_info.get('hyperparameters'):
+        logger.log_params(model_info['hyperparameters'])
+
+    # Log metrics
+    logger.log_metric("intercept", model_info['intercept'])
+    if kwargs.get('block_metrics'):
+        logger.log_metrics(kwargs['block_metrics'])
+    if model_info.get('metrics'):
+        logger.log_metrics(model_info['metrics'])
+    if kwargs.get('run_tags'):
+        logger.set_tags(kwargs['run_tags'])
+    if model_info.get('parent_run_id'):
+        # e.g. the sweep run whose winner this is
+        logger.set_tag('mlflow.parentRunId', model_info['parent_run_id'])
+
+    staging_dir = tempfile.mkdtemp(prefix='register-model-')
+    try:
+        # Stage the training state with the model, so any registered
+        # version that has state can be continued from
+        training_state = model_info.get('training_state')
+        if training_state is not None:
+            stage_training_state(training_state, staging_dir)
+            logger.set_tag("training_sources", ",".join(training_state.sources))
+
         vectorizer = model_info['vectorizer']
         model = model_info['model']
-        
-        # Convert to dictionary format as expected by the vectorizer
-        input_dicts = input_example.to_dict('records')
-        X_example = vectorizer.transform(input_dicts)
-        
-        # Generate predictions for signature inference
-        example_predictions = model.predict(X_example)
-        
-        # Infer signature from input and output
-        signature = infer_signature(X_example.toarray(), example_predictions)
-        
-        # Create a temporary file to save the model
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pkl') as tmp_file:
-            # Save both model and vectorizer together
-            model_data = {
-                'model': model_info['model'],
-                'vectorizer': model_info['vectorizer']
-            }
-            pickle.dump(model_data, tmp_file)
-            tmp_file.flush()
-            
-            # Get file size
-            model_size = os.path.getsize(tmp_file.name)
-            
-            # Log the model with input example and signature
-            mlflow.sklearn.log_model(
-                sk_model=model_info['model'],
-                artifact_path="model",
-                registered_model_name="taxi-duration-model",
+
+        # Serialize once: the file whose size is reported is the one logged
+        # and registered
+        model_size = stage_compact_model(model, vectorizer, staging_dir)
+        registered_path = COMPACT_MODEL_PATH
+
+        if kwargs.get('sklearn_flavor', False):
+            from mlflow.models.signature import infer_signature
+
+            # Create sample input data that matches the training format
+            input_example = pd.DataFrame([
+                {
+                    'PULocationID': '161',
+                    'DOLocationID': '236',
+                    'trip_distance': 2.5
+                },
+                {
+                    'PULocationID': '43',
+                    'DOLocationID': '151',
+                    'trip_distance': 1.8
+                }
+            ])
+
+            # Transform the input example using the vectorizer to match model expectations
+            X_example = vectorizer.transform(input_example.to_dict('records'))
+            signature = infer_signature(X_example.toarray(), model.predict(X_example))
+
+            # Save the model with input example and signature
+            mlflow.sklearn.save_model(
+                sk_model=model,
+                path=os.path.join(staging_dir, "model"),
                 input_example=X_example.toarray(),
                 signature=signature
             )
-            
-            # Clean up temporary file
-            os.unlink(tmp_file.name)
-    
-    print(f"Model registered successfully!")
+
+        logger.log_metric("model_size", model_size)
+        with tracking_lock(tracking_uri):
+            logger.flush()
+    except BaseException:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        with tracking_lock(tracking_uri):
+            client.set_terminated(run_id, status='FAILED')
+        raise
+
+    # Upload and register off the pipeline's critical path if asked to
+    background = kwargs.get('background_upload', False)
+    upload = get_uploader().submit(upload_and_register, client, run_id, staging_dir,
+                                   registered_path, tracking_uri, kwargs.get('dedupe_artifacts', True))
+    if background:
+        print(f"Model queued for upload and registration (run {run_id})")
+    else:
+        upload.result()
+        print("Model registered successfully!")
     print(f"Model size: {model_size} bytes")
     print(f"Answer for Question 6: {model_size}")
-    
+
     return {
         'model_size': model_size,
+        'model_format': 'compact',
         'intercept': model_info['intercept'],
-        'experiment_id': experiment_id
-    } 
\ No newline at end of file
+        'experiment_id': experiment_id,
+        'run_id': run_id,
+        'upload_pending': background,
+    }
@@ -0,0 +1,84 @@
+import os
+import tempfile
+
+from data_loaders.load_taxi_data import resolve_file_path
+from utils.batch_scoring import PREDICTION_COLUMN, score_parquet
+from utils.parquet_stream import DEFAULT_CHUNK_ROWS
+from utils.registry import MODEL_NAME, TRACKING_URI, download_compact_model, load_model_bundle
+
+if 'data_exporter' not in globals():
+    from utils.decorators import data_exporter
+if 'test' not in globals():
+    from utils.decorators import test
+
+
+def default_output_path(input_path, output_dir='predictions'):
+    name = os.path.splitext(os.path.basename(input_path))[0]
+    return os.path.join(output_dir, f"{name}_predictions.parquet")
+
+
+@data_exporter
+def export_data(data=None, *args, **kwargs):
+    """
+    Score a month of taxi trips with the registered model and write the predictions.
+
+    Uses the model and vectorizer of the upstream train_model output when
+    there is one, otherwise loads them once from the registry (newest
+    version, or model_version). The input parquet is scored in chunks of
+    chunk_rows rows across n_workers processes and the predictions are
+    written, in input order, to output_path. With compact=True the registered .txm
+    model is memory-mapped by the workers and scored without sklearn.
+    """
+    input_path = resolve_file_path(kwargs.get('file_path'))
+    output_path = kwargs.get('output_path') or default_output_path(input_path)
+
+    if isinstance(data, dict) and 'model' in data:
+        print("Scoring with the model from the upstream block")
+        summary = score_parquet(input_path, output_path, data['model'], data['vectorizer'],
+                                n_workers=kwargs.get('n_workers'),
+                                chunk_rows=kwargs.get('chunk_rows', DEFAULT_CHUNK_ROWS))
+    elif kwargs.get('compact', False):
+        # Workers memory-map the downloaded .txm file instead of unpickling the model
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            model_path, version = download_compact_model(
+                tmp_dir,
+                kwargs.get('model_name', MODEL_NAME),
+                kwargs.get('model_version'),
+                kwargs.get('tracking_uri', TRACKING_URI),
+            )
+            print(f"Scoring with compact {version.name} version {version.version}")
+            summary = score_parquet(input_path, output_path, model_path=model_path,
+                                    n_workers=kwargs.get('n_workers'),
+                                    chunk_rows=kwargs.get('chunk_rows', DEFAULT_CHUNK_ROWS))
+    else:
+        bundle, version = load_model_bundle(
+            kwargs.get('model_name', MODEL_NAME),
+            kwargs.get('model_version'),
+            kwargs.get('tracking_uri', TRACKING_URI),
+        )
+        print(f"Scoring with {version.name} version {version.version}")
+        summary = score_parquet(input_path, output_path, bundle['model'], bundle['vectorizer'],
+                                n_workers=kwargs.get('n_workers'),
+                                chunk_rows=kwargs.get('chunk_rows', DEFAULT_CHUNK_ROWS))
+
+    print(f"Scored {summary['rows']:,} trips from {input_path} "
+          f"with {summary['workers']} workers in {summary['seconds']:.1f}s")
+    print(f"Predictions written to {output_path}")
+    return summary
+
+
+@test
+def test_output(output, *args) -> None:
+    """
+    Test that predictions were written for every scored trip.
+    """
+    import pyarrow.parquet as pq
+
+    assert output is not None, 'The output is undefined'
+    assert output['rows'] > 0, 'No trips were scored'
+
+    metadata = pq.ParquetFile(output['output_path']).metadata
+    assert metadata.num_rows == output['rows'], 'Prediction file row count mismatch'
+    assert PREDICTION_COLUMN in metadata.schema.names, f'{PREDICTION_COLUMN} column not found'
+
+    print(f"✓ {output['rows']:,} predictions written to {output['output_path']}")
@@ -1,22 +1,32 @@
-import io
-import pandas as pd
-import requests
 from pandas import DataFrame
 
+from utils.http_cache import DEFAULT_HTTP_CACHE_DIR, HTTPCache
+
 if 'data_loader' not in globals():
-    from mage_ai.data_preparation.decorators import data_loader
+    from utils.decorators import data_loader
 if 'test' not in globals():
-    from mage_ai.data_preparation.decorators import test
+    from utils.decorators import test
 
 
 @data_loader
 def load_data_from_api(**kwargs) -> DataFrame:
     """
-    Template for loading data from API
+    Load the Titanic CSV through the local HTTP cache (utils.http_cache).
+
+    The parsed file is kept in http_cache_dir and revalidated with the
+    server on every run, or only after cache_ttl seconds if given;
+    offline=True uses the cached copy without any network access.
     """
-    url = 'https://raw.githubusercontent.com/datasciencedojo/datasets/master/titanic.csv?raw=True'
+    url = kwargs.get('url', 'https://raw.githubusercontent.com/datasciencedojo/datasets/master/titanic.csv?raw=True')
+    cache = HTTPCache(
+        kwargs.get('http_cache_dir', DEFAULT_HTTP_CACHE_DIR),
+        ttl=kwargs.get('cache_ttl'),
+        offline=kwargs.get('offline', False),
+    )
+    df, status = cache.fetch(url)
+    print(f"Loaded {len(df):,} rows from {url} ({status.replace('_', ' ')})")
 
-    return pd.read_csv(url)
+    return df
 
 
 @test
@@ -0,0 +1,74 @@
+import warnings
+warnings.filterwarnings('ignore')
+
+from utils.cross_validation import cross_validate
+from utils.registry import EXPERIMENT_NAME, TRACKING_URI, get_or_create_experiment
+from utils.tracking import BatchedRunLogger, tracking_lock
+
+if 'transformer' not in globals():
+    from utils.decorators import transformer
+if 'test' not in globals():
+    from utils.decorators import test
+
+
+def log_cross_validation(results, tracking_uri=TRACKING_URI):
+    """
+    Log the fold RMSEs (one fold_rmse step per fold) as a 'cross-validation' run.
+    """
+    import mlflow
+
+    client = mlflow.MlflowClient(tracking_uri=tracking_uri)
+    experiment_id = get_or_create_experiment(EXPERIMENT_NAME, tracking_uri)
+    with tracking_lock(tracking_uri):
+        run = client.create_run(experiment_id, tags={'mlflow.runName': 'cross-validation'})
+        logger = BatchedRunLogger(client, run.info.run_id)
+        logger.log_params({'cv_scheme': results['scheme'], 'n_folds': len(results['folds'])})
+        for fold in results['folds']:
+            logger.log_metric('fold_rmse', fold['rmse'], step=fold['fold'])
+            logger.log_metric('fold_n_test', fold['n_test'], step=fold['fold'])
+        logger.log_metrics({'cv_mean_rmse': results['mean_rmse'], 'cv_pooled_rmse': results['pooled_rmse']})
+        logger.flush()
+        client.set_terminated(run.info.run_id)
+    return run.info.run_id
+
+
+@transformer
+def transform_data(data, *args, **kwargs):
+    """
+    Cross-validate the linear model over folds of consecutive pickup days.
+
+    scheme='blocked' (default) trains each fold's model on all other folds;
+    scheme='expanding' trains only on earlier days. Sufficient statistics
+    are accumulated once per fold (n_workers processes) and combined per
+    fold, so no fold re-encodes or refits from the rows. Per-fold RMSE is
+    logged to MLflow unless log_to_mlflow=False.
+    """
+    results = cross_validate(
+        data,
+        n_folds=kwargs.get('n_folds', 5),
+        scheme=kwargs.get('scheme', 'blocked'),
+        n_workers=kwargs.get('n_workers', 1),
+        chunk_rows=kwargs.get('chunk_rows', 250_000),
+    )
+
+    for fold in results['folds']:
+        print(f"Fold {fold['fold']} ({fold['first_day']} - {fold['last_day']}): "
+              f"RMSE {fold['rmse']:.4f} on {fold['n_test']:,} trips, trained on {fold['n_train']:,}")
+    print(f"Cross-validated RMSE: {results['mean_rmse']:.4f} (pooled {results['pooled_rmse']:.4f})")
+
+    if kwargs.get('log_to_mlflow', True):
+        results['run_id'] = log_cross_validation(results, kwargs.get('tracking_uri', TRACKING_URI))
+    return results
+
+
+@test
+def test_output(output, *args) -> None:
+    """
+    Test that every evaluated fold has a finite RMSE.
+    """
+    assert output is not None, 'The output is undefined'
+    assert output['folds'], 'No folds were evaluated'
+    for fold in output['folds']:
+        assert fold['rmse'] >= 0 and fold['n_test'] > 0, f"Invalid fold {fold['fold']}"
+
+    print(f"✓ {len(output['folds'])} folds, cross-validated RMSE {output['mean_rmse']:.4f}")
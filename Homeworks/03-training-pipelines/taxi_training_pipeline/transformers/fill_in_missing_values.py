@@ -1,30 +1,35 @@
+import os
+
 from pandas import DataFrame
-import math
+
+from utils.imputation import MedianImputer
 
 if 'transformer' not in globals():
-    from mage_ai.data_preparation.decorators import transformer
+    from utils.decorators import transformer
 if 'test' not in globals():
-    from mage_ai.data_preparation.decorators import test
+    from utils.decorators import test
 
 def select_number_columns(df: DataFrame) -> DataFrame:
     return df[['Age', 'Fare', 'Parch', 'Pclass', 'SibSp', 'Survived']]
 
 
-def fill_missing_values_with_median(df: DataFrame) -> DataFrame:
-    for col in df.columns:
-        values = sorted(df[col].dropna().tolist())
-        median_value = values[math.floor(len(values) / 2)]
-        df[[col]] = df[[col]].fillna(median_value)
-    return df
+def fill_missing_values_with_median(df: DataFrame, group_by=None, method='upper') -> DataFrame:
+    """
+    Fill every column with its (upper by default) median; see utils.imputation.
+    """
+    return MedianImputer(group_by=group_by, method=method).fit_transform(df)
 
 
 @transformer
 def transform_df(df: DataFrame, *args, **kwargs) -> DataFrame:
     """
-    Template code for a transformer block.
+    Fill missing numeric values with medians.
 
-    Add more parameters to this function if this block has multiple parent blocks.
-    There should be one parameter for each output variable from each parent block.
+    Medians are the upper median of each column (median_method='midpoint'
+    for the usual one), per group_by group if given. With imputer_path the
+    fitted medians are saved there, and later runs (e.g. scoring) reuse
+    them instead of refitting unless refit_imputer=True.
+    approximate=True fits from bounded-memory quantile sketches.
 
     Args:
         df (DataFrame): Data frame from parent block.
@@ -32,9 +37,23 @@ def transform_df(df: DataFrame, *args, **kwargs) -> DataFrame:
     Returns:
         DataFrame: Transformed data frame
     """
-    # Specify your transformation logic here
+    df = select_number_columns(df)
+    imputer_path = kwargs.get('imputer_path')
+
+    if imputer_path and os.path.exists(imputer_path) and not kwargs.get('refit_imputer', False):
+        imputer = MedianImputer.load(imputer_path)
+        print(f"Filling missing values with medians from {imputer_path}")
+    else:
+        imputer = MedianImputer(
+            group_by=kwargs.get('group_by'),
+            method=kwargs.get('median_method', 'upper'),
+            approximate=kwargs.get('approximate', False),
+        ).fit(df)
+        if imputer_path:
+            imputer.save(imputer_path)
+            print(f"Saved fitted medians to {imputer_path}")
 
-    return fill_missing_values_with_median(select_number_columns(df))
+    return imputer.transform(df)
 
 
 @test
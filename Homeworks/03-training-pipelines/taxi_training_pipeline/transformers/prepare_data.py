@@ -1,35 +1,84 @@
+import numpy as np
 import pandas as pd
+
+from utils.parquet_stream import MappedChunks
+
 if 'transformer' not in globals():
-    from mage_ai.data_preparation.decorators import transformer
+    from utils.decorators import transformer
 if 'test' not in globals():
-    from mage_ai.data_preparation.decorators import test
+    from utils.decorators import test
 
 
-@transformer
-def transform_data(data, *args, **kwargs):
+def prepare_trips(data):
     """
-    Prepare the data for training by calculating duration and filtering.
+    Add the duration column, keep 1-60 minute trips and make the IDs strings.
     """
     df = data.copy()
-    
+
     # Calculate duration in minutes
     df['duration'] = (df['tpep_dropoff_datetime'] - df['tpep_pickup_datetime']).dt.total_seconds() / 60
-    
+
     # Filter records with duration between 1 and 60 minutes
-    initial_count = len(df)
     df_filtered = df[(df['duration'] >= 1) & (df['duration'] <= 60)].copy()
-    final_count = len(df_filtered)
-    
+
     # Convert categorical columns to string
     categorical_columns = ['PULocationID', 'DOLocationID']
     for col in categorical_columns:
         df_filtered[col] = df_filtered[col].astype(str)
-    
+
+    return df_filtered
+
+
+def prepare_trips_lean(data):
+    """
+    Memory-lean version of prepare_trips.
+
+    Does not copy the input: the duration is computed once, the mask is
+    applied column by column to the five trip columns only, and the result
+    uses compact dtypes - integer categorical location IDs, float32 distance
+    and duration, and second-resolution timestamps.
+    """
+    pickup = data['tpep_pickup_datetime']
+    dropoff = data['tpep_dropoff_datetime']
+    duration = ((dropoff - pickup).dt.total_seconds() / 60).to_numpy()
+    mask = (duration >= 1) & (duration <= 60)
+
+    df = pd.DataFrame({
+        'tpep_pickup_datetime': pickup.to_numpy()[mask].astype('datetime64[s]'),
+        'tpep_dropoff_datetime': dropoff.to_numpy()[mask].astype('datetime64[s]'),
+        'trip_distance': data['trip_distance'].to_numpy()[mask].astype(np.float32),
+        'PULocationID': pd.Categorical(data['PULocationID'].to_numpy()[mask]),
+        'DOLocationID': pd.Categorical(data['DOLocationID'].to_numpy()[mask]),
+        'duration': duration[mask].astype(np.float32),
+    }, index=data.index[mask])
+
+    return df
+
+
+@transformer
+def transform_data(data, *args, **kwargs):
+    """
+    Prepare the data for training by calculating duration and filtering.
+
+    A chunk source from the streaming loader is prepared lazily, one chunk
+    at a time, as it is consumed downstream. With lean=True the input is not
+    copied and the output keeps only the trip columns in compact dtypes.
+    """
+    prepare = prepare_trips_lean if kwargs.get('lean', False) else prepare_trips
+
+    if not isinstance(data, pd.DataFrame):
+        print("Preparing streamed data chunk by chunk")
+        return MappedChunks(data, prepare)
+
+    initial_count = len(data)
+    df_filtered = prepare(data)
+    final_count = len(df_filtered)
+
     print(f"Initial records: {initial_count:,}")
     print(f"Records after filtering: {final_count:,}")
     print(f"Records removed: {initial_count - final_count:,}")
     print(f"Answer for Question 4: {final_count}")
-    
+
     return df_filtered
 
 
@@ -39,8 +88,12 @@ def test_output(output, *args) -> None:
     Test that the output has duration column and no invalid durations.
     """
     assert output is not None, 'The output is undefined'
+    if not isinstance(output, pd.DataFrame):
+        print("✓ Data will be prepared chunk by chunk")
+        return
+
     assert 'duration' in output.columns, 'Duration column not found'
     assert output['duration'].min() >= 1, 'Duration less than 1 minute found'
     assert output['duration'].max() <= 60, 'Duration greater than 60 minutes found'
-    
-    print(f"✓ Data prepared successfully with {len(output):,} records") 
\ No newline at end of file
+
+    print(f"✓ Data prepared successfully with {len(output):,} records")
@@ -0,0 +1,90 @@
+import warnings
+warnings.filterwarnings('ignore')
+
+from utils.feature_cache import FeatureCache
+from utils.registry import TRACKING_URI
+from utils.reservoir import sample_stream
+from utils.sweep import candidate_grid, log_sweep, run_sweep
+
+if 'transformer' not in globals():
+    from utils.decorators import transformer
+if 'test' not in globals():
+    from utils.decorators import test
+
+
+@transformer
+def transform_data(data, *args, **kwargs):
+    """
+    Sweep Ridge / Lasso / ElasticNet alphas and feature sets, keep the best.
+
+    Drop-in alternative to train_model: the prepared trips are encoded once,
+    the candidates are fitted in parallel on a shared memory-mapped matrix
+    (n_workers processes, default one per CPU) and ranked by RMSE on a
+    validation_fraction hold-out. Each candidate is logged as a child run of
+    a 'sweep' MLflow run; the winner, refitted on all rows, is returned as
+    model_info for register_model, which registers it under the same parent.
+    grid ({model_type: [alphas]}) and feature_sets (names from
+    utils.sweep.FEATURE_SETS) narrow the search. With feature_cache_dir the
+    encoded sample is mapped from utils.feature_cache when it was seen before,
+    so re-sweeping a different grid skips the encoding.
+    """
+    sample_size = kwargs.get('sample_size', 100000)
+    data, n_rows = sample_stream(data, sample_size, seed=kwargs.get('seed', 42),
+                                 stratify_by=kwargs.get('stratify_by'))
+    if n_rows > sample_size:
+        print(f"Using sample of {sample_size:,} records")
+
+    candidates = candidate_grid(kwargs.get('grid'), kwargs.get('feature_sets'))
+    results, winner = run_sweep(
+        data,
+        candidates,
+        n_workers=kwargs.get('n_workers'),
+        validation_fraction=kwargs.get('validation_fraction', 0.2),
+        seed=kwargs.get('seed', 42),
+        feature_cache=FeatureCache(kwargs['feature_cache_dir']) if kwargs.get('feature_cache_dir') else None,
+    )
+
+    for result in results:
+        print(f"  {result['model_type']:<11} alpha={result['alpha']:<8g} {result['feature_set']:<20} "
+              f"RMSE {result['rmse']:.4f}  ({result['fit_seconds']:.2f}s)")
+
+    parent_run_id = None
+    if kwargs.get('log_candidates', True):
+        parent_run_id = log_sweep(results, kwargs.get('tracking_uri', TRACKING_URI))
+        print(f"Logged {len(results)} candidates under sweep run {parent_run_id}")
+
+    model, dv = winner['model'], winner['vectorizer']
+    print(f"Best: {winner['model_type']} alpha={winner['alpha']:g} on {winner['feature_set']} "
+          f"(validation RMSE {winner['rmse']:.4f})")
+    print(f"Model intercept: {model.intercept_:.6f}")
+
+    return {
+        'model': model,
+        'vectorizer': dv,
+        'intercept': model.intercept_,
+        'n_features': len(dv.feature_names_),
+        'training_samples': len(data),
+        'training_mode': 'sweep',
+        'training_state': None,
+        'base_model_version': None,
+        'model_type': type(model).__name__,
+        'hyperparameters': {'alpha': winner['alpha'], 'feature_set': winner['feature_set']},
+        'metrics': {'val_rmse': winner['rmse']},
+        'parent_run_id': parent_run_id,
+        'sweep': results,
+    }
+
+
+@test
+def test_output(output, *args) -> None:
+    """
+    Test that a winning model was selected.
+    """
+    assert output is not None, 'The output is undefined'
+    assert 'model' in output, 'Model not found in output'
+    assert output['sweep'], 'No candidates were evaluated'
+    assert output['metrics']['val_rmse'] == min(r['rmse'] for r in output['sweep']), \
+        'Winner is not the best candidate'
+
+    print(f"✓ Best of {len(output['sweep'])} candidates: {output['model_type']}, "
+          f"RMSE {output['metrics']['val_rmse']:.4f}")
@@ -1,58 +1,150 @@
-import pandas as pd
-import numpy as np
-from sklearn.feature_extraction import DictVectorizer
-from sklearn.linear_model import LinearRegression
-import pickle
 import warnings
 warnings.filterwarnings('ignore')
 
+from utils.feature_cache import FeatureCache, encode_features
+from utils.feature_encoding import CATEGORICAL_FEATURES, NUMERICAL_FEATURES
+from utils.reservoir import sample_stream
+from utils.sufficient_stats import accumulate_stats
+
 if 'transformer' not in globals():
-    from mage_ai.data_preparation.decorators import transformer
+    from utils.decorators import transformer
 if 'test' not in globals():
-    from mage_ai.data_preparation.decorators import test
+    from utils.decorators import test
 
 
-@transformer
-def transform_data(data, *args, **kwargs):
+def train_on_sample(data, sample_size=100000, feature_cache=None, data_fingerprint=None,
+                    stratify_by=None, seed=42):
     """
-    Train a linear regression model using DictVectorizer for feature encoding.
+    Fit LinearRegression in memory on (a sample of) prepared trips.
+
+    data can be a DataFrame or a chunk source; the sample is drawn in one
+    pass by utils.reservoir, uniformly or evenly across stratify_by, and is
+    the same for a given seed however the data is chunked. With a
+    FeatureCache the encoded sample is reused from disk when the same
+    prepared data was encoded before; data_fingerprint (e.g. the
+    prepare_data cache key) identifies the data without hashing it.
     """
-    # Sample data for memory efficiency (100k records)
-    np.random.seed(42)
-    if len(data) > 100000:
-        sample_data = data.sample(n=100000, random_state=42)
-        print(f"Using sample of 100,000 records from {len(data):,} total records")
+    sample_data, n_rows = sample_stream(data, sample_size, seed=seed, stratify_by=stratify_by)
+    if n_rows > sample_size:
+        print(f"Using sample of {sample_size:,} records from {n_rows:,} total records")
+        if data_fingerprint is not None:
+            data_fingerprint = f"{data_fingerprint}|sample={sample_size}|seed={seed}|strata={stratify_by}"
     else:
-        sample_data = data.copy()
-        print(f"Using all {len(data):,} records")
+        print(f"Using all {n_rows:,} records")
     
-    # Prepare features and target
-    categorical_features = ['PULocationID', 'DOLocationID']
-    numerical_features = ['trip_distance']
+    # Vectorize features column-wise (same matrix and vocabulary as DictVectorizer)
+    X, y, encoder = encode_features(sample_data, CATEGORICAL_FEATURES, NUMERICAL_FEATURES,
+                                    cache=feature_cache, fingerprint=data_fingerprint, name='train_model')
+    dv = encoder.to_dict_vectorizer()
     
-    # Create feature dictionaries
-    features = []
-    for _, row in sample_data.iterrows():
-        feature_dict = {}
-        # Add categorical features
-        for cat_feature in categorical_features:
-            feature_dict[cat_feature] = row[cat_feature]
-        # Add numerical features
-        for num_feature in numerical_features:
-            feature_dict[num_feature] = row[num_feature]
-        features.append(feature_dict)
-    
-    # Target variable
-    y = sample_data['duration'].values
-    
-    # Vectorize features
-    dv = DictVectorizer(sparse=True)
-    X = dv.fit_transform(features)
-    
-    # Train linear regression model
+    # Train linear regression model (sklearn is only imported when a sample is fitted)
+    from sklearn.linear_model import LinearRegression
+
     lr = LinearRegression()
     lr.fit(X, y)
     
+    return lr, dv, len(sample_data)
+
+
+def train_on_full_data(data, data_source=None, chunk_rows=250_000, n_workers=1):
+    """
+    Fit on every row by accumulating X'X / X'y chunk by chunk and solving once.
+
+    data can be a prepared DataFrame or a chunk source from the streaming
+    loader / prepare_data; with n_workers > 1 the chunks are summarised in a
+    process pool.
+    """
+    stats = accumulate_stats(data, CATEGORICAL_FEATURES, NUMERICAL_FEATURES,
+                             chunk_rows=chunk_rows, n_workers=n_workers)
+    print(f"Accumulated statistics over {stats.n_samples:,} records "
+          f"({stats.n_slots - 1} candidate features)")
+    if data_source is not None:
+        stats.sources.append(data_source)
+    lr, dv = stats.solve()
+    return lr, dv, stats
+
+
+def train_incrementally(data, data_source=None, chunk_rows=250_000, n_workers=1, tracking_uri=None):
+    """
+    Fold only the new data into the training state of the latest registered model.
+
+    The statistics saved with the newest registered version are loaded and
+    the new chunks are added on top, so a retrain costs one month of data
+    rather than the whole history. data_source (e.g. the monthly file name)
+    is recorded in the state to stop the same data being added twice.
+    """
+    from utils.registry import MODEL_NAME, TRACKING_URI, load_training_state
+
+    previous, version = load_training_state(MODEL_NAME, tracking_uri or TRACKING_URI)
+    if previous is None:
+        print(f"No saved training state for {MODEL_NAME}, training from scratch")
+    else:
+        print(f"Continuing from {MODEL_NAME} version {version.version} "
+              f"({previous.n_samples:,} records from {len(previous.sources)} sources)")
+        if data_source is not None and data_source in previous.sources:
+            raise ValueError(f"{data_source} is already part of the training state")
+
+    stats = accumulate_stats(data, CATEGORICAL_FEATURES, NUMERICAL_FEATURES,
+                             chunk_rows=chunk_rows, n_workers=n_workers)
+    print(f"Accumulated statistics over {stats.n_samples:,} new records")
+    if data_source is not None:
+        stats.sources.append(data_source)
+    if previous is not None:
+        stats = previous.merge(stats)
+
+    lr, dv = stats.solve()
+    base_version = version.version if previous is not None else None
+    return lr, dv, stats, base_version
+
+
+@transformer
+def transform_data(data, *args, **kwargs):
+    """
+    Train a linear regression model on DictVectorizer-compatible one-hot features.
+
+    training_mode='sample' (default) fits on a 100k-row sample in memory,
+    optionally stratified by a column (stratify_by) and drawn with seed;
+    training_mode='full' fits on all rows out of core via sufficient statistics;
+    training_mode='incremental' adds the rows to the state of the latest
+    registered model instead of starting over. feature_cache_dir keeps the
+    encoded sample on disk (utils.feature_cache) for the next experiment.
+    """
+    training_mode = kwargs.get('training_mode', 'sample')
+    training_state = None
+    base_version = None
+    
+    if training_mode == 'sample':
+        feature_cache = None
+        if kwargs.get('feature_cache_dir'):
+            feature_cache = FeatureCache(kwargs['feature_cache_dir'])
+        lr, dv, training_samples = train_on_sample(
+            data,
+            kwargs.get('sample_size', 100000),
+            feature_cache=feature_cache,
+            data_fingerprint=kwargs.get('data_fingerprint'),
+            stratify_by=kwargs.get('stratify_by'),
+            seed=kwargs.get('seed', 42),
+        )
+    elif training_mode == 'full':
+        lr, dv, training_state = train_on_full_data(
+            data,
+            data_source=kwargs.get('data_source'),
+            chunk_rows=kwargs.get('chunk_rows', 250_000),
+            n_workers=kwargs.get('n_workers', 1),
+        )
+        training_samples = training_state.n_samples
+    elif training_mode == 'incremental':
+        lr, dv, training_state, base_version = train_incrementally(
+            data,
+            data_source=kwargs.get('data_source'),
+            chunk_rows=kwargs.get('chunk_rows', 250_000),
+            n_workers=kwargs.get('n_workers', 1),
+            tracking_uri=kwargs.get('tracking_uri'),
+        )
+        training_samples = training_state.n_samples
+    else:
+        raise ValueError(f"Unknown training_mode: {training_mode}")
+    
     # Get model intercept
     intercept = lr.intercept_
     print(f"Model intercept: {intercept:.6f}")
@@ -63,8 +155,11 @@ def transform_data(data, *args, **kwargs):
         'model': lr,
         'vectorizer': dv,
         'intercept': intercept,
-        'n_features': X.shape[1],
-        'training_samples': len(sample_data)
+        'n_features': len(dv.feature_names_),
+        'training_samples': training_samples,
+        'training_mode': training_mode,
+        'training_state': training_state,
+        'base_model_version': base_version,
     }
     
     return model_info
@@ -0,0 +1,208 @@
+"""
+Content-addressed deduplication of local MLflow artifacts.
+
+Every artifact file is hashed (SHA-256) and kept once in a blob directory
+(<artifact root>/.blobs/ab/abcd...). Each run's copy is replaced by a hard
+link to its blob, so the run directories, and with them every artifact URI
+MLflow hands out, stay exactly as they were while identical model.pkl,
+conda.yaml, python_env.yaml and requirements.txt files share one inode.
+A blob's link count is its reference count: once no run links to it any
+more (the runs were deleted) `gc` removes it. Blobs are made read-only, as
+an in-place edit of one run's file would change every run sharing it.
+
+register_model deduplicates each run's artifacts right after uploading
+them; `compact` does the same for an existing mlruns tree.
+
+Command line:
+    python taxi_training_pipeline/utils/artifact_store.py compact [--root mlruns] [--dry-run]
+    python taxi_training_pipeline/utils/artifact_store.py gc [--root mlruns]
+    python taxi_training_pipeline/utils/artifact_store.py info [--root mlruns]
+"""
+import hashlib
+import os
+import stat
+from urllib.parse import unquote, urlparse
+
+
+DEFAULT_ROOT = 'mlruns'
+BLOB_DIR_NAME = '.blobs'
+HASH_CHUNK_BYTES = 1024 * 1024
+
+
+def file_digest(path):
+    """
+    SHA-256 hex digest of a file's contents.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_CHUNK_BYTES), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class BlobStore:
+    """
+    Hard-link blob directory under an artifact root such as mlruns/.
+    """
+
+    def __init__(self, root=DEFAULT_ROOT):
+        self.root = root
+        self.blob_dir = os.path.join(root, BLOB_DIR_NAME)
+        self._inodes = None
+        self._dry_run_digests = set()
+
+    def blob_path(self, digest):
+        return os.path.join(self.blob_dir, digest[:2], digest)
+
+    def blobs(self):
+        """
+        Yield (path, os.stat_result) for every blob.
+        """
+        if not os.path.isdir(self.blob_dir):
+            return
+        for prefix in sorted(os.listdir(self.blob_dir)):
+            prefix_dir = os.path.join(self.blob_dir, prefix)
+            for name in sorted(os.listdir(prefix_dir)):
+                path = os.path.join(prefix_dir, name)
+                yield path, os.stat(path)
+
+    def _is_blob(self, st):
+        # Files already linked to a blob are recognised by inode, not rehashed
+        if self._inodes is None:
+            self._inodes = {(blob.st_dev, blob.st_ino) for _, blob in self.blobs()}
+        return (st.st_dev, st.st_ino) in self._inodes
+
+    def add(self, path, dry_run=False):
+        """
+        Store path as a blob, or link it to the existing blob with the same contents.
+
+        Returns the number of bytes freed (0 for new or already linked
+        files, and where hard links are not supported).
+        """
+        st = os.stat(path)
+        if self._is_blob(st):
+            return 0
+        digest = file_digest(path)
+        blob = self.blob_path(digest)
+        if dry_run:
+            if os.path.exists(blob) or digest in self._dry_run_digests:
+                return st.st_size
+            self._dry_run_digests.add(digest)
+            return 0
+
+        os.makedirs(os.path.dirname(blob), exist_ok=True)
+        try:
+            try:
+                os.link(path, blob)
+            except FileExistsError:
+                tmp_path = f"{path}.dedupe-tmp"
+                if os.path.lexists(tmp_path):
+                    os.remove(tmp_path)
+                os.link(blob, tmp_path)
+                os.replace(tmp_path, path)
+                return st.st_size
+            os.chmod(blob, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+            return 0
+        except OSError:
+            # Different file system or no hard link support: keep the copy
+            return 0
+        finally:
+            if os.path.exists(blob):
+                blob_st = os.stat(blob)
+                self._inodes.add((blob_st.st_dev, blob_st.st_ino))
+
+    def compact(self, directory=None, dry_run=False):
+        """
+        Deduplicate every file under directory (default: the whole root).
+        """
+        result = {'files': 0, 'linked': 0, 'bytes_saved': 0}
+        for dirpath, dirnames, filenames in os.walk(directory or self.root):
+            dirnames[:] = [d for d in dirnames if os.path.join(dirpath, d) != self.blob_dir]
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                if os.path.islink(path):
+                    continue
+                saved = self.add(path, dry_run=dry_run)
+                result['files'] += 1
+                result['linked'] += saved > 0
+                result['bytes_saved'] += saved
+        return result
+
+    def gc(self, dry_run=False):
+        """
+        Remove blobs no run links to any more; returns (blobs removed, bytes freed).
+        """
+        removed, freed = 0, 0
+        for path, st in list(self.blobs()):
+            if st.st_nlink > 1:
+                continue
+            if not dry_run:
+                os.remove(path)
+            removed += 1
+            freed += st.st_size
+        self._inodes = None
+        return removed, freed
+
+    def info(self):
+        """
+        Blob count, bytes stored once, and bytes the links would take as copies.
+        """
+        count, stored, logical = 0, 0, 0
+        for _, st in self.blobs():
+            count += 1
+            stored += st.st_size
+            logical += st.st_size * (st.st_nlink - 1)
+        return {'blobs': count, 'stored_bytes': stored, 'referenced_bytes': logical}
+
+
+def local_artifact_dir(artifact_uri):
+    """
+    Local path of a file:// or plain-path artifact URI, None for remote stores.
+    """
+    parsed = urlparse(artifact_uri)
+    if parsed.scheme not in ('', 'file'):
+        return None
+    return unquote(parsed.path)
+
+
+def dedupe_run_artifacts(client, run_id):
+    """
+    Deduplicate a run's uploaded artifacts against the rest of its artifact root.
+
+    The root is the directory holding the experiment directories, e.g.
+    mlruns/ for mlruns/<experiment>/<run>/artifacts. Returns the compact()
+    result, or None when the run's artifacts are not on the local disk.
+    """
+    artifact_dir = local_artifact_dir(client.get_run(run_id).info.artifact_uri)
+    if artifact_dir is None or not os.path.isdir(artifact_dir):
+        return None
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(artifact_dir))))
+    return BlobStore(root).compact(artifact_dir)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Deduplicate a local MLflow artifact tree')
+    parser.add_argument('command', choices=['compact', 'gc', 'info'])
+    parser.add_argument('--root', default=DEFAULT_ROOT)
+    parser.add_argument('--dry-run', action='store_true', help='report savings without changing files')
+    args = parser.parse_args(argv)
+
+    store = BlobStore(args.root)
+    if args.command == 'compact':
+        result = store.compact(dry_run=args.dry_run)
+        verb = 'Would link' if args.dry_run else 'Linked'
+        print(f"{verb} {result['linked']} of {result['files']} files to existing blobs, "
+              f"{result['bytes_saved'] / 1e6:.2f} MB saved")
+    elif args.command == 'gc':
+        removed, freed = store.gc(dry_run=args.dry_run)
+        print(f"Removed {removed} unreferenced blobs ({freed / 1e6:.2f} MB)")
+    else:
+        info = store.info()
+        print(f"{info['blobs']} blobs, {info['stored_bytes'] / 1e6:.2f} MB stored for "
+              f"{info['referenced_bytes'] / 1e6:.2f} MB of run artifacts")
+
+
+if __name__ == '__main__':
+    main()
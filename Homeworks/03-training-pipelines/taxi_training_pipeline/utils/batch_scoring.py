@@ -0,0 +1,199 @@
+"""
+Chunked, multi-process batch scoring of taxi trip parquet files.
+
+Every row is decoded once. When the file has at least one row group per
+worker, each task is a row group that its worker reads itself; otherwise
+(e.g. a file written as one big row group) the parent streams batches of
+chunk_rows rows with iter_batches and hands them to the workers, so the
+work is still spread over all of them. Each worker process gets the model
+and vectorizer once through the pool initializer, reads or receives only
+the feature and passthrough columns, encodes them with ColumnarEncoder and
+returns an arrow table of predictions. Results are written with a
+ParquetWriter in task order while later tasks are still being scored, and
+at most max_in_flight tasks are held at a time, so memory stays bounded by
+a few chunks whatever the size of the file. Given the path of a compact .txm
+model instead, workers memory-map it and score by table lookup.
+"""
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from utils.feature_encoding import ColumnarEncoder
+from utils.parquet_stream import DEFAULT_CHUNK_ROWS
+
+
+PREDICTION_COLUMN = 'predicted_duration'
+PASSTHROUGH_COLUMNS = ['tpep_pickup_datetime', 'PULocationID', 'DOLocationID', 'trip_distance']
+
+# Set in each worker by _init_worker
+_scorer = None
+
+
+class TripScorer:
+    """
+    Model plus columnar encoder; scores one arrow batch at a time.
+    """
+
+    def __init__(self, model, vectorizer, passthrough_columns=None):
+        self.model = model
+        self.encoder = ColumnarEncoder.from_dict_vectorizer(vectorizer)
+        self.feature_columns = self.encoder.categorical_features + self.encoder.numerical_features
+        self.passthrough_columns = list(PASSTHROUGH_COLUMNS if passthrough_columns is None
+                                        else passthrough_columns)
+
+    @property
+    def read_columns(self):
+        columns = list(self.passthrough_columns)
+        for column in self.feature_columns:
+            if column not in columns:
+                columns.append(column)
+        return columns
+
+    def predict(self, features):
+        return self.model.predict(self.encoder.transform(features.to_pandas()))
+
+    def score_batch(self, batch):
+        predictions = self.predict(batch.select(self.feature_columns))
+        table = pa.Table.from_batches([batch.select(self.passthrough_columns)])
+        return table.append_column(PREDICTION_COLUMN, pa.array(predictions, type=pa.float64()))
+
+    def score_row_group(self, file_path, row_group, chunk_rows=DEFAULT_CHUNK_ROWS):
+        parquet_file = pq.ParquetFile(file_path)
+        tables = [self.score_batch(batch)
+                  for batch in parquet_file.iter_batches(batch_size=chunk_rows, row_groups=[row_group],
+                                                         columns=self.read_columns)]
+        return pa.concat_tables(tables) if tables else None
+
+
+class CompactTripScorer(TripScorer):
+    """
+    Scores with a memory-mapped .txm model by table lookup, without sklearn.
+
+    Every worker maps the same file, so the weights are shared through the
+    page cache instead of being unpickled into each process.
+    """
+
+    def __init__(self, model_path, passthrough_columns=None):
+        from utils.model_format import load_compact_model
+
+        self.model = load_compact_model(model_path)
+        self.feature_columns = (self.model.header['categorical_features']
+                                + self.model.header['numerical_features'])
+        self.passthrough_columns = list(PASSTHROUGH_COLUMNS if passthrough_columns is None
+                                        else passthrough_columns)
+
+    def predict(self, features):
+        return self.model.predict({name: features.column(name).to_numpy(zero_copy_only=False)
+                                   for name in features.column_names})
+
+
+def _make_scorer(model, vectorizer, passthrough_columns, model_path):
+    if model_path is not None:
+        return CompactTripScorer(model_path, passthrough_columns)
+    return TripScorer(model, vectorizer, passthrough_columns)
+
+
+def _init_worker(model, vectorizer, passthrough_columns, model_path):
+    global _scorer
+    _scorer = _make_scorer(model, vectorizer, passthrough_columns, model_path)
+
+
+def _score_row_group(file_path, row_group, chunk_rows):
+    return _scorer.score_row_group(file_path, row_group, chunk_rows)
+
+
+def _score_batch(batch):
+    return _scorer.score_batch(batch)
+
+
+def score_parquet(input_path, output_path, model=None, vectorizer=None, n_workers=None,
+                  chunk_rows=DEFAULT_CHUNK_ROWS, passthrough_columns=None, max_in_flight=None,
+                  model_path=None):
+    """
+    Score every trip of input_path and write the predictions to output_path.
+
+    Scores with model and vectorizer, or with the compact .txm model at
+    model_path, which each worker memory-maps. Tasks are row groups, or
+    batches of chunk_rows rows read by this process when there are fewer
+    row groups than workers; output rows are in input order. The output is
+    written to a temporary file and renamed into place when complete. Returns a summary dict.
+    """
+    if model_path is None and (model is None or vectorizer is None):
+        raise ValueError('score_parquet needs model and vectorizer, or model_path')
+
+    start = time.perf_counter()
+    n_workers = n_workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or 2 * n_workers
+    parquet_file = pq.ParquetFile(input_path)
+    metadata = parquet_file.metadata
+    by_row_group = metadata.num_row_groups >= n_workers
+    n_tasks = metadata.num_row_groups if by_row_group else -(-metadata.num_rows // chunk_rows)
+    # Also used here to pick the columns to read when the parent streams batches
+    scorer = _make_scorer(model, vectorizer, passthrough_columns, model_path)
+
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = output_path + '.tmp'
+
+    writer = None
+    n_rows = 0
+    n_chunks = 0
+
+    def write(table):
+        nonlocal writer, n_rows
+        if table is None:
+            return
+        if writer is None:
+            writer = pq.ParquetWriter(tmp_path, table.schema)
+        writer.write_table(table)
+        n_rows += table.num_rows
+
+    try:
+        if n_workers == 1 or n_tasks <= 1:
+            for batch in parquet_file.iter_batches(batch_size=chunk_rows, columns=scorer.read_columns):
+                write(scorer.score_batch(batch))
+                n_chunks += 1
+        else:
+            with ProcessPoolExecutor(max_workers=min(n_workers, n_tasks),
+                                     initializer=_init_worker,
+                                     initargs=(model, vectorizer, passthrough_columns, model_path)) as pool:
+                if by_row_group:
+                    tasks = ((_score_row_group, input_path, row_group, chunk_rows)
+                             for row_group in range(metadata.num_row_groups))
+                else:
+                    tasks = ((_score_batch, batch) for batch in
+                             parquet_file.iter_batches(batch_size=chunk_rows, columns=scorer.read_columns))
+                pending = deque()
+                for task in tasks:
+                    if len(pending) >= max_in_flight:
+                        write(pending.popleft().result())
+                    pending.append(pool.submit(*task))
+                    n_chunks += 1
+                while pending:
+                    write(pending.popleft().result())
+    except BaseException:
+        if writer is not None:
+            writer.close()
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+    if writer is None:
+        raise ValueError(f'No rows to score in {input_path}')
+    writer.close()
+    os.replace(tmp_path, output_path)
+
+    seconds = time.perf_counter() - start
+    return {
+        'output_path': output_path,
+        'rows': n_rows,
+        'row_groups': metadata.num_row_groups,
+        'chunks': n_chunks,
+        'workers': max(1, min(n_workers, n_tasks)),
+        'seconds': seconds,
+    }
@@ -0,0 +1,274 @@
+"""
+Content-addressed on-disk cache for pipeline block outputs.
+
+A block's cache key is a hash of its upstream key (or the contents of its
+input files), the source code of the block module and of every project
+utils module, and its parameters. Keys chain from block to block, so when a run's
+inputs are unchanged the pipeline can skip straight to the first block
+whose key is not cached. DataFrames are stored as parquet, everything else
+is pickled. Entries are evicted least-recently-used once the cache grows
+past max_bytes.
+
+Command line:
+    python taxi_training_pipeline/utils/block_cache.py info
+    python taxi_training_pipeline/utils/block_cache.py clear [--block NAME]
+"""
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import time
+
+
+DEFAULT_CACHE_DIR = '.block_cache'
+DEFAULT_MAX_BYTES = 4 * 1024 ** 3
+UTILS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_file_hashes = {}
+
+
+def file_fingerprint(path):
+    """
+    Hash of a file's contents, memoized on (path, size, mtime) within a process.
+    """
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    if memo_key not in _file_hashes:
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(8 * 1024 * 1024), b''):
+                digest.update(block)
+        _file_hashes[memo_key] = digest.hexdigest()
+    return _file_hashes[memo_key]
+
+
+def utils_fingerprint():
+    """
+    Hash of every utils/*.py file.
+
+    All of them are hashed, not just the modules a block's globals point to:
+    a block can use a utils module through a lazy import inside the
+    function, or through another utils module, or take only constants from
+    it, and none of those show up in its globals.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for name in sorted(os.listdir(UTILS_DIR)):
+        if name.endswith('.py'):
+            digest.update(name.encode())
+            digest.update(file_fingerprint(os.path.join(UTILS_DIR, name)).encode())
+    return digest.hexdigest()
+
+
+def source_fingerprint(func):
+    """
+    Hash of the module defining func plus all project utils modules.
+    """
+    module = inspect.getmodule(func)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(module.__name__.encode())
+    digest.update(inspect.getsource(module).encode())
+    digest.update(utils_fingerprint().encode())
+    return digest.hexdigest()
+
+
+def params_fingerprint(params):
+    return hashlib.blake2b(
+        json.dumps(params or {}, sort_keys=True, default=repr).encode(), digest_size=16
+    ).hexdigest()
+
+
+class BlockCache:
+    """
+    Directory of cached block outputs, one sub-directory per key.
+    """
+
+    def __init__(self, root=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+
+    def key(self, func, upstream, params=None):
+        """
+        Cache key for func given its upstream key(s) or input file path(s).
+        """
+        upstream = upstream if isinstance(upstream, (list, tuple)) else [upstream]
+        parts = []
+        for item in upstream:
+            if isinstance(item, str) and os.path.isfile(item):
+                parts.append(file_fingerprint(item))
+            else:
+                parts.append(str(item))
+        parts.append(source_fingerprint(func))
+        parts.append(params_fingerprint(params))
+        return hashlib.blake2b('|'.join(parts).encode(), digest_size=20).hexdigest()
+
+    def _entry(self, key):
+        return os.path.join(self.root, key)
+
+    def _remove(self, key):
+        shutil.rmtree(self._entry(key), ignore_errors=True)
+
+    def contains(self, key):
+        return os.path.exists(os.path.join(self._entry(key), 'meta.json'))
+
+    def get(self, key):
+        """
+        Return the cached value for key; raises KeyError on a miss.
+        """
+        entry = self._entry(key)
+        try:
+            with open(os.path.join(entry, 'meta.json')) as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            raise KeyError(key)
+
+        path = os.path.join(entry, meta['file'])
+        if meta['format'] == 'parquet':
+            import pandas as pd
+            value = pd.read_parquet(path)
+        else:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+        # Record the access for LRU eviction
+        os.utime(os.path.join(entry, 'meta.json'))
+        return value
+
+    def put(self, key, value, name=None):
+        """
+        Store value under key, then evict old entries beyond max_bytes.
+        """
+        tmp_dir = tempfile.mkdtemp(prefix='.tmp-', dir=self.root)
+        try:
+            if _is_dataframe(value):
+                file_name, fmt = 'data.parquet', 'parquet'
+                value.to_parquet(os.path.join(tmp_dir, file_name))
+            else:
+                file_name, fmt = 'data.pkl', 'pickle'
+                with open(os.path.join(tmp_dir, file_name), 'wb') as f:
+                    pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            meta = {
+                'name': name,
+                'format': fmt,
+                'file': file_name,
+                'created': time.time(),
+                'size': os.path.getsize(os.path.join(tmp_dir, file_name)),
+            }
+            with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+                json.dump(meta, f)
+            if os.path.exists(self._entry(key)):
+                self._remove(key)
+            os.rename(tmp_dir, self._entry(key))
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        self.evict()
+
+    def entries(self):
+        """
+        List (key, meta, last_access) for every complete entry.
+        """
+        found = []
+        for key in os.listdir(self.root):
+            meta_path = os.path.join(self.root, key, 'meta.json')
+            if key.startswith('.') or not os.path.exists(meta_path):
+                continue
+            with open(meta_path) as f:
+                meta = json.load(f)
+            found.append((key, meta, os.path.getmtime(meta_path)))
+        return found
+
+    def size(self):
+        return sum(meta['size'] for _, meta, _ in self.entries())
+
+    def evict(self, max_bytes=None):
+        """
+        Delete least recently used entries until the cache fits in max_bytes.
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        entries = sorted(self.entries(), key=lambda entry: entry[2])
+        total = sum(meta['size'] for _, meta, _ in entries)
+        evicted = []
+        while entries and total > max_bytes:
+            key, meta, _ = entries.pop(0)
+            self._remove(key)
+            total -= meta['size']
+            evicted.append(key)
+        return evicted
+
+    def clear(self, name=None):
+        """
+        Invalidate all entries, or only those written by block name.
+        """
+        removed = 0
+        for key, meta, _ in self.entries():
+            if name is None or meta.get('name') == name:
+                self._remove(key)
+                removed += 1
+        return removed
+
+    def run(self, name, func, data, upstream, params=None):
+        """
+        Memoize func(data, **params) under the key derived from upstream.
+
+        Returns (value, key, hit). data may be a zero-argument callable so
+        it is only produced on a miss.
+        """
+        key = self.key(func, upstream, params)
+        if self.contains(key):
+            return self.get(key), key, True
+        value = func(data() if callable(data) else data, **(params or {}))
+        self.put(key, value, name)
+        return value, key, False
+
+    def plan(self, steps, inputs):
+        """
+        Compute the chained keys of a linear list of (name, func, params) steps.
+
+        The first step is keyed by inputs (e.g. the source file path). Returns
+        (keys, start) where start is the index of the first step that has to
+        run: every step before start - 1 can be skipped and step start - 1
+        loaded from the cache.
+        """
+        keys = []
+        upstream = inputs
+        for name, func, params in steps:
+            upstream = self.key(func, upstream, params)
+            keys.append(upstream)
+
+        for i in reversed(range(len(steps))):
+            if self.contains(keys[i]):
+                return keys, i + 1
+        return keys, 0
+
+
+def _is_dataframe(value):
+    pandas = sys.modules.get('pandas')
+    return pandas is not None and isinstance(value, pandas.DataFrame)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Inspect or invalidate the block output cache')
+    parser.add_argument('command', choices=['info', 'clear'])
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR)
+    parser.add_argument('--block', help='only clear entries written by this block')
+    args = parser.parse_args(argv)
+
+    cache = BlockCache(args.cache_dir)
+    if args.command == 'clear':
+        removed = cache.clear(args.block)
+        print(f"Removed {removed} cache entries from {args.cache_dir}")
+    else:
+        for key, meta, accessed in sorted(cache.entries(), key=lambda entry: entry[2]):
+            print(f"{key[:12]}  {meta.get('name') or '-':<16} {meta['format']:<8} "
+                  f"{meta['size'] / 1e6:>10.1f} MB  {time.ctime(accessed)}")
+        print(f"Total: {cache.size() / 1e6:.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Train several pipeline configurations in parallel against one tracking store.
+
+RunCoordinator runs the load -> prepare -> train blocks of each job in a
+process pool and registers the finished models from the coordinating
+process only, one at a time, while the remaining jobs keep training. With a
+single writer per coordinator, plus tracking_lock between coordinators and
+standalone pipelines, a SQLite store sees one writer at a time instead of N
+processes retrying on "database is locked". The store is switched to WAL so
+that reads (e.g. loading training state) are never blocked by a write.
+
+A job is a dict of block kwargs, the same variables a Mage pipeline run
+passes to every block, e.g. {'file_path': ..., 'training_mode': 'full'}.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from utils.registry import EXPERIMENT_NAME, TRACKING_URI, get_or_create_experiment
+
+
+def train_job(job):
+    """
+    Run the load, prepare and train blocks for one job; returns model_info.
+    """
+    from data_loaders.load_taxi_data import load_data
+    from transformers.prepare_data import transform_data as prepare_data
+    from transformers.train_model import transform_data as train_model
+
+    data = load_data(**job)
+    data = prepare_data(data, **job)
+    return train_model(data, **job)
+
+
+def register_job(model_info, job, tracking_uri):
+    """
+    Register one trained model, tagging the run with the job that produced it.
+    """
+    from data_exporters.register_model import export_data
+
+    tags = {f"job.{key}": value for key, value in job.items()}
+    return export_data(model_info, tracking_uri=tracking_uri, run_tags=tags)
+
+
+class RunCoordinator:
+    """
+    Process pool for training plus a single registering writer.
+    """
+
+    def __init__(self, n_workers=None, tracking_uri=TRACKING_URI, train=train_job, register=register_job):
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.tracking_uri = tracking_uri
+        self.train = train
+        self.register = register
+
+    def run(self, jobs):
+        """
+        Train and register every job; returns one result dict per job, in order.
+
+        A failing job is reported in its result ('error') and does not stop
+        the others.
+        """
+        jobs = [dict(job) for job in jobs]
+        if any(job.get('training_mode') == 'incremental' for job in jobs) and len(jobs) > 1:
+            # Each incremental job builds on the state the previous one registered
+            raise ValueError("incremental jobs depend on each other and cannot run in parallel")
+
+        # Creates the schema (and switches to WAL) and the experiment up front
+        get_or_create_experiment(EXPERIMENT_NAME, self.tracking_uri)
+
+        results = [None] * len(jobs)
+        with ProcessPoolExecutor(max_workers=min(self.n_workers, len(jobs) or 1)) as pool:
+            futures = {pool.submit(self.train, job): i for i, job in enumerate(jobs)}
+            for future in as_completed(futures):
+                i = futures[future]
+                result = {'job': jobs[i]}
+                try:
+                    model_info = future.result()
+                    result.update(self.register(model_info, jobs[i], self.tracking_uri))
+                except Exception as e:
+                    result['error'] = f"{type(e).__name__}: {e}"
+                    print(f"❌ Job {i} failed: {result['error']}")
+                results[i] = result
+        return results
@@ -0,0 +1,257 @@
+"""
+Run the project's pipeline blocks as one DAG, concurrently.
+
+load_pipelines reads pipelines/*/metadata.yaml and builds one graph of
+blocks; a block that appears in several pipelines is one node. DAGExecutor
+starts every block as soon as all of its upstream blocks have finished, so
+independent branches (the taxi and Titanic pipelines, for instance) run side
+by side and a full run takes about as long as its critical path.
+
+Blocks are loaded the way Mage loads them: the block file is executed with
+collecting data_loader / transformer / data_exporter / test decorators in
+its globals, which gives the block function and its @test functions. A block
+is called with the outputs of its upstream blocks as positional arguments
+(in metadata order) plus the run's variables as keyword arguments. In the
+default thread mode outputs are handed on as the same Python objects, with
+no serialization; mode='process' runs each block in a worker process, which
+pickles inputs and outputs but sidesteps the GIL for pure-Python blocks.
+@test functions run on a separate thread pool while downstream blocks go
+ahead, and a failing test fails the run once everything has finished.
+"""
+import importlib.util
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+import yaml
+
+
+BLOCK_DIRS = {
+    'data_loader': 'data_loaders',
+    'transformer': 'transformers',
+    'data_exporter': 'data_exporters',
+    'custom': 'custom',
+}
+
+
+class BlockError(RuntimeError):
+    """
+    A block or one of its tests failed; block is the block uuid.
+    """
+
+    def __init__(self, block, error, stage='block'):
+        super().__init__(f"{stage} of {block} failed: {error!r}")
+        self.block = block
+        self.error = error
+        self.stage = stage
+
+
+class Block:
+    """
+    One node of the DAG: a block file and the blocks whose outputs it takes.
+    """
+
+    def __init__(self, uuid, block_type, upstream=(), pipelines=()):
+        self.uuid = uuid
+        self.type = block_type
+        self.upstream = list(upstream)
+        self.pipelines = list(pipelines)
+
+    def path(self, project_dir):
+        return os.path.join(project_dir, BLOCK_DIRS[self.type], f"{self.uuid}.py")
+
+    def __repr__(self):
+        return f"Block({self.uuid!r}, {self.type!r}, upstream={self.upstream})"
+
+
+def load_pipelines(project_dir, pipelines=None):
+    """
+    Build {uuid: Block} from the metadata of the given (default: all) pipelines.
+    """
+    pipelines_dir = os.path.join(project_dir, 'pipelines')
+    if pipelines is None:
+        pipelines = sorted(name for name in os.listdir(pipelines_dir)
+                           if os.path.exists(os.path.join(pipelines_dir, name, 'metadata.yaml')))
+    blocks = {}
+    for pipeline in pipelines:
+        with open(os.path.join(pipelines_dir, pipeline, 'metadata.yaml')) as f:
+            metadata = yaml.safe_load(f)
+        for spec in metadata.get('blocks') or []:
+            block = blocks.get(spec['uuid'])
+            if block is None:
+                block = blocks[spec['uuid']] = Block(spec['uuid'], spec['type'])
+            for upstream in spec.get('upstream_blocks') or []:
+                if upstream not in block.upstream:
+                    block.upstream.append(upstream)
+            block.pipelines.append(pipeline)
+    _check_acyclic(blocks)
+    return blocks
+
+
+def _check_acyclic(blocks):
+    for block in blocks.values():
+        for upstream in block.upstream:
+            if upstream not in blocks:
+                raise ValueError(f"{block.uuid} depends on unknown block {upstream}")
+    visiting, done = set(), set()
+
+    def visit(uuid):
+        if uuid in done:
+            return
+        if uuid in visiting:
+            raise ValueError(f"Pipeline blocks form a cycle through {uuid}")
+        visiting.add(uuid)
+        for upstream in blocks[uuid].upstream:
+            visit(upstream)
+        visiting.discard(uuid)
+        done.add(uuid)
+
+    for uuid in blocks:
+        visit(uuid)
+
+
+def load_block_functions(path):
+    """
+    Execute a block file with collecting decorators; returns (block function, tests).
+    """
+    found = {'block': None, 'tests': []}
+
+    def block_decorator(func):
+        found['block'] = func
+        return func
+
+    def test_decorator(func):
+        found['tests'].append(func)
+        return func
+
+    name = os.path.splitext(os.path.basename(path))[0]
+    spec = importlib.util.spec_from_file_location(f"_dag_block_{name}", path)
+    module = importlib.util.module_from_spec(spec)
+    for decorator in BLOCK_DIRS:
+        setattr(module, decorator, block_decorator)
+    module.test = test_decorator
+    spec.loader.exec_module(module)
+    if found['block'] is None:
+        raise ValueError(f"No block function found in {path}")
+    return found['block'], found['tests']
+
+
+def _run_block_file(path, inputs, variables):
+    func, _ = load_block_functions(path)
+    return func(*inputs, **variables)
+
+
+def critical_path(blocks, seconds):
+    """
+    (seconds, [uuids]) of the slowest chain of dependent blocks.
+    """
+    best = {}
+
+    def finish(uuid):
+        if uuid not in best:
+            chains = [finish(upstream) for upstream in blocks[uuid].upstream]
+            before = max(chains, key=lambda chain: chain[0], default=(0.0, []))
+            best[uuid] = (before[0] + seconds.get(uuid, 0.0), before[1] + [uuid])
+        return best[uuid]
+
+    return max((finish(uuid) for uuid in blocks), key=lambda chain: chain[0], default=(0.0, []))
+
+
+class DAGExecutor:
+    """
+    Run a {uuid: Block} graph with up to max_workers blocks at a time.
+    """
+
+    def __init__(self, project_dir, blocks, max_workers=None, mode='thread', run_tests=True):
+        if mode not in ('thread', 'process'):
+            raise ValueError(f"Unknown executor mode: {mode}")
+        self.project_dir = project_dir
+        self.blocks = blocks
+        if max_workers is None:
+            # Threads mostly wait on I/O or GIL-free numpy/arrow work; processes need cores
+            max_workers = len(blocks) if mode == 'thread' else min(len(blocks), os.cpu_count() or 1)
+        self.max_workers = max(1, max_workers)
+        self.mode = mode
+        self.run_tests = run_tests
+
+    def run(self, variables=None, only=None):
+        """
+        Run every block (or only those listed and their upstream blocks).
+
+        Returns a summary dict with the block outputs, per-block seconds, the
+        wall time and the critical path. Raises BlockError for the first
+        failed block or test after the running blocks have finished.
+        """
+        variables = variables or {}
+        blocks = self._with_upstream(only) if only is not None else self.blocks
+        functions = {uuid: load_block_functions(blocks[uuid].path(self.project_dir)) for uuid in blocks}
+        pool_type = ThreadPoolExecutor if self.mode == 'thread' else ProcessPoolExecutor
+
+        outputs, seconds, started_at = {}, {}, {}
+        running, test_futures, errors = {}, [], []
+        start = time.perf_counter()
+        with pool_type(max_workers=self.max_workers) as pool, ThreadPoolExecutor() as test_pool:
+            def submit_ready():
+                for uuid, block in blocks.items():
+                    if uuid in outputs or uuid in started_at:
+                        continue
+                    if all(upstream in outputs for upstream in block.upstream):
+                        inputs = [outputs[upstream] for upstream in block.upstream]
+                        started_at[uuid] = time.perf_counter()
+                        if self.mode == 'thread':
+                            future = pool.submit(functions[uuid][0], *inputs, **variables)
+                        else:
+                            future = pool.submit(_run_block_file, blocks[uuid].path(self.project_dir),
+                                                 inputs, variables)
+                        running[future] = uuid
+
+            submit_ready()
+            while running:
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    uuid = running.pop(future)
+                    seconds[uuid] = time.perf_counter() - started_at[uuid]
+                    if future.exception() is not None:
+                        errors.append(BlockError(uuid, future.exception()))
+                        continue
+                    outputs[uuid] = future.result()
+                    print(f"✓ {uuid} finished in {seconds[uuid]:.2f}s")
+                    if self.run_tests:
+                        for test in functions[uuid][1]:
+                            test_futures.append((uuid, test_pool.submit(test, outputs[uuid])))
+                if not errors:
+                    submit_ready()
+            for uuid, future in test_futures:
+                if future.exception() is not None:
+                    errors.append(BlockError(uuid, future.exception(), stage='test'))
+
+        if errors:
+            raise errors[0]
+        wall = time.perf_counter() - start
+        path_seconds, path = critical_path(blocks, seconds)
+        return {
+            'outputs': outputs,
+            'seconds': seconds,
+            'wall_seconds': wall,
+            'sum_seconds': sum(seconds.values()),
+            'critical_path': path,
+            'critical_path_seconds': path_seconds,
+        }
+
+    def _with_upstream(self, only):
+        selected, stack = {}, list(only)
+        while stack:
+            uuid = stack.pop()
+            if uuid not in selected:
+                selected[uuid] = self.blocks[uuid]
+                stack.extend(self.blocks[uuid].upstream)
+        return selected
+
+
+def run_project(project_dir, pipelines=None, variables=None, max_workers=None, mode='thread',
+                run_tests=True, only=None):
+    """
+    Load the project's pipelines as one DAG and run it; returns DAGExecutor.run's summary.
+    """
+    blocks = load_pipelines(project_dir, pipelines)
+    return DAGExecutor(project_dir, blocks, max_workers, mode, run_tests).run(variables, only)
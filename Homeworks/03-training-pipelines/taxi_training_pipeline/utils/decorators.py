@@ -0,0 +1,19 @@
+"""
+Stand-ins for Mage's block decorators when blocks run outside Mage.
+
+Inside Mage the decorators are injected into each block's globals, so the
+`if 'transformer' not in globals()` guard at the top of a block skips this
+import. Scripts and tests that import blocks directly get these no-op
+versions instead of importing mage_ai, which takes seconds.
+"""
+
+
+def _identity(func):
+    return func
+
+
+data_loader = _identity
+transformer = _identity
+data_exporter = _identity
+custom = _identity
+test = _identity
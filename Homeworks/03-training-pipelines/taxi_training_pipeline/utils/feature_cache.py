@@ -0,0 +1,222 @@
+"""
+On-disk cache of encoded feature matrices, opened by memory mapping.
+
+An entry holds the CSR (or, for the sweep, CSC) matrix as data, indices and
+indptr .npy files, the target vector and the vocabulary that
+ColumnarEncoder produced for a prepared DataFrame. Its key is a fingerprint
+of the rows and columns the encoder reads plus the encoder configuration,
+so training, sweeps and evaluation over the same prepared data share one
+encoding. Hits are mapped read-only (utils.shared_matrix) and wrapped in a
+scipy matrix without copying; the mappings are dropped when the entry is
+evicted or cleared. The directory layout, meta.json and LRU eviction by
+size are those of utils.block_cache, so
+`block_cache.py info --cache-dir .feature_cache` lists the entries too.
+
+Command line:
+    python taxi_training_pipeline/utils/feature_cache.py info
+    python taxi_training_pipeline/utils/feature_cache.py evict --max-gb 1
+    python taxi_training_pipeline/utils/feature_cache.py clear
+"""
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+if __name__ == '__main__':
+    # Run as a script: make the utils package importable
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from utils.block_cache import DEFAULT_MAX_BYTES, BlockCache
+from utils.feature_encoding import ColumnarEncoder
+from utils.shared_matrix import SharedMatrix, forget
+
+
+DEFAULT_FEATURE_CACHE_DIR = '.feature_cache'
+FORMAT_VERSION = 1
+
+
+def frame_fingerprint(df, columns):
+    """
+    Hash of the values of columns in df, independent of the index.
+
+    Categorical and numeric columns are hashed from their raw buffers; other
+    columns go through pandas' row hashing.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(str(len(df)).encode())
+    for column in columns:
+        values = df[column]
+        digest.update(f"|{column}:{values.dtype}|".encode())
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            digest.update(np.ascontiguousarray(values.cat.codes.to_numpy()).tobytes())
+            digest.update('\x00'.join(map(str, values.cat.categories)).encode())
+        elif values.dtype.kind in 'biufcmM':
+            digest.update(np.ascontiguousarray(values.to_numpy()).tobytes())
+        else:
+            digest.update(pd.util.hash_pandas_object(values, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def encoder_config(encoder):
+    return {
+        'categorical_features': encoder.categorical_features,
+        'numerical_features': encoder.numerical_features,
+        'separator': encoder.separator,
+        'dtype': np.dtype(encoder.dtype).name,
+    }
+
+
+class FeatureCache(BlockCache):
+    """
+    Directory of encoded (X, y, vocabulary) entries, one sub-directory per key.
+    """
+
+    def __init__(self, root=DEFAULT_FEATURE_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        super().__init__(root, max_bytes)
+
+    def _remove(self, key):
+        forget(self._entry(key))
+        super()._remove(key)
+
+    def feature_key(self, df, encoder, target='duration', fingerprint=None, fmt='csr'):
+        """
+        Cache key for encoding df with encoder as an fmt matrix; fingerprint replaces hashing df.
+
+        Pass a fingerprint that already identifies the prepared data (e.g.
+        the BlockCache key of prepare_data) to skip hashing the columns.
+        """
+        columns = encoder.categorical_features + encoder.numerical_features + [target]
+        if fingerprint is None:
+            fingerprint = frame_fingerprint(df, columns)
+        config = {**encoder_config(encoder), 'target': target, 'format': FORMAT_VERSION, 'matrix_format': fmt}
+        return hashlib.blake2b(
+            f"{fingerprint}|{json.dumps(config, sort_keys=True)}".encode(), digest_size=20
+        ).hexdigest()
+
+    def get(self, key):
+        """
+        Map the entry for key read-only; returns (X, y, feature_names).
+
+        X is a CSR or CSC matrix (as stored) and y an array over the mapped
+        files, so nothing is copied until a caller writes to them. Raises
+        KeyError on a miss.
+        """
+        entry = self._entry(key)
+        try:
+            with open(os.path.join(entry, 'meta.json')) as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            raise KeyError(key)
+
+        X = SharedMatrix(os.path.join(entry, 'X'), meta['shape'], sparse=True, fmt=meta['format']).open()
+        y = SharedMatrix(os.path.join(entry, 'y.npy'), [meta['shape'][0]], sparse=False).open()
+        with open(os.path.join(entry, 'vocabulary.json')) as f:
+            feature_names = json.load(f)
+        os.utime(os.path.join(entry, 'meta.json'))
+        return X, y, feature_names
+
+    def put(self, key, value, name=None):
+        """
+        Store value = (X, y, feature_names) under key, then evict beyond max_bytes.
+        """
+        X, y, feature_names = value
+        fmt = 'csc' if X.format == 'csc' else 'csr'
+        tmp_dir = tempfile.mkdtemp(prefix='.tmp-', dir=self.root)
+        try:
+            SharedMatrix.write(tmp_dir, 'X', X, fmt=fmt)
+            SharedMatrix.write(tmp_dir, 'y', np.asarray(y, dtype=np.float64))
+            with open(os.path.join(tmp_dir, 'vocabulary.json'), 'w') as f:
+                json.dump(list(feature_names), f)
+            size = sum(os.path.getsize(os.path.join(directory, file_name))
+                       for directory, _, files in os.walk(tmp_dir) for file_name in files)
+            meta = {
+                'name': name,
+                'format': fmt,
+                'file': 'X',
+                'created': time.time(),
+                'size': size,
+                'shape': list(X.shape),
+                'nnz': int(X.nnz),
+            }
+            with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+                json.dump(meta, f)
+            if os.path.exists(self._entry(key)):
+                self._remove(key)
+            os.rename(tmp_dir, self._entry(key))
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        self.evict()
+
+    def encode(self, df, encoder, target='duration', fingerprint=None, name=None, fmt='csr'):
+        """
+        (X, y) for df, fitting encoder's vocabulary; encodes only on a miss.
+
+        Returns (X, y, hit) with X as an fmt ('csr' or 'csc') matrix. On a hit
+        X and y are mapped from the cache and the encoder gets the cached
+        vocabulary, as if it had been fitted on df.
+        """
+        key = self.feature_key(df, encoder, target, fingerprint, fmt)
+        if self.contains(key):
+            X, y, feature_names = self.get(key)
+            encoder.feature_names_ = feature_names
+            encoder.vocabulary_ = {feature: i for i, feature in enumerate(feature_names)}
+            return X, y, True
+        X = encoder.fit_transform(df)
+        if fmt == 'csc':
+            X = X.tocsc()
+        y = df[target].to_numpy(dtype=np.float64)
+        self.put(key, (X, y, encoder.feature_names_), name)
+        return X, y, False
+
+
+def encode_features(df, categorical_features=None, numerical_features=None, target='duration',
+                    cache=None, fingerprint=None, name=None, fmt='csr'):
+    """
+    Fit a ColumnarEncoder on df and return (X, y, encoder), through cache if given.
+
+    X is a CSR matrix, or CSC with fmt='csc' (column slicing, coordinate descent).
+    """
+    encoder = ColumnarEncoder(categorical_features, numerical_features)
+    if cache is None:
+        X = encoder.fit_transform(df)
+        return (X.tocsc() if fmt == 'csc' else X), df[target].to_numpy(dtype=np.float64), encoder
+    X, y, hit = cache.encode(df, encoder, target, fingerprint, name, fmt)
+    if hit:
+        print(f"Loaded {X.shape[0]:,} x {X.shape[1]} encoded features from {cache.root}")
+    return X, y, encoder
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Inspect or trim the encoded feature cache')
+    parser.add_argument('command', choices=['info', 'evict', 'clear'])
+    parser.add_argument('--cache-dir', default=DEFAULT_FEATURE_CACHE_DIR)
+    parser.add_argument('--max-gb', type=float, help='evict least recently used entries down to this size')
+    args = parser.parse_args(argv)
+
+    cache = FeatureCache(args.cache_dir)
+    if args.command == 'clear':
+        print(f"Removed {cache.clear()} cache entries from {args.cache_dir}")
+    elif args.command == 'evict':
+        if args.max_gb is None:
+            parser.error('evict needs --max-gb')
+        evicted = cache.evict(int(args.max_gb * 1024 ** 3))
+        print(f"Evicted {len(evicted)} entries, {cache.size() / 1e6:.1f} MB left in {args.cache_dir}")
+    else:
+        for key, meta, accessed in sorted(cache.entries(), key=lambda entry: entry[2]):
+            rows, columns = meta['shape']
+            print(f"{key[:12]}  {meta.get('name') or '-':<16} {rows:>10,} x {columns:<6} "
+                  f"{meta['size'] / 1e6:>10.1f} MB  {time.ctime(accessed)}")
+        print(f"Total: {cache.size() / 1e6:.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
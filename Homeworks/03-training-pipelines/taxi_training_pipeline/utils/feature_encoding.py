@@ -0,0 +1,165 @@
+"""
+Columnar feature encoding for the taxi duration model.
+
+Produces the same sparse CSR matrix and vocabulary as running a
+DictVectorizer over one dict per row, but works on whole columns so no
+per-row Python objects are created.
+"""
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+
+CATEGORICAL_FEATURES = ['PULocationID', 'DOLocationID']
+NUMERICAL_FEATURES = ['trip_distance']
+
+
+def category_codes(column):
+    """
+    Return (codes, labels) for a column, with labels as DictVectorizer strings.
+
+    Categorical columns reuse their existing codes; everything else is
+    factorized. Missing values get code -1.
+    """
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        codes = column.cat.codes.to_numpy()
+        uniques = column.cat.categories
+    else:
+        codes, uniques = pd.factorize(column, use_na_sentinel=True)
+    labels = [str(value) for value in uniques]
+    return codes, labels
+
+
+class ColumnarEncoder:
+    """
+    One-hot encode categorical columns and pass numerical columns through.
+
+    Feature names, their sorted order and the per-row index order all follow
+    DictVectorizer(sparse=True), so the fitted state can be exported as a
+    regular DictVectorizer with to_dict_vectorizer().
+    """
+
+    def __init__(self, categorical_features=None, numerical_features=None,
+                 separator='=', dtype=np.float64):
+        self.categorical_features = list(categorical_features or CATEGORICAL_FEATURES)
+        self.numerical_features = list(numerical_features or NUMERICAL_FEATURES)
+        self.separator = separator
+        self.dtype = dtype
+        self.feature_names_ = None
+        self.vocabulary_ = None
+
+    def _feature_name(self, column, label):
+        return f"{column}{self.separator}{label}"
+
+    def fit(self, df):
+        self.fit_transform(df)
+        return self
+
+    def fit_transform(self, df):
+        """
+        Learn the vocabulary from df and return its CSR encoding.
+        """
+        encoded = {}
+        feature_names = list(self.numerical_features)
+        for column in self.categorical_features:
+            codes, labels = category_codes(df[column])
+            # Only keep labels that actually occur, like DictVectorizer does
+            present = np.zeros(len(labels), dtype=bool)
+            present[codes[codes >= 0]] = True
+            names = [self._feature_name(column, label) for label in labels]
+            encoded[column] = (codes, names, present)
+            feature_names.extend(name for name, seen in zip(names, present) if seen)
+
+        feature_names.sort()
+        self.feature_names_ = feature_names
+        self.vocabulary_ = {name: i for i, name in enumerate(feature_names)}
+
+        columns = []
+        for column in self.categorical_features:
+            codes, names, present = encoded[column]
+            lookup = np.array(
+                [self.vocabulary_[name] if seen else -1 for name, seen in zip(names, present)],
+                dtype=np.int64,
+            )
+            columns.append(self._lookup_codes(codes, lookup))
+        return self._build_matrix(df, columns)
+
+    def transform(self, df):
+        """
+        Encode df with the fitted vocabulary; unseen categories are dropped.
+        """
+        if self.vocabulary_ is None:
+            raise ValueError('ColumnarEncoder is not fitted yet')
+
+        columns = []
+        for column in self.categorical_features:
+            codes, labels = category_codes(df[column])
+            lookup = np.array(
+                [self.vocabulary_.get(self._feature_name(column, label), -1) for label in labels],
+                dtype=np.int64,
+            )
+            columns.append(self._lookup_codes(codes, lookup))
+        return self._build_matrix(df, columns)
+
+    @staticmethod
+    def _lookup_codes(codes, lookup):
+        codes = np.asarray(codes, dtype=np.int64)
+        if len(lookup) == 0:
+            return np.full(len(codes), -1, dtype=np.int64)
+        return np.where(codes >= 0, lookup[np.maximum(codes, 0)], -1)
+
+    def _build_matrix(self, df, categorical_columns):
+        n_rows = len(df)
+        n_features = len(self.feature_names_)
+        width = len(categorical_columns) + len(self.numerical_features)
+
+        indices = np.empty((n_rows, width), dtype=np.int64)
+        values = np.empty((n_rows, width), dtype=self.dtype)
+        for i, column_indices in enumerate(categorical_columns):
+            indices[:, i] = column_indices
+            values[:, i] = 1
+        offset = len(categorical_columns)
+        for i, column in enumerate(self.numerical_features):
+            indices[:, offset + i] = self.vocabulary_.get(column, -1)
+            values[:, offset + i] = df[column].to_numpy(dtype=self.dtype)
+
+        # Missing / unseen entries sort to the end of each row and get dropped
+        indices[indices < 0] = n_features
+        order = np.argsort(indices, axis=1, kind='stable')
+        indices = np.take_along_axis(indices, order, axis=1)
+        values = np.take_along_axis(values, order, axis=1)
+
+        keep = indices < n_features
+        indptr = np.zeros(n_rows + 1, dtype=np.int32)
+        np.cumsum(keep.sum(axis=1), out=indptr[1:])
+        if keep.all():
+            indices, values = indices.ravel(), values.ravel()
+        else:
+            indices, values = indices[keep], values[keep]
+
+        return sp.csr_matrix(
+            (values, indices.astype(np.int32), indptr),
+            shape=(n_rows, n_features),
+        )
+
+    def to_dict_vectorizer(self):
+        """
+        Export the fitted vocabulary as an equivalent fitted DictVectorizer.
+        """
+        from sklearn.feature_extraction import DictVectorizer
+
+        dv = DictVectorizer(dtype=self.dtype, separator=self.separator, sparse=True)
+        dv.feature_names_ = list(self.feature_names_)
+        dv.vocabulary_ = dict(self.vocabulary_)
+        return dv
+
+    @classmethod
+    def from_dict_vectorizer(cls, dv, categorical_features=None, numerical_features=None):
+        """
+        Build an encoder that transforms with the vocabulary of a fitted DictVectorizer.
+        """
+        encoder = cls(categorical_features, numerical_features,
+                      separator=dv.separator, dtype=dv.dtype)
+        encoder.feature_names_ = list(dv.feature_names_)
+        encoder.vocabulary_ = dict(dv.vocabulary_)
+        return encoder
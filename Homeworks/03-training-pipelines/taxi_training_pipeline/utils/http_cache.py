@@ -0,0 +1,165 @@
+"""
+On-disk cache for DataFrames downloaded from a URL.
+
+HTTPCache.fetch downloads a URL once, parses the body (CSV by default) and
+keeps the parsed frame as parquet next to the response's ETag and
+Last-Modified headers. Later fetches send them back as If-None-Match /
+If-Modified-Since, so an unchanged file costs a 304 with no body and no
+parsing. Within ttl seconds of the last check the network is skipped
+altogether, and offline=True never touches it. If the server cannot be
+reached, a cached copy is used instead of failing.
+
+Concurrent fetches of one URL - threads or processes sharing the cache
+directory - take turns on a per-entry flock, and a fetcher that waited for
+another one reuses its result instead of downloading again.
+"""
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import pandas as pd
+import requests
+
+try:
+    import fcntl
+except ImportError:  # Windows: concurrent fetches are not deduplicated
+    fcntl = None
+
+
+DEFAULT_HTTP_CACHE_DIR = '.http_cache'
+DEFAULT_TIMEOUT = 30
+
+
+def read_csv_bytes(body):
+    return pd.read_csv(io.BytesIO(body))
+
+
+class HTTPCache:
+    """
+    Parsed-response cache with conditional revalidation.
+
+    ttl: seconds after a download or revalidation during which the cached
+    frame is used without asking the server (None: always revalidate).
+    offline: only ever serve from the cache.
+    """
+
+    def __init__(self, root=DEFAULT_HTTP_CACHE_DIR, ttl=None, offline=False, timeout=DEFAULT_TIMEOUT):
+        self.root = root
+        self.ttl = ttl
+        self.offline = offline
+        self.timeout = timeout
+        os.makedirs(root, exist_ok=True)
+
+    def key(self, url, parse=read_csv_bytes):
+        """
+        Entry key for url parsed by parse; a different parser is a different entry.
+        """
+        parser = f"{getattr(parse, '__module__', '')}.{getattr(parse, '__qualname__', repr(parse))}"
+        return hashlib.blake2b(f"{url}\n{parser}".encode(), digest_size=16).hexdigest()
+
+    def _entry(self, key):
+        return os.path.join(self.root, key)
+
+    def _meta(self, key):
+        try:
+            with open(os.path.join(self._entry(key), 'meta.json')) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _read(self, key):
+        return pd.read_parquet(os.path.join(self._entry(key), 'data.parquet'))
+
+    def _write_meta(self, directory, meta):
+        fd, tmp_path = tempfile.mkstemp(prefix='.tmp-', suffix='.json', dir=directory)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, os.path.join(directory, 'meta.json'))
+
+    def _store(self, key, url, frame, response):
+        tmp_dir = tempfile.mkdtemp(prefix='.tmp-', dir=self.root)
+        try:
+            frame.to_parquet(os.path.join(tmp_dir, 'data.parquet'))
+            self._write_meta(tmp_dir, {
+                'url': url,
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'checked': time.time(),
+                'size': len(response.content),
+            })
+            entry = self._entry(key)
+            if os.path.exists(entry):
+                shutil.rmtree(entry)
+            os.rename(tmp_dir, entry)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+    def _lock(self, key):
+        lock_file = open(os.path.join(self.root, f"{key}.lock"), 'a')
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        return lock_file
+
+    def fetch(self, url, parse=read_csv_bytes):
+        """
+        Return (frame, status) for url.
+
+        status is 'fresh' (within ttl or just fetched by a concurrent
+        caller), 'offline', 'stale' (server unreachable), 'not_modified'
+        (revalidated with a 304) or 'downloaded'.
+        """
+        key = self.key(url, parse)
+        started = time.time()
+        meta = self._meta(key)
+        if meta is not None and (self.offline or self._is_fresh(meta, started)):
+            return self._read(key), 'offline' if self.offline else 'fresh'
+        if self.offline:
+            raise FileNotFoundError(f"{url} is not cached and offline mode is on")
+
+        with self._lock(key):
+            meta = self._meta(key)
+            # Someone else fetched it while we waited for the lock
+            if meta is not None and meta['checked'] >= started:
+                return self._read(key), 'fresh'
+
+            headers = {}
+            if meta is not None:
+                if meta.get('etag'):
+                    headers['If-None-Match'] = meta['etag']
+                if meta.get('last_modified'):
+                    headers['If-Modified-Since'] = meta['last_modified']
+            try:
+                response = requests.get(url, headers=headers, timeout=self.timeout)
+                response.raise_for_status()
+            except requests.RequestException as e:
+                if meta is None:
+                    raise
+                print(f"Could not revalidate {url} ({e}); using the cached copy")
+                return self._read(key), 'stale'
+
+            if response.status_code == 304 and meta is not None:
+                meta['checked'] = time.time()
+                self._write_meta(self._entry(key), meta)
+                return self._read(key), 'not_modified'
+
+            frame = parse(response.content)
+            self._store(key, url, frame, response)
+            return frame, 'downloaded'
+
+    def fetch_frame(self, url, parse=read_csv_bytes):
+        return self.fetch(url, parse)[0]
+
+    def _is_fresh(self, meta, now):
+        return self.ttl is not None and now - meta['checked'] < self.ttl
+
+    def clear(self):
+        """
+        Delete every cached response.
+        """
+        shutil.rmtree(self.root, ignore_errors=True)
+        os.makedirs(self.root, exist_ok=True)
@@ -0,0 +1,99 @@
+"""
+Cold import-time report for pipeline blocks and scripts.
+
+Each module is imported in a fresh interpreter with `python -X importtime`,
+so the numbers are cold-start costs, not what is left after earlier imports
+in the current process. The report lists the total time, the heaviest
+top-level packages pulled in, and whether any of HEAVY_PACKAGES was loaded.
+
+Usage:
+    python -m utils.import_report transformers.train_model data_loaders.load_taxi_data
+    python -m utils.import_report transformers.prepare_data --budget 0.8 --forbid mlflow sklearn
+"""
+import os
+import subprocess
+import sys
+
+
+HEAVY_PACKAGES = ('mage_ai', 'mlflow', 'sklearn', 'scipy', 'pandas', 'pyarrow', 'requests')
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_times(module, python=sys.executable, project_dir=PROJECT_DIR):
+    """
+    Import module in a fresh interpreter; returns (total seconds, {package: seconds}).
+
+    A package's seconds are the cumulative times of the places where the
+    import tree enters it from another package, so e.g. pandas pulled in by
+    a utils module is charged to pandas, not to utils. Interpreter start-up
+    imports are left out.
+    """
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [project_dir, env.get('PYTHONPATH')]))
+    result = subprocess.run([python, '-X', 'importtime', '-c', f"import {module}"],
+                            cwd=project_dir, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise ImportError(f"Importing {module} failed:\n{result.stderr.strip().splitlines()[-1]}")
+
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((depth, name.strip().split('.')[0], int(cumulative) / 1e6))
+
+    top_level = module.split('.')[0]
+    total, packages, parents = 0.0, {}, {}
+    # Lines are in post-order (children first); walk backwards to see parents first
+    for depth, package, seconds in reversed(entries):
+        parents[depth] = package
+        if depth == 0:
+            if package == top_level:
+                total += seconds
+            continue
+        if parents[0] != top_level:
+            continue  # interpreter start-up
+        if package != parents[depth - 1]:
+            packages[package] = packages.get(package, 0.0) + seconds
+    return total, packages
+
+
+def report(modules, budget=None, forbid=(), top=8):
+    """
+    Print the import report for modules; returns False if a budget or forbid check failed.
+    """
+    ok = True
+    for module in modules:
+        total, packages = import_times(module)
+        heaviest = sorted(((seconds, name) for name, seconds in packages.items()), reverse=True)[:top]
+        heavy = [name for name in HEAVY_PACKAGES if name in packages]
+        print(f"{module}: {total:.3f}s")
+        for seconds, name in heaviest:
+            print(f"  {name:<24} {seconds:.3f}s")
+        print(f"  heavy packages loaded: {', '.join(heavy) or 'none'}")
+
+        if budget is not None and total > budget:
+            print(f"  ✗ over the {budget:.2f}s budget")
+            ok = False
+        forbidden = [name for name in forbid if name in packages]
+        if forbidden:
+            print(f"  ✗ imports {', '.join(forbidden)}")
+            ok = False
+    return ok
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Report cold import times of pipeline modules")
+    parser.add_argument('modules', nargs='+', help="dotted module names, relative to the project")
+    parser.add_argument('--budget', type=float, help="fail if a module takes longer than this many seconds")
+    parser.add_argument('--forbid', nargs='*', default=[], help="fail if any of these packages is imported")
+    parser.add_argument('--top', type=int, default=8, help="heaviest packages to list per module")
+    args = parser.parse_args(argv)
+    return 0 if report(args.modules, args.budget, args.forbid, args.top) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
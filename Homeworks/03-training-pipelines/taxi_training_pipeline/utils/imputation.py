@@ -0,0 +1,311 @@
+"""
+Fitted median imputation for numeric columns.
+
+MedianImputer learns one median per column - optionally per group, e.g. per
+Pclass - and fills missing values with them. Exact medians are computed for
+all columns at once by pandas' vectorized quantile; method='upper' keeps
+the historical fill_in_missing_values semantics (the element at position
+n // 2 of the sorted values), method='midpoint' is the usual median.
+
+approximate=True fits from a stream of chunks instead, keeping one
+QuantileSketch per column and group. The sketch counts values in
+logarithmic buckets, so every median it returns is within relative_accuracy
+of a value whose rank is exactly the median rank, and its memory depends on
+the range of the values and the accuracy, not on the number of rows.
+
+The fitted medians are saved as JSON so a scoring job can fill new rows
+with the training medians.
+"""
+import json
+import math
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+
+MEDIAN_METHODS = ('upper', 'midpoint')
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch with relative accuracy (DDSketch-style buckets).
+
+    A positive value x lands in bucket ceil(log(x) / log(gamma)), with
+    gamma = (1 + a) / (1 - a); the bucket's midpoint is within a relative
+    error a of everything in it. Negative values use a mirrored set of
+    buckets and zeros are counted apart.
+    """
+
+    def __init__(self, relative_accuracy=0.005):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError(f"relative_accuracy must be in (0, 1), got {relative_accuracy}")
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.positive = {}
+        self.negative = {}
+        self.zeros = 0
+
+    @property
+    def count(self):
+        return self.zeros + sum(self.positive.values()) + sum(self.negative.values())
+
+    def _add_buckets(self, buckets, values):
+        keys, counts = np.unique(np.ceil(np.log(values) / self._log_gamma).astype(np.int64),
+                                 return_counts=True)
+        for key, n in zip(keys.tolist(), counts.tolist()):
+            buckets[key] = buckets.get(key, 0) + n
+
+    def update(self, values):
+        """
+        Add an array of values; NaNs are ignored.
+        """
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        self._add_buckets(self.positive, values[values > 0])
+        self._add_buckets(self.negative, -values[values < 0])
+        self.zeros += int((values == 0).sum())
+        return self
+
+    def merge(self, other):
+        """
+        Add the counts of another sketch with the same accuracy.
+        """
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        for buckets, other_buckets in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, n in other_buckets.items():
+                buckets[key] = buckets.get(key, 0) + n
+        self.zeros += other.zeros
+        return self
+
+    def _value(self, key):
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def at_rank(self, rank):
+        """
+        Approximate value of the element at 0-based position rank in sorted order.
+        """
+        if not 0 <= rank < self.count:
+            raise IndexError(f"Rank {rank} outside a sketch of {self.count} values")
+        seen = 0
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if rank < seen:
+                return -self._value(key)
+        seen += self.zeros
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if rank < seen:
+                return self._value(key)
+        raise AssertionError("Bucket counts do not add up")
+
+    def median(self, method='upper'):
+        n = self.count
+        if n == 0:
+            return float('nan')
+        if method == 'upper':
+            return self.at_rank(n // 2)
+        return (self.at_rank((n - 1) // 2) + self.at_rank(n // 2)) / 2
+
+    def to_dict(self):
+        return {
+            'relative_accuracy': self.relative_accuracy,
+            'positive': sorted(self.positive.items()),
+            'negative': sorted(self.negative.items()),
+            'zeros': self.zeros,
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        sketch = cls(state['relative_accuracy'])
+        sketch.positive = {int(key): int(n) for key, n in state['positive']}
+        sketch.negative = {int(key): int(n) for key, n in state['negative']}
+        sketch.zeros = int(state['zeros'])
+        return sketch
+
+
+def exact_medians(df, method='upper'):
+    """
+    Median of every column of df in one vectorized call; NaN for all-missing columns.
+    """
+    if method == 'upper':
+        # Linear position 0.5 * (n - 1) rounded up is n // 2 for every n
+        return df.quantile(0.5, interpolation='higher', numeric_only=False)
+    return df.median()
+
+
+class MedianImputer:
+    """
+    Fill missing values with medians learned by fit().
+
+    columns defaults to every column except group_by. With group_by, rows
+    are filled with the median of their group, falling back to the overall
+    median for groups that were unseen or had no values in a column.
+    """
+
+    def __init__(self, columns=None, group_by=None, method='upper',
+                 approximate=False, relative_accuracy=0.005):
+        if method not in MEDIAN_METHODS:
+            raise ValueError(f"Unknown median method: {method}")
+        self.columns = list(columns) if columns is not None else None
+        self.group_by = group_by
+        self.method = method
+        self.approximate = approximate
+        self.relative_accuracy = relative_accuracy
+        self.medians_ = None
+        self.group_medians_ = None
+        self._sketches = None
+
+    def _columns_of(self, df):
+        if self.columns is None:
+            self.columns = [col for col in df.columns if col != self.group_by]
+        return self.columns
+
+    def fit(self, data):
+        """
+        Learn the medians of a DataFrame, or of an iterable of chunks when approximate.
+        """
+        if not self.approximate:
+            if not isinstance(data, pd.DataFrame):
+                raise TypeError("Exact medians need a DataFrame; use approximate=True for a chunk stream")
+            columns = self._columns_of(data)
+            self.medians_ = exact_medians(data[columns], self.method).to_dict()
+            if self.group_by is not None:
+                grouped = data.groupby(self.group_by, sort=True)[columns]
+                if self.method == 'upper':
+                    table = grouped.quantile(0.5, interpolation='higher')
+                else:
+                    table = grouped.median()
+                self.group_medians_ = {group: row.to_dict() for group, row in table.iterrows()}
+            return self
+
+        self._sketches = None
+        for chunk in ([data] if isinstance(data, pd.DataFrame) else data):
+            self.partial_fit(chunk)
+        return self._finish_sketches()
+
+    def partial_fit(self, chunk):
+        """
+        Add one chunk to the approximate sketches.
+
+        The medians are computed once, by fit() or by the first transform()
+        after partial_fit.
+        """
+        if not self.approximate:
+            raise ValueError("partial_fit needs approximate=True")
+        columns = self._columns_of(chunk)
+        if self._sketches is None:
+            self._sketches = {None: {col: QuantileSketch(self.relative_accuracy) for col in columns}}
+        for col in columns:
+            self._sketches[None][col].update(chunk[col].to_numpy(dtype=float, na_value=np.nan))
+        if self.group_by is not None:
+            for group, rows in chunk.groupby(self.group_by, sort=False)[columns]:
+                sketches = self._sketches.setdefault(
+                    group, {col: QuantileSketch(self.relative_accuracy) for col in columns})
+                for col in columns:
+                    sketches[col].update(rows[col].to_numpy(dtype=float, na_value=np.nan))
+        self.medians_ = self.group_medians_ = None
+        return self
+
+    def _finish_sketches(self):
+        if self._sketches is None:
+            raise ValueError("No data to fit the imputer on")
+        medians = {group: {col: sketch.median(self.method) for col, sketch in sketches.items()}
+                   for group, sketches in self._sketches.items()}
+        self.medians_ = medians.pop(None)
+        if self.group_by is not None:
+            self.group_medians_ = dict(sorted(medians.items()))
+        return self
+
+    def transform(self, df):
+        """
+        Return a copy of df with missing values of the fitted columns filled.
+        """
+        if self.medians_ is None and self._sketches is not None:
+            self._finish_sketches()
+        if self.medians_ is None:
+            raise ValueError("MedianImputer is not fitted")
+        if self.group_by is None or not self.group_medians_:
+            return df.fillna(self.medians_)
+
+        out = df.copy()
+        table = pd.DataFrame.from_dict(self.group_medians_, orient='index')
+        for col in self.columns:
+            missing = out[col].isna()
+            if missing.any():
+                fill = df.loc[missing, self.group_by].map(table[col]).fillna(self.medians_[col])
+                out.loc[missing, col] = fill
+        return out
+
+    def fit_transform(self, df):
+        return self.fit(df).transform(df)
+
+    def to_dict(self):
+        if self.medians_ is None and self._sketches is not None:
+            self._finish_sketches()
+        state = {
+            'columns': self.columns,
+            'group_by': self.group_by,
+            'method': self.method,
+            'approximate': self.approximate,
+            'relative_accuracy': self.relative_accuracy,
+            'medians': _plain(self.medians_),
+            # Pairs, so group keys keep their type through JSON
+            'group_medians': ([[_plain(group), _plain(medians)] for group, medians in self.group_medians_.items()]
+                              if self.group_medians_ is not None else None),
+        }
+        return state
+
+    @classmethod
+    def from_dict(cls, state):
+        imputer = cls(state['columns'], state['group_by'], state['method'],
+                      state['approximate'], state['relative_accuracy'])
+        imputer.medians_ = _floats(state['medians'])
+        if state['group_medians'] is not None:
+            imputer.group_medians_ = {group: _floats(medians) for group, medians in state['group_medians']}
+        return imputer
+
+    def save(self, path):
+        """
+        Write the fitted medians to a JSON file, atomically.
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(prefix='.tmp-', suffix='.json', dir=directory)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self.to_dict(), f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return path
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read an imputer written by save().
+        """
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+
+def _plain(value):
+    """
+    Convert numpy scalars (and dicts of them) to JSON-serialisable Python values; NaN becomes None.
+    """
+    if isinstance(value, dict):
+        return {str(key): _plain(item) for key, item in value.items()}
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+def _floats(medians):
+    return {col: float('nan') if value is None else value for col, value in medians.items()}
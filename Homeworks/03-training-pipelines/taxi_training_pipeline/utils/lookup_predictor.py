@@ -0,0 +1,132 @@
+"""
+Lookup-table predictor for the one-hot linear duration model.
+
+With one-hot location IDs and a single numeric distance, a LinearRegression
+prediction is intercept + w_PU[id] + w_DO[id] + w_dist * distance. The
+fitted coefficients and DictVectorizer vocabulary are compiled into one
+dense weight array per categorical column, indexed directly by location ID,
+so scoring is pure NumPy indexing: no sklearn, no sparse matrices, no
+per-row Python. IDs that were not in the training vocabulary (or are
+missing / out of range) get weight 0, exactly as DictVectorizer drops
+unseen features. Terms are summed in the same order as the sparse
+row-by-coefficient product, so results match model.predict bit for bit.
+"""
+import numpy as np
+
+
+class LookupPredictor:
+    """
+    Per-ID weight tables plus numeric weights and the intercept.
+    """
+
+    def __init__(self, intercept, tables, numeric_weights):
+        self.intercept = float(intercept)
+        self.tables = {column: np.asarray(table, dtype=np.float64) for column, table in tables.items()}
+        self.numeric_weights = {column: float(weight) for column, weight in numeric_weights.items()}
+        # Same order as the sorted DictVectorizer feature names within a row
+        self.terms = sorted(list(self.tables) + list(self.numeric_weights))
+
+    @classmethod
+    def from_model(cls, model, vectorizer, categorical_features=None, numerical_features=None):
+        """
+        Compile a fitted linear model and its DictVectorizer vocabulary.
+        """
+        from utils.feature_encoding import CATEGORICAL_FEATURES, NUMERICAL_FEATURES
+
+        categorical_features = list(categorical_features or CATEGORICAL_FEATURES)
+        numerical_features = list(numerical_features or NUMERICAL_FEATURES)
+        coef = np.asarray(model.coef_, dtype=np.float64).ravel()
+        separator = getattr(vectorizer, 'separator', '=')
+
+        ids = {column: [] for column in categorical_features}
+        for name, index in vectorizer.vocabulary_.items():
+            column, sep, label = name.partition(separator)
+            if not sep or column not in ids:
+                continue
+            try:
+                location_id = int(label)
+            except ValueError:
+                raise ValueError(f'{name!r} is not an integer ID and cannot be a table index')
+            if location_id < 0:
+                raise ValueError(f'{name!r} is a negative ID and cannot be a table index')
+            ids[column].append((location_id, coef[index]))
+
+        tables = {}
+        for column, entries in ids.items():
+            table = np.zeros(max((i for i, _ in entries), default=-1) + 1, dtype=np.float64)
+            for location_id, weight in entries:
+                table[location_id] = weight
+            tables[column] = table
+
+        numeric_weights = {
+            column: coef[vectorizer.vocabulary_[column]] if column in vectorizer.vocabulary_ else 0.0
+            for column in numerical_features
+        }
+        return cls(model.intercept_, tables, numeric_weights)
+
+    @staticmethod
+    def _table_index(values, size):
+        """
+        Integer table positions for IDs; unseen, missing or invalid IDs map to size.
+        """
+        values = np.asarray(values)
+        if values.dtype.kind in 'OUS':
+            try:
+                values = values.astype(np.float64)
+            except (TypeError, ValueError):
+                values = np.array([_parse_id(value) for value in values.ravel()],
+                                  dtype=np.float64).reshape(values.shape)
+        if values.dtype.kind == 'f':
+            valid = np.isfinite(values) & (values == np.floor(values))
+            values = np.where(valid, values, -1)
+        values = values.astype(np.int64, copy=False)
+        return np.where((values >= 0) & (values < size), values, size)
+
+    def _lookup(self, column, values):
+        table = self.tables[column]
+        # One trailing zero weight for everything not in the vocabulary
+        padded = np.append(table, 0.0)
+        return padded[self._table_index(values, len(table))]
+
+    def predict(self, columns):
+        """
+        Predict durations from a mapping of column name to array (e.g. a DataFrame).
+        """
+        total = None
+        for term in self.terms:
+            if term in self.tables:
+                value = self._lookup(term, columns[term])
+            else:
+                value = np.asarray(columns[term], dtype=np.float64) * self.numeric_weights[term]
+            total = value if total is None else total + value
+        return total + self.intercept
+
+    def save(self, path):
+        """
+        Write the tables to an uncompressed .npz file and return the path.
+        """
+        arrays = {f"table:{column}": table for column, table in self.tables.items()}
+        arrays['intercept'] = np.array(self.intercept)
+        arrays['numeric_names'] = np.array(list(self.numeric_weights), dtype=str)
+        arrays['numeric_weights'] = np.array(list(self.numeric_weights.values()), dtype=np.float64)
+        with open(path, 'wb') as f:
+            np.savez(f, **arrays)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            tables = {key[len('table:'):]: data[key] for key in data.files if key.startswith('table:')}
+            numeric_weights = dict(zip(data['numeric_names'].tolist(), data['numeric_weights'].tolist()))
+            return cls(data['intercept'], tables, numeric_weights)
+
+    def __repr__(self):
+        sizes = ', '.join(f"{column}[{len(table)}]" for column, table in self.tables.items())
+        return f"LookupPredictor(intercept={self.intercept:.4f}, {sizes}, numeric={list(self.numeric_weights)})"
+
+
+def _parse_id(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
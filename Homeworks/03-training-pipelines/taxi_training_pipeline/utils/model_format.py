@@ -0,0 +1,167 @@
+"""
+Compact, memory-mappable binary format for the taxi duration model.
+
+A .txm file holds the fitted linear model as plain little-endian arrays:
+
+    magic b'TXMODEL\\0' | uint32 format version | uint32 header length
+    | JSON header | padding | arrays, each 64-byte aligned
+
+The JSON header carries the intercept, feature settings and, for each array,
+its offset, dtype and shape. Arrays are the coefficient vector, the
+vocabulary as fixed-width byte strings and the per-location weight tables of
+LookupPredictor. write_compact_model streams everything to the file in one
+pass and returns the number of bytes written. load_compact_model maps the
+file read-only and wraps the arrays without copying, so several scoring
+processes mapping the same file share one copy in the page cache, and
+neither sklearn nor pickle is needed to score.
+"""
+import json
+import mmap
+import struct
+
+import numpy as np
+
+from utils.lookup_predictor import LookupPredictor
+
+
+MAGIC = b'TXMODEL\x00'
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+COMPACT_MODEL_FILE = 'model.txm'
+
+_PREAMBLE = struct.Struct('<8sII')
+
+
+def _padding(offset):
+    return -offset % ALIGNMENT
+
+
+def _model_arrays(model, vectorizer):
+    lookup = LookupPredictor.from_model(model, vectorizer)
+    feature_names = list(vectorizer.feature_names_)
+    arrays = {
+        'coef': np.asarray(model.coef_, dtype='<f8').ravel(),
+        'feature_names': np.array([name.encode() for name in feature_names],
+                                  dtype=f"S{max(map(len, feature_names), default=1)}"),
+        'numeric_weights': np.array(list(lookup.numeric_weights.values()), dtype='<f8'),
+    }
+    for column, table in lookup.tables.items():
+        arrays[f"table:{column}"] = table.astype('<f8', copy=False)
+    header = {
+        'format_version': FORMAT_VERSION,
+        'model_type': type(model).__name__,
+        'intercept': float(model.intercept_),
+        'separator': getattr(vectorizer, 'separator', '='),
+        'categorical_features': list(lookup.tables),
+        'numerical_features': list(lookup.numeric_weights),
+    }
+    return header, arrays
+
+
+def write_compact_model(path, model, vectorizer):
+    """
+    Serialize model and vectorizer to path in a single pass; returns the file size in bytes.
+    """
+    header, arrays = _model_arrays(model, vectorizer)
+
+    # Offsets only depend on the header length, which depends on the offsets'
+    # digits - lay out until the header size is stable
+    header['arrays'] = {name: {'offset': 0, 'dtype': array.dtype.str, 'shape': list(array.shape)}
+                        for name, array in arrays.items()}
+    while True:
+        header_bytes = json.dumps(header, sort_keys=True).encode()
+        offset = _PREAMBLE.size + len(header_bytes)
+        offset += _padding(offset)
+        layout = {}
+        for name, array in arrays.items():
+            layout[name] = offset
+            offset += array.nbytes
+            offset += _padding(offset)
+        if all(header['arrays'][name]['offset'] == layout[name] for name in arrays):
+            break
+        for name in arrays:
+            header['arrays'][name]['offset'] = layout[name]
+
+    written = 0
+    with open(path, 'wb') as f:
+        written += f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header_bytes)))
+        written += f.write(header_bytes)
+        for name, array in arrays.items():
+            written += f.write(b'\0' * (layout[name] - written))
+            written += f.write(np.ascontiguousarray(array).tobytes())
+    return written
+
+
+class CompactModel:
+    """
+    Read-only view of a .txm file; arrays are backed by the mapped file.
+    """
+
+    def __init__(self, buffer, header):
+        self._buffer = buffer
+        self.header = header
+        self.intercept = header['intercept']
+        self.separator = header['separator']
+        self.arrays = {
+            name: np.frombuffer(buffer, dtype=np.dtype(spec['dtype']),
+                                count=int(np.prod(spec['shape'])), offset=spec['offset']).reshape(spec['shape'])
+            for name, spec in header['arrays'].items()
+        }
+        self.coef = self.arrays['coef']
+        self.lookup = LookupPredictor(
+            self.intercept,
+            {column: self.arrays[f"table:{column}"] for column in header['categorical_features']},
+            dict(zip(header['numerical_features'], self.arrays['numeric_weights'].tolist())),
+        )
+        self._feature_names = None
+
+    @property
+    def feature_names(self):
+        if self._feature_names is None:
+            self._feature_names = [name.decode() for name in self.arrays['feature_names']]
+        return self._feature_names
+
+    @property
+    def vocabulary(self):
+        return {name: i for i, name in enumerate(self.feature_names)}
+
+    def predict(self, columns):
+        """
+        Predict durations from a mapping of column name to array, like LookupPredictor.
+        """
+        return self.lookup.predict(columns)
+
+    def to_sklearn(self):
+        """
+        Rebuild an equivalent (LinearRegression, DictVectorizer) pair.
+        """
+        from sklearn.feature_extraction import DictVectorizer
+        from sklearn.linear_model import LinearRegression
+
+        model = LinearRegression()
+        model.coef_ = np.array(self.coef)
+        model.intercept_ = self.intercept
+        model.n_features_in_ = len(self.coef)
+        dv = DictVectorizer(separator=self.separator, sparse=True)
+        dv.feature_names_ = list(self.feature_names)
+        dv.vocabulary_ = self.vocabulary
+        return model, dv
+
+
+def load_compact_model(path, use_mmap=True):
+    """
+    Open a .txm file. With use_mmap=True nothing is copied into the process.
+    """
+    with open(path, 'rb') as f:
+        if use_mmap:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            buffer = f.read()
+
+    magic, version, header_length = _PREAMBLE.unpack_from(buffer, 0)
+    if magic != MAGIC:
+        raise ValueError(f'{path} is not a compact taxi model file')
+    if version > FORMAT_VERSION:
+        raise ValueError(f'{path} has format version {version}; this code reads up to {FORMAT_VERSION}')
+    header = json.loads(bytes(buffer[_PREAMBLE.size:_PREAMBLE.size + header_length]))
+    return CompactModel(buffer, header)
@@ -0,0 +1,145 @@
+"""
+Atomic, chunked parquet export for data_exporter blocks.
+
+export_parquet writes a DataFrame (or an iterable of DataFrame chunks) as
+compressed parquet with a fixed arrow schema, so downstream readers get the
+column types back without parsing or type inference. Rows are converted
+and written chunk_rows at a time, one row group per chunk, so a large frame
+is never duplicated as a whole arrow table.
+
+Everything is written under a temporary name in the destination directory
+and renamed into place when complete, so readers never see a partial
+export. Replacing a file with a file is one atomic rename: readers see the
+previous export or the new one. A directory cannot be renamed over, so when
+either the old or the new export is a directory the old one is first
+renamed aside and then the new one renamed in; between those two renames
+path does not exist, and if the second one fails the old export is put
+back. With partition_by the output is a hive-style directory
+(column=value/part-00000.parquet), which pd.read_parquet reads back as one
+frame with the partition column restored.
+"""
+import os
+import shutil
+import time
+import uuid
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from utils.parquet_stream import DEFAULT_CHUNK_ROWS
+from utils.sufficient_stats import iter_frame_chunks
+
+
+DEFAULT_COMPRESSION = 'zstd'
+NULL_PARTITION = '__HIVE_DEFAULT_PARTITION__'
+
+
+def partition_dir_name(column, value):
+    if pd.isna(value):
+        return f"{column}={NULL_PARTITION}"
+    return f"{column}={value}"
+
+
+def _replace(tmp_path, path):
+    """
+    Move tmp_path to path, replacing a previous file or directory there.
+    """
+    if not os.path.isdir(tmp_path) and not (os.path.isdir(path) and not os.path.islink(path)):
+        os.replace(tmp_path, path)
+        return
+
+    # Only a file can be renamed over a file; move the previous export aside first
+    old_path = None
+    if os.path.lexists(path):
+        old_path = f"{path}.old-{uuid.uuid4().hex[:8]}"
+        os.rename(path, old_path)
+    try:
+        os.rename(tmp_path, path)
+    except BaseException:
+        if old_path is not None:
+            os.rename(old_path, path)
+        raise
+    if old_path is None:
+        return
+    if os.path.isdir(old_path) and not os.path.islink(old_path):
+        shutil.rmtree(old_path, ignore_errors=True)
+    else:
+        os.unlink(old_path)
+
+
+def export_parquet(data, path, schema=None, partition_by=None, compression=DEFAULT_COMPRESSION,
+                   chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Write data to path as parquet, atomically; returns a summary dict.
+
+    schema is an arrow schema every chunk is cast to (default: inferred from
+    the first chunk, without the index). partition_by names a column to
+    split the output by, in which case path is a directory.
+    """
+    start = time.perf_counter()
+    chunks = iter_frame_chunks(data, chunk_rows) if isinstance(data, pd.DataFrame) else data
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = os.path.join(directory, f".tmp-{uuid.uuid4().hex[:8]}-{os.path.basename(path)}")
+
+    writers = {}
+    n_rows = 0
+
+    def writer_for(file_path, file_schema):
+        if file_path not in writers:
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            writers[file_path] = pq.ParquetWriter(file_path, file_schema, compression=compression)
+        return writers[file_path]
+
+    try:
+        for chunk in chunks:
+            if len(chunk) == 0:
+                continue
+            table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+            schema = table.schema
+            n_rows += table.num_rows
+            if partition_by is None:
+                writer_for(tmp_path, schema).write_table(table)
+                continue
+            file_schema = schema.remove(schema.get_field_index(partition_by))
+            for value, rows in chunk.groupby(partition_by, sort=False, dropna=False, observed=True):
+                part = pa.Table.from_pandas(rows.drop(columns=partition_by), schema=file_schema,
+                                            preserve_index=False)
+                file_path = os.path.join(tmp_path, partition_dir_name(partition_by, value), 'part-00000.parquet')
+                writer_for(file_path, file_schema).write_table(part)
+
+        if not writers:
+            if schema is None:
+                raise ValueError(f"No rows to export to {path}")
+            # An empty frame with a schema still produces a readable export
+            if partition_by is None:
+                writer_for(tmp_path, schema)
+            else:
+                os.makedirs(tmp_path)
+        for writer in writers.values():
+            writer.close()
+        _replace(tmp_path, path)
+    except BaseException:
+        for writer in writers.values():
+            writer.close()
+        if os.path.isdir(tmp_path):
+            shutil.rmtree(tmp_path, ignore_errors=True)
+        elif os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+    return {
+        'path': path,
+        'rows': n_rows,
+        'files': len(writers),
+        'bytes': _size(path),
+        'seconds': time.perf_counter() - start,
+    }
+
+
+def _size(path):
+    if not os.path.isdir(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(path) for name in names)
@@ -0,0 +1,146 @@
+"""
+Column-projected, chunked reading of taxi trip parquet files.
+
+ParquetChunks is a re-iterable source of bounded-size DataFrames: only the
+requested columns are read, row groups are scanned one batch at a time and
+the trip duration filter is applied on the arrow batch before anything is
+converted to pandas. Peak memory is set by chunk_rows and the file's row
+group size, not by the number of rows in the file.
+"""
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+
+TRIP_COLUMNS = [
+    'tpep_pickup_datetime',
+    'tpep_dropoff_datetime',
+    'trip_distance',
+    'PULocationID',
+    'DOLocationID',
+]
+DEFAULT_CHUNK_ROWS = 250_000
+UNITS_PER_MINUTE = {'s': 60, 'ms': 60_000, 'us': 60_000_000, 'ns': 60_000_000_000}
+
+
+def duration_mask(batch, min_minutes=1, max_minutes=60):
+    """
+    Boolean arrow mask selecting trips lasting [min_minutes, max_minutes].
+
+    Compares integers in the timestamps' own unit, so the bounds are exact
+    and nanosecond files are not truncated, matching the float minute filter
+    in prepare_data.
+    """
+    elapsed = pc.subtract(batch.column('tpep_dropoff_datetime'),
+                          batch.column('tpep_pickup_datetime'))
+    per_minute = UNITS_PER_MINUTE[elapsed.type.unit]
+    ticks = pc.cast(elapsed, pa.int64())
+    return pc.and_(
+        pc.greater_equal(ticks, int(min_minutes * per_minute)),
+        pc.less_equal(ticks, int(max_minutes * per_minute)),
+    )
+
+
+class ParquetChunks:
+    """
+    Re-iterable stream of DataFrame chunks from one parquet file.
+
+    Iterating opens the file, reads row groups batch by batch and yields
+    DataFrames of at most chunk_rows rows. Instances are small and picklable,
+    and split() partitions the row groups so each worker process can read its
+    own share of the file.
+    """
+
+    def __init__(self, file_path, columns=None, chunk_rows=DEFAULT_CHUNK_ROWS,
+                 duration_range=None, row_groups=None):
+        self.file_path = file_path
+        self.columns = list(columns) if columns is not None else list(TRIP_COLUMNS)
+        self.chunk_rows = chunk_rows
+        self.duration_range = duration_range
+        self.row_groups = list(row_groups) if row_groups is not None else None
+
+    def _metadata(self):
+        return pq.ParquetFile(self.file_path).metadata
+
+    @property
+    def num_row_groups(self):
+        if self.row_groups is not None:
+            return len(self.row_groups)
+        return self._metadata().num_row_groups
+
+    @property
+    def num_rows(self):
+        """
+        Rows stored in the selected row groups, before the duration filter.
+        """
+        metadata = self._metadata()
+        groups = self.row_groups if self.row_groups is not None else range(metadata.num_row_groups)
+        return sum(metadata.row_group(i).num_rows for i in groups)
+
+    def iter_batches(self):
+        """
+        Yield filtered arrow RecordBatches.
+        """
+        read_columns = list(self.columns)
+        if self.duration_range is not None:
+            for col in ('tpep_pickup_datetime', 'tpep_dropoff_datetime'):
+                if col not in read_columns:
+                    read_columns.append(col)
+
+        parquet_file = pq.ParquetFile(self.file_path)
+        for batch in parquet_file.iter_batches(batch_size=self.chunk_rows,
+                                               row_groups=self.row_groups,
+                                               columns=read_columns):
+            if self.duration_range is not None:
+                batch = batch.filter(duration_mask(batch, *self.duration_range))
+                batch = batch.select(self.columns)
+            if batch.num_rows:
+                yield batch
+
+    def __iter__(self):
+        for batch in self.iter_batches():
+            yield batch.to_pandas()
+
+    def split(self, n_parts):
+        """
+        Partition the row groups into at most n_parts independent sources.
+        """
+        groups = self.row_groups if self.row_groups is not None else list(range(self.num_row_groups))
+        n_parts = max(1, min(n_parts, len(groups)))
+        # Contiguous slices, so concatenating the parts keeps file order
+        bounds = [len(groups) * i // n_parts for i in range(n_parts + 1)]
+        return [
+            ParquetChunks(self.file_path, self.columns, self.chunk_rows,
+                          self.duration_range, groups[start:stop])
+            for start, stop in zip(bounds[:-1], bounds[1:])
+        ]
+
+    def __repr__(self):
+        return (f"ParquetChunks({self.file_path!r}, columns={self.columns}, "
+                f"chunk_rows={self.chunk_rows}, duration_range={self.duration_range})")
+
+
+class MappedChunks:
+    """
+    Lazily apply a per-chunk function to a chunk source.
+
+    Keeps the source re-iterable and splittable, so a transformer block can
+    hand a streamed dataset on without materialising it. func must be a
+    module-level function for the result to be usable from worker processes.
+    """
+
+    def __init__(self, source, func):
+        self.source = source
+        self.func = func
+
+    def __iter__(self):
+        for chunk in self.source:
+            yield self.func(chunk)
+
+    def split(self, n_parts):
+        if not hasattr(self.source, 'split'):
+            return [self]
+        return [MappedChunks(part, self.func) for part in self.source.split(n_parts)]
+
+    def __repr__(self):
+        return f"MappedChunks({self.source!r}, {getattr(self.func, '__name__', self.func)})"
@@ -0,0 +1,157 @@
+"""
+Opt-in per-block instrumentation for pipeline runs.
+
+BlockProfiler.run() wraps a block call and records wall time, CPU time,
+resident memory, optionally the tracemalloc peak and a cProfile dump, and
+rows in/out. The records can be written as a JSON report and flattened into
+MLflow metrics.
+"""
+import cProfile
+import json
+import os
+import platform
+import resource
+import time
+import tracemalloc
+
+from utils.registry import TRACKING_URI
+from utils.tracking import BatchedRunLogger, tracking_lock
+
+
+def _current_rss_mb():
+    """
+    Current resident set size in MB (Linux /proc; None elsewhere).
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2
+    except (OSError, ValueError):
+        return None
+
+
+def _peak_rss_mb():
+    """
+    Process high-water RSS in MB (ru_maxrss is bytes on macOS, KB elsewhere).
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 ** 2 if platform.system() == 'Darwin' else peak / 1024
+
+
+def count_rows(value):
+    """
+    Best-effort row count of a block input or output.
+    """
+    if value is None:
+        return None
+    if isinstance(value, dict):
+        return value.get('training_samples')
+    try:
+        return len(value)
+    except TypeError:
+        return None
+
+
+class BlockProfiler:
+    """
+    Collects one resource record per profiled block call.
+    """
+
+    def __init__(self, trace_memory=False, cprofile_dir=None):
+        self.trace_memory = trace_memory
+        self.cprofile_dir = cprofile_dir
+        self.records = []
+        if cprofile_dir:
+            os.makedirs(cprofile_dir, exist_ok=True)
+
+    def run(self, name, func, *args, **kwargs):
+        """
+        Call func(*args, **kwargs), record its resource usage and return its result.
+        """
+        rows_in = count_rows(args[0]) if args else None
+        rss_before = _current_rss_mb()
+        peak_before = _peak_rss_mb()
+        if self.trace_memory:
+            tracemalloc.start()
+        profiler = cProfile.Profile() if self.cprofile_dir else None
+
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+            traced_peak = None
+            if self.trace_memory:
+                traced_peak = tracemalloc.get_traced_memory()[1] / 1024 ** 2
+                tracemalloc.stop()
+
+        record = {
+            'block': name,
+            'wall_seconds': wall,
+            'cpu_seconds': cpu,
+            'rss_before_mb': rss_before,
+            'rss_after_mb': _current_rss_mb(),
+            'peak_rss_mb': _peak_rss_mb(),
+            'peak_rss_increase_mb': max(0.0, _peak_rss_mb() - peak_before),
+            'tracemalloc_peak_mb': traced_peak,
+            'rows_in': rows_in,
+            'rows_out': count_rows(result),
+        }
+        rows = record['rows_in'] if record['rows_in'] is not None else record['rows_out']
+        record['rows_per_second'] = rows / wall if rows and wall > 0 else None
+        if profiler is not None:
+            record['cprofile'] = os.path.join(self.cprofile_dir, f"{name}.prof")
+            profiler.dump_stats(record['cprofile'])
+
+        self.records.append(record)
+        print(f"⏱️  {name}: {wall:.2f}s wall, {cpu:.2f}s CPU, peak RSS {record['peak_rss_mb']:.0f} MB")
+        return result
+
+    def metrics(self, blocks=None):
+        """
+        Flatten numeric fields into MLflow metric names like 'train_model.wall_seconds'.
+        """
+        metrics = {}
+        for record in self.records:
+            if blocks is not None and record['block'] not in blocks:
+                continue
+            for field, value in record.items():
+                if field != 'block' and isinstance(value, (int, float)) and not isinstance(value, bool):
+                    metrics[f"{record['block']}.{field}"] = float(value)
+        return metrics
+
+    def log_to_mlflow(self, run_id, blocks=None, tracking_uri=TRACKING_URI):
+        """
+        Log the flattened metrics onto an existing MLflow run.
+
+        Written in batches under the tracking lock, like every other writer
+        to the store.
+        """
+        import mlflow
+
+        logger = BatchedRunLogger(mlflow.MlflowClient(tracking_uri=tracking_uri), run_id)
+        logger.log_metrics(self.metrics(blocks))
+        with tracking_lock(tracking_uri):
+            return logger.flush()
+
+    def write_report(self, path):
+        """
+        Write all records as a JSON report and return the path.
+        """
+        report = {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'trace_memory': self.trace_memory,
+            'blocks': self.records,
+            'total_wall_seconds': sum(record['wall_seconds'] for record in self.records),
+        }
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+        return path
@@ -0,0 +1,207 @@
+"""
+Shared MLflow locations and helpers for the taxi duration model.
+
+mlflow is imported inside the helpers that talk to the tracking store, so
+blocks that only need the constants below start without loading it.
+"""
+import os
+import tempfile
+
+from utils.tracking import init_tracking_store, tracking_lock
+
+
+TRACKING_URI = "sqlite:///mlflow.db"
+EXPERIMENT_NAME = "taxi-duration-prediction"
+MODEL_NAME = "taxi-duration-model"
+TRAINING_STATE_PATH = "training_state"
+TRAINING_STATE_FILE = "linear_stats.npz"
+COMPACT_MODEL_PATH = "model_compact"
+
+
+def model_versions(model_name=MODEL_NAME, tracking_uri=TRACKING_URI):
+    """
+    Return the registered versions of model_name, newest first.
+    """
+    import mlflow
+
+    client = mlflow.MlflowClient(tracking_uri=tracking_uri)
+    versions = client.search_model_versions(f"name='{model_name}'")
+    return sorted(versions, key=lambda version: int(version.version), reverse=True)
+
+
+def get_or_create_experiment(name=EXPERIMENT_NAME, tracking_uri=TRACKING_URI, artifact_location=None):
+    """
+    Return the id of experiment name, creating it if needed.
+
+    Safe to call from concurrent pipelines: creation happens under the
+    tracking lock, and losing a race to another store client just returns
+    the experiment that client created.
+    """
+    import mlflow
+
+    init_tracking_store(tracking_uri)
+    client = mlflow.MlflowClient(tracking_uri=tracking_uri)
+    experiment = client.get_experiment_by_name(name)
+    if experiment is not None:
+        return experiment.experiment_id
+    with tracking_lock(tracking_uri):
+        experiment = client.get_experiment_by_name(name)
+        if experiment is not None:
+            return experiment.experiment_id
+        try:
+            return client.create_experiment(name, artifact_location=artifact_location)
+        except mlflow.exceptions.MlflowException as e:
+            if e.error_code != 'RESOURCE_ALREADY_EXISTS':
+                raise
+    return client.get_experiment_by_name(name).experiment_id
+
+
+def _staging_path(staging_dir, artifact_path, file_name):
+    directory = os.path.join(staging_dir, artifact_path)
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, file_name)
+
+
+def stage_training_state(stats, staging_dir):
+    """
+    Save LinearStats where log_artifacts(staging_dir) puts it next to the model.
+    """
+    return stats.save(_staging_path(staging_dir, TRAINING_STATE_PATH, TRAINING_STATE_FILE))
+
+
+def stage_compact_model(model, vectorizer, staging_dir):
+    """
+    Write the model once in the compact .txm format; returns the size in bytes.
+    """
+    from utils.model_format import COMPACT_MODEL_FILE, write_compact_model
+
+    return write_compact_model(_staging_path(staging_dir, COMPACT_MODEL_PATH, COMPACT_MODEL_FILE),
+                               model, vectorizer)
+
+
+def has_artifact(run_id, artifact_path, tracking_uri=TRACKING_URI):
+    """
+    Whether run_id logged a file at artifact_path.
+    """
+    import mlflow
+
+    client = mlflow.MlflowClient(tracking_uri=tracking_uri)
+    listed = client.list_artifacts(run_id, os.path.dirname(artifact_path) or None)
+    return artifact_path in {artifact.path for artifact in listed}
+
+
+def download_version_artifact(artifact_path, dst_dir, model_name=MODEL_NAME, version=None,
+                              tracking_uri=TRACKING_URI):
+    """
+    Download an artifact of a registered version's run into dst_dir.
+
+    With version=None the newest version is used; if its run has no such
+    artifact this raises ValueError rather than falling back to an older
+    version. Returns (local_path, version).
+    """
+    import mlflow
+
+    mlflow.set_tracking_uri(tracking_uri)
+    found = resolve_version(model_name, version, tracking_uri)
+    if not has_artifact(found.run_id, artifact_path, tracking_uri):
+        raise ValueError(f"{model_name} version {found.version} (run {found.run_id}) has no {artifact_path} "
+                         f"artifact")
+
+    path = mlflow.artifacts.download_artifacts(run_id=found.run_id, artifact_path=artifact_path, dst_path=dst_dir)
+    return path, found
+
+
+def resolve_version(model_name=MODEL_NAME, version=None, tracking_uri=TRACKING_URI):
+    """
+    The registered version object for version, or the newest one for version=None.
+    """
+    versions = model_versions(model_name, tracking_uri)
+    if not versions:
+        raise ValueError(f"Model {model_name} has no registered versions")
+    if version is None:
+        return versions[0]
+    for candidate in versions:
+        if str(candidate.version) == str(version):
+            return candidate
+    raise ValueError(f"Model {model_name} has no version {version}")
+
+
+def _load_compact_version(model_name, version, tracking_uri):
+    from utils.model_format import load_compact_model
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path, found = download_compact_model(tmp_dir, model_name, version, tracking_uri)
+        # Read into memory: the downloaded file goes away with tmp_dir
+        return load_compact_model(path, use_mmap=False), found
+
+
+def load_model_bundle(model_name=MODEL_NAME, version=None, tracking_uri=TRACKING_URI):
+    """
+    Load the {'model', 'vectorizer'} pair of a registered version.
+
+    The pair is rebuilt from the version's .txm file with
+    CompactModel.to_sklearn. With version=None, the newest version is used.
+    Returns (bundle, version).
+    """
+    compact, found = _load_compact_version(model_name, version, tracking_uri)
+    model, vectorizer = compact.to_sklearn()
+    return {'model': model, 'vectorizer': vectorizer}, found
+
+
+def load_lookup_predictor(model_name=MODEL_NAME, version=None, tracking_uri=TRACKING_URI):
+    """
+    Load the LookupPredictor tables of a registered version. Returns (predictor, version).
+    """
+    compact, found = _load_compact_version(model_name, version, tracking_uri)
+    return compact.lookup, found
+
+
+def register_run_artifact(run_id, artifact_path, model_name=MODEL_NAME, tracking_uri=TRACKING_URI):
+    """
+    Register a plain artifact directory of a run as a new model version.
+    """
+    import mlflow
+
+    client = mlflow.MlflowClient(tracking_uri=tracking_uri)
+    try:
+        client.create_registered_model(model_name)
+    except mlflow.exceptions.MlflowException as e:
+        if e.error_code != 'RESOURCE_ALREADY_EXISTS':
+            raise
+    run = client.get_run(run_id)
+    return client.create_model_version(model_name, source=f"{run.info.artifact_uri}/{artifact_path}",
+                                       run_id=run_id)
+
+
+def download_compact_model(dst_dir, model_name=MODEL_NAME, version=None, tracking_uri=TRACKING_URI):
+    """
+    Download the .txm file of a registered version into dst_dir. Returns (path, version).
+    """
+    from utils.model_format import COMPACT_MODEL_FILE
+
+    return download_version_artifact(f"{COMPACT_MODEL_PATH}/{COMPACT_MODEL_FILE}", dst_dir,
+                                     model_name, version, tracking_uri)
+
+
+def load_training_state(model_name=MODEL_NAME, tracking_uri=TRACKING_URI):
+    """
+    Load the LinearStats saved with the newest model version that has one.
+
+    Versions registered without training state (e.g. sample-mode runs) are
+    skipped; any other error reading a version's state is raised. Returns
+    (stats, version), or (None, None) if there is none.
+    """
+    import mlflow
+
+    from utils.sufficient_stats import LinearStats
+
+    mlflow.set_tracking_uri(tracking_uri)
+    artifact_path = f"{TRAINING_STATE_PATH}/{TRAINING_STATE_FILE}"
+    for version in model_versions(model_name, tracking_uri):
+        if not has_artifact(version.run_id, artifact_path, tracking_uri):
+            continue
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = mlflow.artifacts.download_artifacts(run_id=version.run_id, artifact_path=artifact_path,
+                                                       dst_path=tmp_dir)
+            return LinearStats.load(path), version
+    return None, None
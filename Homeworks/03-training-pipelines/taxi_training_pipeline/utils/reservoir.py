@@ -0,0 +1,169 @@
+"""
+Single-pass, fixed-size sampling of a stream of DataFrame chunks.
+
+Every row gets a pseudo-random priority that is a hash (splitmix64) of the
+seed and the row's position in the stream, and the sample is the rows with
+the smallest priorities (bottom-k sampling, equivalent to a uniform sample
+without replacement). Because priorities do not depend on where the chunk
+boundaries fall, the same seed picks the same rows whether the data arrives
+as one DataFrame, in 10k-row chunks or in parquet row groups. Only the
+sample plus the rows of the current chunk are held in memory.
+
+Stratified sampling gives every stratum (e.g. each PULocationID) an equal
+share of the sample, capped at the stratum's size, with the leftover spread
+over the larger strata - so rare locations are not crowded out by busy
+ones. The per-stratum quota can only shrink as more rows arrive, so rows
+dropped early are never needed later and one pass is enough.
+"""
+import numpy as np
+import pandas as pd
+
+from utils.sufficient_stats import iter_frame_chunks
+
+
+GOLDEN_GAMMA = np.uint64(0x9E3779B97F4A7C15)
+MIX_1 = np.uint64(0xBF58476D1CE4E5B9)
+MIX_2 = np.uint64(0x94D049BB133111EB)
+
+
+def splitmix64(values):
+    """
+    splitmix64 finalizer over a uint64 array; a bijection, so distinct inputs never collide.
+    """
+    z = np.asarray(values, dtype=np.uint64).copy()
+    z ^= z >> np.uint64(30)
+    z *= MIX_1
+    z ^= z >> np.uint64(27)
+    z *= MIX_2
+    z ^= z >> np.uint64(31)
+    return z
+
+
+def row_priorities(start, n_rows, seed=42):
+    """
+    Priorities of stream rows start .. start + n_rows - 1 for seed.
+    """
+    positions = np.arange(start, start + n_rows, dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        return splitmix64(positions + np.uint64(seed + 1) * GOLDEN_GAMMA)
+
+
+def stratum_quota(counts, size):
+    """
+    Largest per-stratum quota q with sum(min(count, q)) <= size, or None if every row fits.
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    if counts.sum() <= size:
+        return None
+    low, high = 0, int(counts.max())
+    while low < high:
+        mid = (low + high + 1) // 2
+        if np.minimum(counts, mid).sum() <= size:
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+
+class ReservoirSampler:
+    """
+    Fixed-size sample of the rows passed to update(), chunk by chunk.
+
+    stratify_by names a column to sample evenly across; the result's index
+    is each row's position in the stream.
+    """
+
+    def __init__(self, size, seed=42, stratify_by=None):
+        if size < 1:
+            raise ValueError(f"Sample size must be positive, got {size}")
+        self.size = size
+        self.seed = seed
+        self.stratify_by = stratify_by
+        self.n_seen = 0
+        self.counts = pd.Series(dtype=np.int64)
+        self._sample = None
+        self._priority = np.empty(0, dtype=np.uint64)
+
+    def update(self, chunk):
+        """
+        Offer the next chunk of the stream; keeps only rows that can still be sampled.
+        """
+        n_rows = len(chunk)
+        if n_rows == 0:
+            return self
+        priority = np.concatenate([self._priority, row_priorities(self.n_seen, n_rows, self.seed)])
+        if self.stratify_by is None:
+            keep = self._bottom_k(priority, self.size)
+        else:
+            strata = np.concatenate([self._strata(), chunk[self.stratify_by].to_numpy()])
+            self.counts = self.counts.add(chunk[self.stratify_by].value_counts(sort=False), fill_value=0)
+            keep = self._per_stratum(strata, priority, self._quota(), extra=1)
+
+        n_kept = len(self._priority)
+        from_sample = keep[keep < n_kept]
+        from_chunk = keep[keep >= n_kept] - n_kept
+        new_rows = chunk.iloc[from_chunk].set_axis(self.n_seen + from_chunk)
+        parts = [new_rows] if self._sample is None else [self._sample.iloc[from_sample], new_rows]
+        self._sample = pd.concat(parts) if len(parts) > 1 else new_rows
+        self._priority = priority[np.concatenate([from_sample, from_chunk + n_kept])]
+        self.n_seen += n_rows
+        return self
+
+    def _strata(self):
+        if self._sample is None:
+            return np.empty(0, dtype=object)
+        return self._sample[self.stratify_by].to_numpy()
+
+    def _quota(self):
+        return stratum_quota(self.counts.to_numpy(), self.size)
+
+    @staticmethod
+    def _bottom_k(priority, k):
+        if len(priority) <= k:
+            return np.arange(len(priority))
+        return np.sort(np.argpartition(priority, k - 1)[:k])
+
+    @staticmethod
+    def _per_stratum(strata, priority, quota, extra=0):
+        """
+        Positions of the quota + extra smallest priorities of every stratum.
+        """
+        if quota is None:
+            return np.arange(len(priority))
+        codes, _ = pd.factorize(strata)
+        order = np.lexsort((priority, codes))
+        sorted_codes = codes[order]
+        starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+        rank = np.arange(len(order)) - np.repeat(starts, np.diff(np.r_[starts, len(order)]))
+        return np.sort(order[rank < quota + extra])
+
+    def result(self):
+        """
+        The sample, ordered by stream position; all rows if fewer than size were seen.
+        """
+        if self._sample is None:
+            return None
+        if self.stratify_by is None or self._quota() is None:
+            return self._sample.sort_index()
+
+        quota = self._quota()
+        strata = self._strata()
+        base = self._per_stratum(strata, self._priority, quota)
+        # Strata larger than the quota share the rows left over, smallest priority first
+        spare = np.setdiff1d(self._per_stratum(strata, self._priority, quota, extra=1), base)
+        n_spare = self.size - len(base)
+        spare = spare[np.argsort(self._priority[spare], kind='stable')[:n_spare]]
+        return self._sample.iloc[np.concatenate([base, spare])].sort_index()
+
+
+def sample_stream(data, size, seed=42, stratify_by=None, chunk_rows=250_000):
+    """
+    Sample size rows from a DataFrame or an iterable of DataFrame chunks in one pass.
+
+    Returns (sample, n_rows_seen).
+    """
+    chunks = iter_frame_chunks(data, chunk_rows) if isinstance(data, pd.DataFrame) else data
+    sampler = ReservoirSampler(size, seed, stratify_by)
+    for chunk in chunks:
+        sampler.update(chunk)
+    return sampler.result(), sampler.n_seen
@@ -0,0 +1,286 @@
+"""
+Local SQLite index of run summaries for fast status queries.
+
+Answering "what is the latest run and how did it end" through MLflow means
+search_runs over every run of every experiment. This index keeps one row
+per run (status, times, intercept, model size, training mode) and one per
+registered model version (with the version it was trained on top of), so
+those questions are single indexed queries.
+
+The index is kept current incrementally: register_model records each run
+as it finishes, and sync() catches up on anything written elsewhere by
+asking MLflow only for runs started since the last sync, runs that were
+still active then, and versions newer than the newest indexed one.
+
+Command line:
+    python taxi_training_pipeline/utils/run_index.py sync
+    python taxi_training_pipeline/utils/run_index.py latest
+    python taxi_training_pipeline/utils/run_index.py lineage [--version N]
+"""
+import os
+import sqlite3
+import sys
+import time
+
+if __name__ == '__main__':
+    # Run as a script: make the utils package importable
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.registry import MODEL_NAME, TRACKING_URI
+from utils.tracking import sqlite_path
+
+
+ACTIVE_STATUSES = ('RUNNING', 'SCHEDULED')
+SEARCH_PAGE_SIZE = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS experiments (
+    experiment_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    experiment_id TEXT NOT NULL,
+    status TEXT,
+    start_time INTEGER,
+    end_time INTEGER,
+    intercept REAL,
+    model_size INTEGER,
+    training_mode TEXT,
+    training_samples INTEGER,
+    model_format TEXT,
+    base_model_version INTEGER
+);
+CREATE INDEX IF NOT EXISTS runs_by_experiment ON runs (experiment_id, start_time);
+CREATE INDEX IF NOT EXISTS runs_by_status ON runs (status);
+CREATE TABLE IF NOT EXISTS model_versions (
+    name TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    run_id TEXT,
+    created INTEGER,
+    source TEXT,
+    PRIMARY KEY (name, version)
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def default_index_path(tracking_uri=TRACKING_URI):
+    """
+    mlflow_run_index.db next to a SQLite tracking store (or in the working directory).
+    """
+    path = sqlite_path(tracking_uri)
+    if path is None:
+        return 'mlflow_run_index.db'
+    return f"{os.path.splitext(path)[0]}_run_index.db"
+
+
+def _int_or_none(value):
+    return None if value in (None, '', 'None') else int(float(value))
+
+
+class RunIndex:
+    """
+    Run and model version summaries of one tracking store.
+    """
+
+    def __init__(self, path=None, tracking_uri=TRACKING_URI):
+        self.tracking_uri = tracking_uri
+        self.path = path or default_index_path(tracking_uri)
+        self._connection = None
+        self._client = None
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.path, timeout=30)
+            self._connection.row_factory = sqlite3.Row
+            self._connection.execute("PRAGMA journal_mode = WAL")
+            self._connection.executescript(SCHEMA)
+        return self._connection
+
+    @property
+    def client(self):
+        if self._client is None:
+            import mlflow
+            self._client = mlflow.MlflowClient(tracking_uri=self.tracking_uri)
+        return self._client
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _state(self, key, default=0):
+        row = self.connection.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return default if row is None else row['value']
+
+    def _set_state(self, key, value):
+        self.connection.execute("INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)", (key, value))
+
+    def _upsert_run(self, run):
+        metrics, params = run.data.metrics, run.data.params
+        self.connection.execute(
+            "INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (run.info.run_id, run.info.experiment_id, run.info.status, run.info.start_time,
+             run.info.end_time, metrics.get('intercept'), _int_or_none(metrics.get('model_size')),
+             params.get('training_mode'), _int_or_none(params.get('training_samples')),
+             params.get('model_format'), _int_or_none(params.get('base_model_version'))),
+        )
+
+    def _upsert_version(self, version):
+        self.connection.execute(
+            "INSERT OR REPLACE INTO model_versions VALUES (?, ?, ?, ?, ?)",
+            (version.name, int(version.version), version.run_id, version.creation_timestamp, version.source),
+        )
+
+    def record_run(self, run_id, version=None):
+        """
+        Index one run, and the model version registered from it, as it finishes.
+        """
+        run = self.client.get_run(run_id)
+        with self.connection:
+            if self.connection.execute("SELECT 1 FROM experiments WHERE experiment_id = ?",
+                                       (run.info.experiment_id,)).fetchone() is None:
+                experiment = self.client.get_experiment(run.info.experiment_id)
+                self.connection.execute("INSERT OR REPLACE INTO experiments VALUES (?, ?)",
+                                        (experiment.experiment_id, experiment.name))
+            self._upsert_run(run)
+            if version is not None:
+                self._upsert_version(version)
+
+    def sync(self):
+        """
+        Fetch what changed in the tracking store since the last sync.
+
+        Returns the number of runs and model versions (re)indexed.
+        """
+        client = self.client
+        experiments = client.search_experiments()
+        since = self._state('runs_started_since')
+        active = [row['run_id'] for row in self.connection.execute(
+            f"SELECT run_id FROM runs WHERE status IN ({','.join('?' * len(ACTIVE_STATUSES))})",
+            ACTIVE_STATUSES)]
+
+        runs, token = [], None
+        while experiments:
+            page = client.search_runs([e.experiment_id for e in experiments],
+                                      filter_string=f"attributes.start_time >= {since}",
+                                      max_results=SEARCH_PAGE_SIZE, page_token=token,
+                                      order_by=['attributes.start_time ASC'])
+            runs.extend(page)
+            token = page.token
+            if not token:
+                break
+        seen = {run.info.run_id for run in runs}
+        runs.extend(client.get_run(run_id) for run_id in active if run_id not in seen)
+
+        versions = []
+        for model in client.search_registered_models():
+            # Own watermark: record_run may already have indexed a newer version
+            newest = self._state(f"versions_synced:{model.name}")
+            versions.extend(client.search_model_versions(f"name='{model.name}' and version_number > {newest}"))
+
+        with self.connection:
+            self.connection.executemany("INSERT OR REPLACE INTO experiments VALUES (?, ?)",
+                                        [(e.experiment_id, e.name) for e in experiments])
+            for run in runs:
+                self._upsert_run(run)
+            for version in versions:
+                self._upsert_version(version)
+            for name in {version.name for version in versions}:
+                self._set_state(f"versions_synced:{name}",
+                                max(int(v.version) for v in versions if v.name == name))
+            # Runs starting in the same millisecond as the newest one are
+            # fetched again next time rather than missed
+            if runs:
+                self._set_state('runs_started_since', max(since, *(run.info.start_time for run in runs)))
+        return {'runs': len(runs), 'versions': len(versions)}
+
+    def experiments(self):
+        """
+        Experiments with their run count and newest run, by name.
+        """
+        return self.connection.execute(
+            "SELECT e.experiment_id, e.name, COUNT(r.run_id) AS n_runs, MAX(r.start_time) AS last_start "
+            "FROM experiments e LEFT JOIN runs r ON r.experiment_id = e.experiment_id "
+            "GROUP BY e.experiment_id ORDER BY e.name").fetchall()
+
+    def latest_run(self, experiment_name):
+        """
+        Summary row of the most recently started run of an experiment, or None.
+        """
+        return self.connection.execute(
+            "SELECT r.* FROM runs r JOIN experiments e ON e.experiment_id = r.experiment_id "
+            "WHERE e.name = ? ORDER BY r.start_time DESC LIMIT 1", (experiment_name,)).fetchone()
+
+    def versions(self, name=MODEL_NAME):
+        """
+        Registered versions of a model joined with their run summaries, newest first.
+        """
+        return self.connection.execute(
+            "SELECT v.version, v.run_id, v.created, r.status, r.intercept, r.model_size, "
+            "r.training_mode, r.base_model_version FROM model_versions v "
+            "LEFT JOIN runs r ON r.run_id = v.run_id WHERE v.name = ? ORDER BY v.version DESC",
+            (name,)).fetchall()
+
+    def lineage(self, version=None, name=MODEL_NAME):
+        """
+        A version followed by the versions it was incrementally trained on top of.
+        """
+        lineage = []
+        if version is None:
+            version = self.connection.execute("SELECT MAX(version) FROM model_versions WHERE name = ?",
+                                              (name,)).fetchone()[0]
+        while version is not None and version not in [row['version'] for row in lineage]:
+            row = self.connection.execute(
+                "SELECT v.version, v.run_id, r.training_mode, r.training_samples, r.base_model_version "
+                "FROM model_versions v LEFT JOIN runs r ON r.run_id = v.run_id "
+                "WHERE v.name = ? AND v.version = ?", (name, version)).fetchone()
+            if row is None:
+                break
+            lineage.append(row)
+            version = row['base_model_version']
+        return lineage
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Query the local run summary index')
+    parser.add_argument('command', choices=['sync', 'latest', 'lineage'])
+    parser.add_argument('--tracking-uri', default=TRACKING_URI)
+    parser.add_argument('--index', help='index database (default: next to the tracking database)')
+    parser.add_argument('--model-name', default=MODEL_NAME)
+    parser.add_argument('--version', type=int, help='lineage of this version (default: newest)')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    index = RunIndex(args.index, args.tracking_uri)
+    if args.command == 'sync':
+        synced = index.sync()
+        print(f"Indexed {synced['runs']} runs and {synced['versions']} model versions")
+    elif args.command == 'latest':
+        for experiment in index.experiments():
+            latest = index.latest_run(experiment['name'])
+            status = latest['status'] if latest is not None else '-'
+            print(f"{experiment['name']:<32} {experiment['n_runs']:>6} runs  latest: {status}")
+    else:
+        for row in index.lineage(args.version, args.model_name):
+            print(f"v{row['version']:<5} {row['training_mode'] or '-':<12} "
+                  f"{row['training_samples'] or 0:>12,} samples  run {row['run_id']}")
+    print(f"({(time.perf_counter() - start) * 1000:.1f} ms)")
+    index.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Sparse matrices and arrays shared between processes through memory-mapped files.
+
+The parent process writes each matrix once as .npy files (CSC or CSR
+data, indices and indptr, or a dense array), under /dev/shm when it exists.
+Workers receive only a small picklable SharedMatrix handle and map the
+files read-only, wrapping the mapped arrays in a scipy matrix without
+copying them. Every worker reads the same pages, so memory does not grow
+with the number of workers.
+"""
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import scipy.sparse as sp
+
+
+SHARED_MEMORY_DIR = '/dev/shm'
+
+_opened = {}
+
+
+def shared_tempdir(prefix='shared-'):
+    """
+    New temporary directory, in shared memory when the platform has it.
+    """
+    directory = SHARED_MEMORY_DIR if os.access(SHARED_MEMORY_DIR, os.W_OK) else None
+    return tempfile.mkdtemp(prefix=prefix, dir=directory)
+
+
+class SharedMatrix:
+    """
+    Picklable handle to a sparse matrix or dense array saved by write().
+    """
+
+    def __init__(self, path, shape, sparse, fmt='csc'):
+        self.path = path
+        self.shape = tuple(shape)
+        self.sparse = sparse
+        self.format = fmt
+
+    @classmethod
+    def write(cls, directory, name, matrix, fmt='csc'):
+        """
+        Save matrix under directory/name; sparse matrices are stored as fmt ('csc' or 'csr').
+
+        CSC is the default because coordinate descent (Lasso, ElasticNet)
+        works on it and Ridge takes it as is too, so no estimator converts it.
+        """
+        path = os.path.join(directory, name)
+        if sp.issparse(matrix):
+            matrix = sp.csr_matrix(matrix) if fmt == 'csr' else sp.csc_matrix(matrix)
+            matrix.sort_indices()
+            index_dtype = np.int32 if matrix.nnz < np.iinfo(np.int32).max else np.int64
+            os.makedirs(path)
+            np.save(os.path.join(path, 'data.npy'), matrix.data.astype(np.float64, copy=False))
+            np.save(os.path.join(path, 'indices.npy'), matrix.indices.astype(index_dtype, copy=False))
+            np.save(os.path.join(path, 'indptr.npy'), matrix.indptr.astype(index_dtype, copy=False))
+        else:
+            matrix = np.asarray(matrix)
+            path += '.npy'
+            np.save(path, matrix)
+        return cls(path, matrix.shape, sp.issparse(matrix), fmt)
+
+    def open(self):
+        """
+        Map the matrix read-only; repeated calls in one process reuse the mapping.
+        """
+        if self.path not in _opened:
+            if self.sparse:
+                arrays = [np.load(os.path.join(self.path, f'{part}.npy'), mmap_mode='r')
+                          for part in ('data', 'indices', 'indptr')]
+                container = sp.csr_matrix if self.format == 'csr' else sp.csc_matrix
+                _opened[self.path] = container(tuple(arrays), shape=self.shape, copy=False)
+            else:
+                _opened[self.path] = np.load(self.path, mmap_mode='r')
+        return _opened[self.path]
+
+
+def forget(directory):
+    """
+    Drop this process's mappings of files under directory.
+
+    The pages are unmapped once callers drop the arrays they were given.
+    """
+    for path in [path for path in _opened if path == directory or path.startswith(directory + os.sep)]:
+        del _opened[path]
+
+
+def release(directory):
+    """
+    Drop this process's mappings of files under directory and delete it.
+    """
+    forget(directory)
+    shutil.rmtree(directory, ignore_errors=True)
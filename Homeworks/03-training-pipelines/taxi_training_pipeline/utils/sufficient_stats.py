@@ -0,0 +1,350 @@
+"""
+Out-of-core least squares for the one-hot + numeric taxi design.
+
+LinearStats accumulates Z^T Z and Z^T y, where Z is the design matrix with a
+leading intercept column, one chunk at a time. Its size depends only on the
+number of features (~530), so every row can be used for training at bounded
+memory. Stats from different chunks or processes are merged by label, and
+solve() returns the same fitted LinearRegression + DictVectorizer pair that
+the in-memory training path produces.
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from utils.feature_encoding import (
+    CATEGORICAL_FEATURES,
+    NUMERICAL_FEATURES,
+    ColumnarEncoder,
+    category_codes,
+)
+
+
+TARGET = 'duration'
+
+
+def trip_duration(df):
+    """
+    Trip duration in minutes, computed the same way as prepare_data.
+    """
+    return (df['tpep_dropoff_datetime'] - df['tpep_pickup_datetime']).dt.total_seconds() / 60
+
+
+class LinearStats:
+    """
+    Sufficient statistics for an ordinary least-squares fit with intercept.
+
+    Slot 0 is the intercept, the next slots are the numerical features and
+    categorical labels get a slot the first time they are seen. gram holds
+    Z^T Z and xty holds Z^T y over those slots.
+    """
+
+    def __init__(self, categorical_features=None, numerical_features=None,
+                 target=TARGET, separator='='):
+        self.categorical_features = list(categorical_features or CATEGORICAL_FEATURES)
+        self.numerical_features = list(numerical_features or NUMERICAL_FEATURES)
+        self.target = target
+        self.separator = separator
+        # slot index of each feature name, in slot order
+        self.slots = {}
+        self.names = []
+        for name in self.numerical_features:
+            self._add_slot(name)
+        self.gram = np.zeros((self.n_slots, self.n_slots))
+        self.xty = np.zeros(self.n_slots)
+        self.yty = 0.0
+        # identifiers of the datasets (e.g. monthly files) folded in so far
+        self.sources = []
+
+    @property
+    def n_slots(self):
+        return len(self.names) + 1
+
+    @property
+    def n_samples(self):
+        return int(round(self.gram[0, 0]))
+
+    def _add_slot(self, name):
+        self.slots[name] = len(self.names) + 1
+        self.names.append(name)
+        return self.slots[name]
+
+    def _grow(self):
+        extra = self.n_slots - len(self.xty)
+        if extra:
+            self.gram = np.pad(self.gram, ((0, extra), (0, extra)))
+            self.xty = np.pad(self.xty, (0, extra))
+
+    def _design(self, df):
+        """
+        Encode df into a CSR design matrix over the current slots.
+        """
+        n_rows = len(df)
+        columns = [np.zeros(n_rows, dtype=np.int64)]
+        values = [np.ones(n_rows)]
+        for name in self.numerical_features:
+            columns.append(np.full(n_rows, self.slots[name], dtype=np.int64))
+            values.append(df[name].to_numpy(dtype=np.float64))
+        for column in self.categorical_features:
+            codes, labels = category_codes(df[column])
+            lookup = np.empty(len(labels) + 1, dtype=np.int64)
+            for i, label in enumerate(labels):
+                name = f"{column}{self.separator}{label}"
+                lookup[i] = self.slots[name] if name in self.slots else self._add_slot(name)
+            # Missing categories (code -1) map to the trailing -1 and are dropped
+            lookup[-1] = -1
+            columns.append(lookup[codes])
+            values.append(np.ones(n_rows))
+        self._grow()
+
+        cols = np.column_stack(columns)
+        vals = np.column_stack(values)
+        keep = cols >= 0
+        return sp.csr_matrix(
+            (vals[keep], cols[keep], np.concatenate([[0], np.cumsum(keep.sum(axis=1))])),
+            shape=(n_rows, self.n_slots),
+        )
+
+    def update(self, df, y=None):
+        """
+        Add the rows of df to the statistics.
+
+        The target defaults to df[target], or the trip duration computed from
+        the pickup/dropoff timestamps when that column is absent.
+        """
+        if len(df) == 0:
+            return self
+        if y is None:
+            y = df[self.target] if self.target in df.columns else trip_duration(df)
+        y = np.asarray(y, dtype=np.float64)
+
+        Z = self._design(df)
+        Zt = Z.T.tocsr()
+        self.gram += (Zt @ Z).toarray()
+        self.xty += Zt @ y
+        self.yty += float(y @ y)
+        return self
+
+    def _aligned(self, other):
+        """
+        Return other's gram and xty re-indexed onto this object's slots.
+        """
+        for name in other.names:
+            if name not in self.slots:
+                self._add_slot(name)
+        self._grow()
+        index = np.array([0] + [self.slots[name] for name in other.names], dtype=np.int64)
+        gram = np.zeros_like(self.gram)
+        gram[np.ix_(index, index)] = other.gram
+        xty = np.zeros_like(self.xty)
+        xty[index] = other.xty
+        return gram, xty
+
+    def merge(self, other):
+        """
+        Add another LinearStats (e.g. from a worker process) into this one.
+        """
+        gram, xty = self._aligned(other)
+        self.gram += gram
+        self.xty += xty
+        self.yty += other.yty
+        self.sources.extend(source for source in other.sources if source not in self.sources)
+        return self
+
+    def subtract(self, other):
+        """
+        Remove another LinearStats (e.g. one fold's rows) from this one.
+
+        The rows must have been added before; features that no row uses any
+        more drop out of the next solve().
+        """
+        gram, xty = self._aligned(other)
+        self.gram -= gram
+        self.xty -= xty
+        self.yty -= other.yty
+        self.sources = [source for source in self.sources if source not in other.sources]
+        return self
+
+    def copy(self):
+        clone = LinearStats(self.categorical_features, self.numerical_features,
+                            target=self.target, separator=self.separator)
+        clone.slots = dict(self.slots)
+        clone.names = list(self.names)
+        clone.gram = self.gram.copy()
+        clone.xty = self.xty.copy()
+        clone.yty = self.yty
+        clone.sources = list(self.sources)
+        return clone
+
+    def save(self, path):
+        """
+        Write the statistics and vocabulary to a compressed .npz file.
+        """
+        np.savez_compressed(
+            path,
+            gram=self.gram,
+            xty=self.xty,
+            yty=np.array(self.yty),
+            names=np.array(self.names, dtype=str),
+            categorical_features=np.array(self.categorical_features, dtype=str),
+            numerical_features=np.array(self.numerical_features, dtype=str),
+            target=np.array(self.target),
+            separator=np.array(self.separator),
+            sources=np.array(self.sources, dtype=str),
+        )
+        return path
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read statistics written by save().
+        """
+        with np.load(path, allow_pickle=False) as state:
+            stats = cls(state['categorical_features'].tolist(), state['numerical_features'].tolist(),
+                        target=str(state['target']), separator=str(state['separator']))
+            for name in state['names'].tolist():
+                if name not in stats.slots:
+                    stats._add_slot(name)
+            stats.gram = state['gram'].copy()
+            stats.xty = state['xty'].copy()
+            stats.yty = float(state['yty'])
+            stats.sources = state['sources'].tolist()
+        return stats
+
+    def _fit(self):
+        """
+        Solve the centred normal equations.
+
+        Returns (feature slots in sorted name order, coef, intercept, centred gram).
+        """
+        n = self.gram[0, 0]
+        if n <= 0:
+            raise ValueError('No samples accumulated')
+
+        counts = np.diag(self.gram)[1:]
+        is_numeric = np.array([name in self.numerical_features for name in self.names])
+        active = np.flatnonzero(is_numeric | (counts > 0.5))
+        names = [self.names[i] for i in active]
+        order = np.argsort(names, kind='stable')
+        features = active[order] + 1
+
+        x_sum = self.gram[0, features]
+        y_sum = self.xty[0]
+        centred_gram = self.gram[np.ix_(features, features)] - np.outer(x_sum, x_sum) / n
+        centred_xty = self.xty[features] - x_sum * y_sum / n
+
+        coef = np.linalg.lstsq(centred_gram, centred_xty, rcond=None)[0]
+        intercept = y_sum / n - (x_sum / n) @ coef
+        return features, coef, float(intercept), centred_gram
+
+    def solve(self):
+        """
+        Solve the least-squares problem once and return (model, vectorizer).
+
+        Mirrors LinearRegression(fit_intercept=True): the features are centred
+        and the minimum-norm solution of the centred normal equations is
+        taken, so the one-hot collinearity is resolved the same way. Features
+        that never occur are left out of the vocabulary, as DictVectorizer
+        would never have created them.
+        """
+        from sklearn.linear_model import LinearRegression
+
+        features, coef, intercept, centred_gram = self._fit()
+
+        model = LinearRegression()
+        model.coef_ = coef
+        model.intercept_ = intercept
+        model.n_features_in_ = len(coef)
+        model.rank_ = int(np.linalg.matrix_rank(centred_gram, hermitian=True))
+
+        encoder = ColumnarEncoder(self.categorical_features, self.numerical_features,
+                                  separator=self.separator)
+        encoder.feature_names_ = [self.names[i - 1] for i in features]
+        encoder.vocabulary_ = {name: i for i, name in enumerate(encoder.feature_names_)}
+        return model, encoder.to_dict_vectorizer()
+
+    def coefficients(self):
+        """
+        The solve() fit as one weight per slot, with the intercept in slot 0.
+        """
+        features, coef, intercept, _ = self._fit()
+        weights = np.zeros(self.n_slots)
+        weights[0] = intercept
+        weights[features] = coef
+        return weights
+
+    def rss(self, coefficients, other=None):
+        """
+        Residual sum of squares of slot weights over other's rows (default: these).
+
+        Uses y'y - 2 w'Z'y + w'Z'Z w, so a model fitted on one set of
+        statistics is evaluated on another without touching the rows.
+        Features other has and these statistics do not get weight 0, as an
+        unseen category would at prediction time.
+        """
+        other = self if other is None else other
+        weights = np.zeros(self.n_slots)
+        weights[:len(coefficients)] = coefficients
+        slots = np.array([0] + [self.slots.get(name, -1) for name in other.names], dtype=np.int64)
+        known = slots >= 0
+        w = weights[slots[known]]
+        gram = other.gram[np.ix_(known, known)]
+        xty = other.xty[known]
+        return float(other.yty - 2 * w @ xty + w @ gram @ w)
+
+
+def iter_frame_chunks(df, chunk_rows):
+    """
+    Yield consecutive row slices of an in-memory DataFrame.
+    """
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+
+def _source_stats(source, categorical_features, numerical_features):
+    stats = LinearStats(categorical_features, numerical_features)
+    for chunk in source:
+        stats.update(chunk)
+    return stats
+
+
+def _chunk_stats(chunk, categorical_features, numerical_features):
+    return LinearStats(categorical_features, numerical_features).update(chunk)
+
+
+def accumulate_stats(data, categorical_features=None, numerical_features=None,
+                     chunk_rows=250_000, n_workers=1):
+    """
+    Accumulate LinearStats over a DataFrame or an iterable of DataFrame chunks.
+
+    With n_workers > 1 the work runs in a process pool. Sources that can be
+    split() (ParquetChunks and friends) are partitioned so each worker reads
+    its own row groups; other iterables have their chunks sent to the pool,
+    with at most 2 * n_workers chunks in flight.
+    """
+    stats = LinearStats(categorical_features, numerical_features)
+    chunks = iter_frame_chunks(data, chunk_rows) if isinstance(data, pd.DataFrame) else data
+
+    if n_workers <= 1:
+        for chunk in chunks:
+            stats.update(chunk)
+        return stats
+
+    args = (stats.categorical_features, stats.numerical_features)
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        if hasattr(chunks, 'split'):
+            parts = chunks.split(n_workers)
+            for part_stats in pool.map(_source_stats, parts, *[[a] * len(parts) for a in args]):
+                stats.merge(part_stats)
+            return stats
+
+        pending = []
+        for chunk in chunks:
+            pending.append(pool.submit(_chunk_stats, chunk, *args))
+            if len(pending) >= 2 * n_workers:
+                stats.merge(pending.pop(0).result())
+        for future in pending:
+            stats.merge(future.result())
+    return stats
@@ -0,0 +1,184 @@
+"""
+Parallel hyperparameter sweep of regularized linear models.
+
+The prepared trips are encoded once, or opened from a FeatureCache
+(utils.feature_cache) when the same data was encoded before. The train / validation split of every
+feature set is written once as a memory-mapped CSC matrix (utils.shared_matrix)
+and the candidates - Ridge, Lasso and ElasticNet alphas crossed with the
+feature sets - are fitted in a process pool. Each task carries only a
+candidate spec and matrix handles, so adding workers adds throughput
+without adding copies of the data. Candidates are ranked by validation RMSE
+and the winner is refitted on all rows.
+"""
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+import numpy as np
+
+from utils.feature_cache import encode_features
+from utils.feature_encoding import CATEGORICAL_FEATURES, NUMERICAL_FEATURES, ColumnarEncoder
+from utils.shared_matrix import SharedMatrix, release, shared_tempdir
+
+
+TARGET = 'duration'
+DEFAULT_GRID = {
+    'ridge': [0.1, 1.0, 10.0],
+    'lasso': [0.0001, 0.001, 0.01],
+    'elasticnet': [0.0001, 0.001, 0.01],
+}
+FEATURE_SETS = {
+    'locations+distance': (CATEGORICAL_FEATURES, NUMERICAL_FEATURES),
+    'locations': (CATEGORICAL_FEATURES, []),
+    'pickup+distance': (['PULocationID'], NUMERICAL_FEATURES),
+}
+ELASTICNET_L1_RATIO = 0.5
+
+
+def candidate_grid(grid=None, feature_sets=None):
+    """
+    One candidate dict per model type, alpha and feature set name.
+    """
+    grid = grid or DEFAULT_GRID
+    feature_sets = feature_sets or list(FEATURE_SETS)
+    return [
+        {'model_type': model_type, 'alpha': float(alpha), 'feature_set': feature_set}
+        for feature_set in feature_sets
+        for model_type, alphas in grid.items()
+        for alpha in alphas
+    ]
+
+
+def make_estimator(candidate):
+    from sklearn.linear_model import ElasticNet, Lasso, LinearRegression, Ridge
+
+    model_type, alpha = candidate['model_type'], candidate.get('alpha')
+    if model_type == 'linear':
+        return LinearRegression()
+    if model_type == 'ridge':
+        return Ridge(alpha=alpha)
+    # copy_X=False: coordinate descent reads the shared CSC matrix in place
+    if model_type == 'lasso':
+        return Lasso(alpha=alpha, copy_X=False, max_iter=5000)
+    if model_type == 'elasticnet':
+        return ElasticNet(alpha=alpha, l1_ratio=ELASTICNET_L1_RATIO, copy_X=False, max_iter=5000)
+    raise ValueError(f"Unknown model_type: {model_type}")
+
+
+def feature_columns(feature_names, categorical_features, numerical_features, separator='='):
+    """
+    Positions of the features that belong to the given columns.
+    """
+    columns = set(categorical_features) | set(numerical_features)
+    return np.array([i for i, name in enumerate(feature_names) if name.split(separator, 1)[0] in columns],
+                    dtype=np.int64)
+
+
+def rmse(y_true, y_pred):
+    return float(np.sqrt(np.mean((np.asarray(y_true) - y_pred) ** 2)))
+
+
+def fit_candidate(candidate, matrices):
+    """
+    Fit one candidate on the shared training matrix and score it on validation.
+    """
+    X_train, X_val = (handle.open() for handle in matrices[candidate['feature_set']])
+    y_train, y_val = matrices['y_train'].open(), matrices['y_val'].open()
+
+    start = time.perf_counter()
+    model = make_estimator(candidate)
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+    return {
+        **candidate,
+        'rmse': rmse(y_val, model.predict(X_val)),
+        'train_rmse': rmse(y_train, model.predict(X_train)),
+        'fit_seconds': fit_seconds,
+        'n_nonzero': int(np.count_nonzero(model.coef_)),
+    }
+
+
+def _feature_set_vectorizer(encoder, columns, categorical_features, numerical_features):
+    subset = ColumnarEncoder(categorical_features, numerical_features, separator=encoder.separator)
+    subset.feature_names_ = [encoder.feature_names_[i] for i in columns]
+    subset.vocabulary_ = {name: i for i, name in enumerate(subset.feature_names_)}
+    return subset.to_dict_vectorizer()
+
+
+def run_sweep(data, candidates=None, n_workers=None, validation_fraction=0.2, seed=42,
+              feature_sets=None, feature_cache=None):
+    """
+    Fit every candidate in parallel and refit the best one on all rows.
+
+    Returns (results sorted by validation RMSE, winner), where winner holds
+    the refitted model and the DictVectorizer of its feature set.
+    """
+    feature_sets = {**FEATURE_SETS, **(feature_sets or {})}
+    candidates = candidates or candidate_grid()
+    # CSC for column slicing by feature set; cached as CSC, so a hit is mapped without a copy
+    X, y, encoder = encode_features(data, CATEGORICAL_FEATURES, NUMERICAL_FEATURES, TARGET,
+                                    cache=feature_cache, name='sweep', fmt='csc')
+    is_val = np.random.default_rng(seed).random(len(y)) < validation_fraction
+
+    columns = {
+        name: feature_columns(encoder.feature_names_, *feature_sets[name], encoder.separator)
+        for name in {candidate['feature_set'] for candidate in candidates}
+    }
+    directory = shared_tempdir('sweep-')
+    try:
+        matrices = {
+            'y_train': SharedMatrix.write(directory, 'y_train', y[~is_val]),
+            'y_val': SharedMatrix.write(directory, 'y_val', y[is_val]),
+        }
+        for name, cols in columns.items():
+            X_set = X[:, cols]
+            matrices[name] = (SharedMatrix.write(directory, f'{name}-train', X_set[~is_val]),
+                              SharedMatrix.write(directory, f'{name}-val', X_set[is_val]))
+
+        print(f"Sweeping {len(candidates)} candidates over {len(columns)} feature sets "
+              f"({(~is_val).sum():,} train / {is_val.sum():,} validation rows)")
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            results = list(pool.map(fit_candidate, candidates, repeat(matrices)))
+    finally:
+        release(directory)
+
+    results.sort(key=lambda result: result['rmse'])
+    best = results[0]
+    model = make_estimator(best)
+    model.fit(X[:, columns[best['feature_set']]], y)
+    vectorizer = _feature_set_vectorizer(encoder, columns[best['feature_set']],
+                                         *feature_sets[best['feature_set']])
+    return results, {**best, 'model': model, 'vectorizer': vectorizer}
+
+
+def log_sweep(results, tracking_uri, experiment_name=None):
+    """
+    Log a parent run with one child run per candidate; returns the parent run id.
+    """
+    import mlflow
+
+    from utils.registry import EXPERIMENT_NAME, get_or_create_experiment
+    from utils.tracking import BatchedRunLogger, tracking_lock
+
+    client = mlflow.MlflowClient(tracking_uri=tracking_uri)
+    experiment_id = get_or_create_experiment(experiment_name or EXPERIMENT_NAME, tracking_uri)
+    with tracking_lock(tracking_uri):
+        parent = client.create_run(experiment_id, tags={'mlflow.runName': 'sweep'})
+        parent_id = parent.info.run_id
+        for result in results:
+            child = client.create_run(experiment_id, tags={
+                'mlflow.parentRunId': parent_id,
+                'mlflow.runName': f"{result['model_type']}-{result['alpha']:g}-{result['feature_set']}",
+            })
+            logger = BatchedRunLogger(client, child.info.run_id)
+            logger.log_params({key: result[key] for key in ('model_type', 'alpha', 'feature_set')})
+            logger.log_metrics({key: result[key] for key in ('rmse', 'train_rmse', 'fit_seconds', 'n_nonzero')})
+            logger.flush()
+            client.set_terminated(child.info.run_id)
+        logger = BatchedRunLogger(client, parent_id)
+        logger.log_params({'n_candidates': len(results), 'best_model_type': results[0]['model_type'],
+                           'best_alpha': results[0]['alpha'], 'best_feature_set': results[0]['feature_set']})
+        logger.log_metric('best_rmse', results[0]['rmse'])
+        logger.flush()
+        client.set_terminated(parent_id)
+    return parent_id
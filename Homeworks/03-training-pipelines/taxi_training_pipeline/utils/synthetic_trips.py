@@ -0,0 +1,108 @@
+"""
+Deterministic synthetic Yellow taxi trips for tests and benchmarks.
+
+Frames follow the 19-column schema of the TLC yellow_tripdata parquet files
+that load_taxi_data reads. Trip durations are log-normal with a few percent
+outside the 1-60 minute window, pickups/dropoffs are drawn from 265 location
+IDs with a skewed popularity, and distance follows duration through a noisy
+speed. Rows are generated in fixed-size blocks, each seeded from
+(seed, block index), so the same seed and block size always yield the same
+trips, whether they are built in memory or streamed to parquet.
+"""
+import numpy as np
+import pandas as pd
+
+
+N_LOCATIONS = 265
+BLOCK_ROWS = 1_000_000
+
+
+def _location_weights(rng):
+    # A handful of very busy zones (airports, Midtown) and a long tail
+    weights = rng.pareto(1.2, N_LOCATIONS) + 0.05
+    return weights / weights.sum()
+
+
+def _generate_block(n_rows, seed, block_index, year, month):
+    rng = np.random.default_rng([seed, block_index])
+    weights = _location_weights(np.random.default_rng([seed, 0xC0FFEE]))
+
+    month_start = np.datetime64(f"{year:04d}-{month:02d}-01T00:00:00", 's')
+    month_seconds = int((pd.Timestamp(month_start) + pd.offsets.MonthBegin(1) - pd.Timestamp(month_start)).total_seconds())
+    pickup = month_start + rng.integers(0, month_seconds, n_rows).astype('timedelta64[s]')
+
+    # Log-normal durations (median ~11 min) plus a few zero/negative/multi-hour outliers
+    duration_s = np.exp(rng.normal(np.log(660), 0.65, n_rows))
+    outlier = rng.random(n_rows)
+    duration_s[outlier < 0.012] = rng.uniform(-120, 59, int((outlier < 0.012).sum()))
+    duration_s[outlier > 0.992] = rng.uniform(3601, 20000, int((outlier > 0.992).sum()))
+    dropoff = pickup + duration_s.astype('int64').astype('timedelta64[s]')
+
+    speed_mph = np.clip(rng.lognormal(np.log(11), 0.35, n_rows), 2, 60)
+    distance = np.round(np.clip(duration_s, 0, None) / 3600 * speed_mph, 2)
+    distance[rng.random(n_rows) < 0.01] = 0.0
+
+    fare = np.round(3 + 2.5 * distance + 0.5 * np.clip(duration_s, 0, None) / 60, 2)
+    tip = np.round(fare * rng.choice([0, 0.15, 0.2, 0.25], n_rows, p=[0.3, 0.2, 0.35, 0.15]), 2)
+    airport = rng.random(n_rows) < 0.08
+    passengers = rng.choice([0.0, 1.0, 2.0, 3.0, 4.0, 5.0, 6.0], n_rows,
+                            p=[0.02, 0.72, 0.15, 0.04, 0.02, 0.03, 0.02])
+    missing_meta = rng.random(n_rows) < 0.03
+
+    df = pd.DataFrame({
+        'VendorID': rng.choice([1, 2], n_rows, p=[0.26, 0.74]).astype('int64'),
+        'tpep_pickup_datetime': pickup.astype('datetime64[us]'),
+        'tpep_dropoff_datetime': dropoff.astype('datetime64[us]'),
+        'passenger_count': np.where(missing_meta, np.nan, passengers),
+        'trip_distance': distance,
+        'RatecodeID': np.where(missing_meta, np.nan, np.where(airport, 2.0, 1.0)),
+        'store_and_fwd_flag': np.where(missing_meta, None, np.where(rng.random(n_rows) < 0.005, 'Y', 'N')),
+        'PULocationID': rng.choice(np.arange(1, N_LOCATIONS + 1), n_rows, p=weights).astype('int64'),
+        'DOLocationID': rng.choice(np.arange(1, N_LOCATIONS + 1), n_rows, p=weights).astype('int64'),
+        'payment_type': rng.choice([0, 1, 2, 3, 4], n_rows, p=[0.03, 0.78, 0.16, 0.01, 0.02]).astype('int64'),
+        'fare_amount': fare,
+        'extra': rng.choice([0.0, 1.0, 2.5], n_rows),
+        'mta_tax': np.full(n_rows, 0.5),
+        'tip_amount': tip,
+        'tolls_amount': np.where(airport, 6.55, 0.0),
+        'improvement_surcharge': np.full(n_rows, 1.0),
+        'total_amount': np.round(fare + tip + 4.0, 2),
+        'congestion_surcharge': np.where(missing_meta, np.nan, 2.5),
+        'airport_fee': np.where(missing_meta, np.nan, np.where(airport, 1.25, 0.0)),
+    })
+    return df
+
+
+def iter_trip_blocks(n_rows, seed=42, year=2023, month=3, block_rows=BLOCK_ROWS):
+    """
+    Yield the synthetic trips as DataFrames of at most block_rows rows.
+    """
+    for block_index, start in enumerate(range(0, n_rows, block_rows)):
+        yield _generate_block(min(block_rows, n_rows - start), seed, block_index, year, month)
+
+
+def generate_trips(n_rows, seed=42, year=2023, month=3):
+    """
+    Return n_rows synthetic trips as one DataFrame.
+    """
+    return pd.concat(list(iter_trip_blocks(n_rows, seed, year, month)), ignore_index=True)
+
+
+def write_trips_parquet(path, n_rows, seed=42, year=2023, month=3, row_group_size=BLOCK_ROWS):
+    """
+    Write synthetic trips to a parquet file block by block, in bounded memory.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    try:
+        for block in iter_trip_blocks(n_rows, seed, year, month, block_rows=row_group_size):
+            table = pa.Table.from_pandas(block, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table, row_group_size=row_group_size)
+    finally:
+        if writer is not None:
+            writer.close()
+    return path
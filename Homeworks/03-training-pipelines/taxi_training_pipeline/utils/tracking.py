@@ -0,0 +1,262 @@
+"""
+Batched and background MLflow logging.
+
+BatchedRunLogger buffers params, metrics and tags of a run in memory and
+writes them with as few MlflowClient.log_batch calls as MLflow's per-batch
+limits allow - one round trip (one SQLite transaction) instead of one per
+value. BackgroundUploader runs slow tracking work such as artifact upload
+and model registration on a single background thread fed by a bounded
+queue: submitting blocks once max_pending jobs are waiting, so a slow
+tracking store applies back-pressure instead of piling up work. Pending
+jobs are flushed when the interpreter exits.
+
+tracking_lock serializes writes to a SQLite tracking store across threads
+and processes, so concurrent pipelines queue for the database instead of
+failing with "database is locked"; enable_wal lets readers carry on while
+a write is in progress.
+"""
+import atexit
+import contextlib
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, writes are not serialized
+    fcntl = None
+
+
+MAX_PARAMS_PER_BATCH = 100
+MAX_TAGS_PER_BATCH = 100
+MAX_ENTITIES_PER_BATCH = 1000
+SQLITE_BUSY_TIMEOUT_MS = 30_000
+
+
+def sqlite_path(tracking_uri):
+    """
+    Database file of a sqlite:/// tracking URI, or None for other stores.
+    """
+    if not tracking_uri or not tracking_uri.startswith('sqlite:///'):
+        return None
+    path = tracking_uri[len('sqlite:///'):].split('?', 1)[0]
+    return None if path in ('', ':memory:') else path
+
+
+@contextlib.contextmanager
+def tracking_lock(tracking_uri):
+    """
+    Hold an exclusive lock on the tracking store for a group of writes.
+
+    Uses flock on a <database>.lock file next to a SQLite store, so every
+    thread and process writing to the same database takes turns. Not
+    reentrant; a no-op for non-SQLite stores, which handle concurrency
+    themselves.
+    """
+    path = sqlite_path(tracking_uri)
+    if path is None or fcntl is None:
+        yield
+        return
+    with open(f"{path}.lock", 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def enable_wal(tracking_uri):
+    """
+    Switch a SQLite tracking store to write-ahead logging.
+
+    The journal mode is stored in the database file, so this only needs to
+    happen once per store. Returns the journal mode now in effect, or None
+    for non-SQLite stores.
+    """
+    path = sqlite_path(tracking_uri)
+    if path is None:
+        return None
+    with tracking_lock(tracking_uri):
+        connection = sqlite3.connect(path, timeout=SQLITE_BUSY_TIMEOUT_MS / 1000)
+        try:
+            connection.execute(f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}")
+            return connection.execute("PRAGMA journal_mode = WAL").fetchone()[0]
+        finally:
+            connection.close()
+
+
+_initialized_stores = set()
+
+
+def init_tracking_store(tracking_uri):
+    """
+    Create the MLflow schema of a SQLite store under the tracking lock and enable WAL.
+
+    MLflow creates its tables when a process first opens a store, and two
+    processes doing that on a new database at once fail with "table
+    already exists". Runs once per store and process.
+    """
+    if tracking_uri in _initialized_stores or sqlite_path(tracking_uri) is None:
+        return
+    import mlflow
+
+    with tracking_lock(tracking_uri):
+        mlflow.MlflowClient(tracking_uri=tracking_uri).search_experiments(max_results=1)
+    enable_wal(tracking_uri)
+    _initialized_stores.add(tracking_uri)
+
+
+class BatchedRunLogger:
+    """
+    Buffer params, metrics and tags for one run and write them in batches.
+    """
+
+    def __init__(self, client, run_id):
+        self.client = client
+        self.run_id = run_id
+        self.params = {}
+        self.metrics = []
+        self.tags = {}
+        self.batches_sent = 0
+
+    def log_param(self, key, value):
+        self.params[key] = str(value)
+
+    def log_params(self, params):
+        for key, value in params.items():
+            self.log_param(key, value)
+
+    def log_metric(self, key, value, step=0):
+        self.metrics.append((key, float(value), int(time.time() * 1000), step))
+
+    def log_metrics(self, metrics, step=0):
+        for key, value in metrics.items():
+            self.log_metric(key, value, step)
+
+    def set_tag(self, key, value):
+        self.tags[key] = str(value)
+
+    def set_tags(self, tags):
+        for key, value in tags.items():
+            self.set_tag(key, value)
+
+    def _batches(self):
+        from mlflow.entities import Metric, Param, RunTag
+
+        params = [Param(key, value) for key, value in self.params.items()]
+        tags = [RunTag(key, value) for key, value in self.tags.items()]
+        metrics = [Metric(key, value, timestamp, step) for key, value, timestamp, step in self.metrics]
+        while params or tags or metrics:
+            batch_params, params = params[:MAX_PARAMS_PER_BATCH], params[MAX_PARAMS_PER_BATCH:]
+            batch_tags, tags = tags[:MAX_TAGS_PER_BATCH], tags[MAX_TAGS_PER_BATCH:]
+            room = MAX_ENTITIES_PER_BATCH - len(batch_params) - len(batch_tags)
+            batch_metrics, metrics = metrics[:room], metrics[room:]
+            yield batch_params, batch_metrics, batch_tags
+
+    def flush(self):
+        """
+        Write everything buffered so far; returns the number of log_batch calls.
+        """
+        calls = 0
+        for params, metrics, tags in self._batches():
+            self.client.log_batch(self.run_id, metrics=metrics, params=params, tags=tags)
+            calls += 1
+        self.params, self.metrics, self.tags = {}, [], {}
+        self.batches_sent += calls
+        return calls
+
+
+class BackgroundUploader:
+    """
+    Single background thread running submitted jobs in order.
+
+    submit() returns a concurrent.futures.Future and blocks while
+    max_pending jobs are already queued. flush() waits until the queue is
+    drained; it is registered to run at interpreter exit.
+    """
+
+    def __init__(self, max_pending=8):
+        self.max_pending = max_pending
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = None
+        self._lock = threading.Lock()
+        self.failures = []
+        atexit.register(self.close)
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                # Daemon, so a forgotten uploader cannot hang shutdown; the
+                # atexit flush still runs pending jobs first
+                self._thread = threading.Thread(target=self._work, name='mlflow-uploader', daemon=True)
+                self._thread.start()
+
+    def submit(self, func, *args, **kwargs):
+        future = Future()
+        self._ensure_started()
+        self._queue.put((future, func, args, kwargs))
+        return future
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                future, func, args, kwargs = item
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    future.set_result(func(*args, **kwargs))
+                except BaseException as e:
+                    self.failures.append(e)
+                    future.set_exception(e)
+            finally:
+                self._queue.task_done()
+
+    @property
+    def pending(self):
+        return self._queue.unfinished_tasks
+
+    def flush(self):
+        """
+        Block until every submitted job has finished.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.join()
+
+    def close(self):
+        if self._thread is None or not self._thread.is_alive():
+            return
+        if self.pending:
+            print(f"⏳ Waiting for {self.pending} pending MLflow upload(s)...")
+        self.flush()
+        self._queue.put(None)
+        self._thread.join()
+        for failure in self.failures:
+            print(f"⚠️  MLflow upload failed: {failure}")
+
+
+_default_uploader = None
+_default_lock = threading.Lock()
+
+
+def get_uploader():
+    """
+    Process-wide BackgroundUploader shared by all blocks.
+    """
+    global _default_uploader
+    with _default_lock:
+        if _default_uploader is None:
+            _default_uploader = BackgroundUploader()
+        return _default_uploader
+
+
+def wait_for_uploads():
+    """
+    Wait for all background uploads of this process to finish.
+    """
+    if _default_uploader is not None:
+        _default_uploader.flush()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Test content-addressed deduplication of local MLflow artifacts.
+Uses throwaway artifact trees and a throwaway tracking database.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+sys.path.append('./taxi_training_pipeline')
+
+import mlflow
+
+from transformers.prepare_data import prepare_trips
+from transformers.train_model import transform_data as train_model
+from utils.artifact_store import BlobStore
+from utils.registry import EXPERIMENT_NAME, MODEL_NAME, load_model_bundle
+from utils.synthetic_trips import generate_trips
+
+
+def write_run(root, run_id, files):
+    artifact_dir = os.path.join(root, '2', run_id, 'artifacts', 'model')
+    os.makedirs(artifact_dir)
+    for name, content in files.items():
+        with open(os.path.join(artifact_dir, name), 'wb') as f:
+            f.write(content)
+    return artifact_dir
+
+
+def test_compact_links_identical_files():
+    shared = {'conda.yaml': b'name: mlflow-env\n' * 50, 'model.pkl': os.urandom(4096)}
+    with tempfile.TemporaryDirectory() as root:
+        run_dirs = [write_run(root, f'run{i}', {**shared, 'MLmodel': f'run_id: run{i}\n'.encode()})
+                    for i in range(3)]
+        store = BlobStore(root)
+
+        dry = store.compact(dry_run=True)
+        assert not os.path.exists(store.blob_dir), 'Dry run changed files'
+        result = BlobStore(root).compact()
+        assert dry['bytes_saved'] == result['bytes_saved'], 'Dry run estimate differs'
+        assert result['files'] == 9 and result['linked'] == 4, f'Unexpected result: {result}'
+
+        inodes = {os.stat(os.path.join(d, 'model.pkl')).st_ino for d in run_dirs}
+        assert len(inodes) == 1, 'Identical files were not linked'
+        for run_dir in run_dirs:
+            with open(os.path.join(run_dir, 'model.pkl'), 'rb') as f:
+                assert f.read() == shared['model.pkl'], 'Contents changed'
+        assert BlobStore(root).compact()['linked'] == 0, 'Second compaction relinked files'
+        assert BlobStore(root).info()['blobs'] == 5, 'Expected 2 shared + 3 unique blobs'
+
+        shutil.rmtree(os.path.join(root, '2', 'run0'))
+        assert BlobStore(root).gc() == (1, len(b'run_id: run0\n')), 'Only run0 MLmodel is unreferenced'
+        for run_id in ('run1', 'run2'):
+            shutil.rmtree(os.path.join(root, '2', run_id))
+        removed, _ = BlobStore(root).gc()
+        assert removed == 4 and BlobStore(root).info()['blobs'] == 0, 'Blobs left behind'
+
+    print(f"✓ 9 files stored as 5 blobs, {result['bytes_saved']:,} bytes saved, unreferenced blobs removed")
+
+
+def test_registered_models_share_artifacts():
+    from data_exporters.register_model import export_data
+
+    model_info = train_model(prepare_trips(generate_trips(20000, seed=51)))
+    with tempfile.TemporaryDirectory() as tmp:
+        tracking_uri = f"sqlite:///{os.path.join(tmp, 'mlflow.db')}"
+        client = mlflow.MlflowClient(tracking_uri=tracking_uri)
+        client.create_experiment(EXPERIMENT_NAME, artifact_location=os.path.join(tmp, 'mlruns', '1'))
+
+        runs = [export_data(model_info, tracking_uri=tracking_uri, sklearn_flavor=True)['run_id'] for _ in range(2)]
+        paths = [os.path.join(tmp, 'mlruns', '1', run_id, 'artifacts', 'model_compact', 'model.txm')
+                 for run_id in runs]
+        shared = os.stat(paths[0]).st_ino == os.stat(paths[1]).st_ino
+        bundle, version = load_model_bundle(MODEL_NAME, tracking_uri=tracking_uri)
+        info = BlobStore(os.path.join(tmp, 'mlruns')).info()
+
+    assert shared, 'Second run did not reuse the first run\'s model.txm'
+    assert str(version.version) == '2' and 'model' in bundle, 'Deduplicated artifacts are not loadable'
+    assert info['referenced_bytes'] > info['stored_bytes'], f'Nothing was shared: {info}'
+    print(f"✓ 2 registered runs keep {info['referenced_bytes']:,} bytes of artifacts "
+          f"in {info['stored_bytes']:,} bytes of blobs")
+
+
+if __name__ == "__main__":
+    test_compact_links_identical_files()
+    test_registered_models_share_artifacts()
+    print("\n✓ All artifact store tests passed!")
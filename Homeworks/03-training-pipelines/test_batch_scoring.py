@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Test that chunked, multi-process batch scoring matches scoring the whole file at once.
+Runs on synthetic trips, no parquet file or MLflow database needed.
+"""
+
+import sys
+import tempfile
+sys.path.append('./taxi_training_pipeline')
+
+import numpy as np
+import pandas as pd
+
+from utils.batch_scoring import PREDICTION_COLUMN, score_parquet
+from utils.feature_encoding import ColumnarEncoder
+from utils.synthetic_trips import generate_trips, write_trips_parquet
+from transformers.train_model import train_on_sample
+from transformers.prepare_data import prepare_trips
+
+
+def fit_model():
+    lr, dv, _ = train_on_sample(prepare_trips(generate_trips(20000, seed=7)), sample_size=20000)
+    return lr, dv
+
+
+def test_parallel_scoring_matches_in_memory():
+    model, dv = fit_model()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # New seed, so some location IDs were never seen in training
+        path = write_trips_parquet(f"{tmp}/trips.parquet", 50000, seed=8, row_group_size=6000)
+        trips = pd.read_parquet(path)
+        expected = model.predict(ColumnarEncoder.from_dict_vectorizer(dv).transform(trips))
+
+        serial = score_parquet(path, f"{tmp}/serial.parquet", model, dv, n_workers=1, chunk_rows=2500)
+        parallel = score_parquet(path, f"{tmp}/parallel.parquet", model, dv, n_workers=3,
+                                 chunk_rows=2500, max_in_flight=2)
+        serial_df = pd.read_parquet(serial['output_path'])
+        parallel_df = pd.read_parquet(parallel['output_path'])
+
+    assert serial['rows'] == parallel['rows'] == len(trips), 'Row count mismatch'
+    assert parallel['row_groups'] == 9 and parallel['chunks'] == 9, f"Unexpected split {parallel}"
+    assert np.allclose(serial_df[PREDICTION_COLUMN], expected), 'Serial predictions differ'
+    assert np.allclose(parallel_df[PREDICTION_COLUMN], expected), 'Parallel predictions differ'
+    assert (parallel_df['tpep_pickup_datetime'].values == trips['tpep_pickup_datetime'].values).all(), \
+        'Output order differs from input order'
+    print(f"✓ {parallel['rows']:,} trips scored in order across {parallel['workers']} workers")
+
+
+def test_single_row_group_is_split_across_workers():
+    model, dv = fit_model()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_trips_parquet(f"{tmp}/trips.parquet", 20000, seed=9, row_group_size=20000)
+        trips = pd.read_parquet(path)
+        expected = model.predict(ColumnarEncoder.from_dict_vectorizer(dv).transform(trips))
+        summary = score_parquet(path, f"{tmp}/scored.parquet", model, dv, n_workers=3,
+                                chunk_rows=3000, max_in_flight=2)
+        scored = pd.read_parquet(summary['output_path'])
+
+    assert summary['row_groups'] == 1 and summary['chunks'] == 7, f"Unexpected split {summary}"
+    assert summary['workers'] == 3, 'A single row group was scored serially'
+    assert len(scored) == len(trips) and np.allclose(scored[PREDICTION_COLUMN], expected)
+    assert (scored['tpep_pickup_datetime'].values == trips['tpep_pickup_datetime'].values).all(), \
+        'Chunks were written out of order'
+    print(f"✓ One row group scored as {summary['chunks']} chunks across {summary['workers']} workers")
+
+
+if __name__ == "__main__":
+    test_parallel_scoring_matches_in_memory()
+    test_single_row_group_is_split_across_workers()
+    print("\n✓ All batch scoring tests passed!")
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Test the synthetic trip generator and the benchmark regression gate.
+Block timings are replaced by fixed numbers; nothing is trained.
+"""
+
+import os
+import sys
+import tempfile
+sys.path.append('./taxi_training_pipeline')
+
+import pandas as pd
+
+import benchmark_pipeline
+from utils.synthetic_trips import generate_trips, iter_trip_blocks, write_trips_parquet
+
+
+def test_generator_is_deterministic():
+    first = generate_trips(20000, seed=71)
+    pd.testing.assert_frame_equal(generate_trips(20000, seed=71), first)
+    assert not generate_trips(20000, seed=72)['trip_distance'].equals(first['trip_distance']), \
+        'Different seeds gave the same trips'
+
+    blocks = pd.concat(list(iter_trip_blocks(20000, seed=71, block_rows=5000)), ignore_index=True)
+    pd.testing.assert_frame_equal(
+        pd.concat(list(iter_trip_blocks(20000, seed=71, block_rows=5000)), ignore_index=True), blocks)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_trips_parquet(os.path.join(tmp, 'trips.parquet'), 20000, seed=71, row_group_size=5000)
+        pd.testing.assert_frame_equal(pd.read_parquet(path), blocks)
+    print("✓ Same seed, same trips; the parquet file matches the generated blocks")
+
+
+def fake_benchmark(seconds):
+    def benchmark_size(n_rows, args, work_dir):
+        return {block: seconds.get(block, 1.0) for block in benchmark_pipeline.BLOCKS}
+    return benchmark_size
+
+
+def run_benchmark(history, seconds, *extra_args):
+    argv, benchmark_size = sys.argv, benchmark_pipeline.benchmark_size
+    sys.argv = ['benchmark_pipeline.py', '--sizes', '10k', '--history', history, *extra_args]
+    benchmark_pipeline.benchmark_size = fake_benchmark(seconds)
+    try:
+        return benchmark_pipeline.main()
+    finally:
+        sys.argv, benchmark_pipeline.benchmark_size = argv, benchmark_size
+
+
+def test_gate_fails_on_slowdown_beyond_threshold():
+    with tempfile.TemporaryDirectory() as tmp:
+        history = os.path.join(tmp, 'history.json')
+        for _ in range(3):
+            assert run_benchmark(history, {}) == 0, 'Baseline runs failed the gate'
+
+        assert run_benchmark(history, {'train_model': 1.15}, '--no-save') == 0, 'Slowdown within 20% failed'
+        assert run_benchmark(history, {'train_model': 1.5}, '--no-save') == 1, '50% slowdown passed the gate'
+        assert run_benchmark(history, {'train_model': 1.5}, '--no-save', '--max-regression', '60') == 0
+        assert run_benchmark(history, {'train_model': 1.5}, '--no-save', '--no-gate') == 0
+        assert len(benchmark_pipeline.load_history(history)['runs']) == 3, '--no-save runs were saved'
+
+        # Only runs with the same settings are a baseline
+        run = {'machine': benchmark_pipeline.machine_id(), 'config': {'lean': True},
+               'results': {'10000': {'train_model': 1.5}}}
+        assert benchmark_pipeline.find_regressions(run, benchmark_pipeline.load_history(history),
+                                                   20.0, 5, 0.05) == []
+    print("✓ The gate fails a block that is slower than its baseline by more than the threshold")
+
+
+if __name__ == "__main__":
+    test_generator_is_deterministic()
+    test_gate_fails_on_slowdown_beyond_threshold()
+    print("\n✓ All benchmark tests passed!")
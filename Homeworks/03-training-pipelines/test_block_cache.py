@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Test the content-addressed block output cache.
+Uses throwaway cache directories and block files only.
+"""
+
+import importlib.util
+import os
+import sys
+import tempfile
+import time
+sys.path.append('./taxi_training_pipeline')
+
+import utils.block_cache as block_cache
+from utils.block_cache import BlockCache
+
+
+BLOCK_SOURCE = '''
+def transform(data, scale=1):
+    return [value * scale for value in data]{suffix}
+'''
+
+
+def load_block(directory, suffix=''):
+    path = os.path.join(directory, 'cached_block.py')
+    with open(path, 'w') as f:
+        f.write(BLOCK_SOURCE.format(suffix=suffix))
+    spec = importlib.util.spec_from_file_location('cached_block', path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules['cached_block'] = module
+    spec.loader.exec_module(module)
+    return module.transform
+
+
+def test_run_hits_after_first_miss():
+    calls = []
+
+    def double(data, scale=2):
+        calls.append(data)
+        return [value * scale for value in data]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = BlockCache(tmp)
+        first, key, hit = cache.run('double', double, [1, 2, 3], 'input-key')
+        assert not hit and first == [2, 4, 6]
+        second, same_key, hit = cache.run('double', double, lambda: calls.append('produced'), 'input-key')
+        assert hit and second == first and same_key == key, 'Second run missed the cache'
+        assert calls == [[1, 2, 3]], 'Block or its input ran again on a hit'
+        try:
+            cache.get('0' * 40)
+            raise AssertionError('get() of an unknown key did not raise KeyError')
+        except KeyError:
+            pass
+    print("✓ A second run with the same inputs is served from the cache")
+
+
+def test_least_recently_used_entries_are_evicted():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = BlockCache(tmp)
+        for i, key in enumerate(['a', 'b', 'c']):
+            cache.put(key, bytes(1000), name='block')
+            # Distinct, increasing access times without sleeping
+            os.utime(os.path.join(tmp, key, 'meta.json'), (time.time() - 100 + i, time.time() - 100 + i))
+        cache.get('a')
+
+        entry_size = cache.size() // 3
+        evicted = cache.evict(max_bytes=2 * entry_size)
+        assert evicted == ['b'], f'Evicted {evicted} instead of the least recently used entry'
+        assert cache.contains('a') and cache.contains('c') and not cache.contains('b')
+
+        cache.max_bytes = entry_size
+        cache.put('d', bytes(1000))
+        assert [key for key, _, _ in cache.entries()] == ['d'], 'put() did not evict down to max_bytes'
+    print("✓ Least recently used entries are evicted first")
+
+
+def test_clear_all_or_one_block():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = BlockCache(tmp)
+        cache.put('a', 1, name='prepare_data')
+        cache.put('b', 2, name='train_model')
+        cache.put('c', 3, name='train_model')
+        assert cache.clear('train_model') == 2
+        assert cache.contains('a') and not cache.contains('b')
+        assert cache.clear() == 1 and cache.entries() == []
+    print("✓ clear() removes one block's entries or all of them")
+
+
+def test_source_params_and_utils_change_the_key():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = BlockCache(os.path.join(tmp, 'cache'))
+        block = load_block(tmp)
+        key = cache.key(block, 'input-key')
+        assert cache.key(load_block(tmp), 'input-key') == key, 'Key is not stable'
+        assert cache.key(block, 'input-key', {'scale': 3}) != key, 'Params are not part of the key'
+        assert cache.key(block, 'other-input') != key, 'Upstream key is not part of the key'
+        assert cache.key(load_block(tmp, suffix='  # edited'), 'input-key') != key, 'Block source is not part of the key'
+
+        # Any utils module counts, imported by the block or not
+        utils_dir = os.path.join(tmp, 'utils')
+        os.makedirs(utils_dir)
+        with open(os.path.join(utils_dir, 'helpers.py'), 'w') as f:
+            f.write('SEPARATOR = "="\n')
+        original_utils_dir = block_cache.UTILS_DIR
+        block_cache.UTILS_DIR = utils_dir
+        try:
+            block = load_block(tmp)
+            before = cache.key(block, 'input-key')
+            with open(os.path.join(utils_dir, 'helpers.py'), 'w') as f:
+                f.write('SEPARATOR = "=="\n')
+            assert cache.key(block, 'input-key') != before, 'Utils source is not part of the key'
+        finally:
+            block_cache.UTILS_DIR = original_utils_dir
+            sys.modules.pop('cached_block', None)
+    print("✓ Editing a block, its params or a utils module changes the key")
+
+
+if __name__ == "__main__":
+    test_run_hits_after_first_miss()
+    test_least_recently_used_entries_are_evicted()
+    test_clear_all_or_one_block()
+    test_source_params_and_utils_change_the_key()
+    print("\n✓ All block cache tests passed!")
@@ -5,32 +5,63 @@ sys.path.append('./taxi_training_pipeline')
 
 print('Testing individual Mage blocks...')
 
+# Reuse prepared data and the model from the block cache when unchanged;
+# blocks before the last cached one are skipped, not loaded
+from utils.block_cache import BlockCache
+from data_loaders.load_taxi_data import load_data, resolve_file_path
+from transformers.prepare_data import transform_data
+from transformers.train_model import transform_data as train_model
+cache = BlockCache()
+steps = [
+    ('load_taxi_data', load_data, {}),
+    ('prepare_data', transform_data, {}),
+    ('train_model', train_model, {}),
+]
+keys, start = cache.plan(steps, resolve_file_path())
+
+
+def run_step(i, data):
+    name, func, params = steps[i]
+    if i == start - 1:
+        return cache.get(keys[i]), True
+    data = func(data, **params)
+    # The raw frame is not cached: it would be a second copy of the parquet file
+    if name != 'load_taxi_data':
+        cache.put(keys[i], data, name)
+    return data, False
+
+
 # Test load_taxi_data
+df = None
 try:
-    from data_loaders.load_taxi_data import load_data
     print('Loading data...')
-    df = load_data()
-    print(f'✓ Data loaded: {len(df):,} records')
+    if start > 1:
+        print('✓ Skipped (a later block is cached)')
+    else:
+        df, hit = run_step(0, None)
+        print(f'✓ Data loaded: {len(df):,} records' + (' (cached)' if hit else ''))
 except Exception as e:
     print(f'✗ Data loading failed: {e}')
     sys.exit(1)
 
 # Test prepare_data  
+df_prepared = None
 try:
-    from transformers.prepare_data import transform_data
     print('Preparing data...')
-    df_prepared = transform_data(df)
-    print(f'✓ Data prepared: {len(df_prepared):,} records')
+    if start > 2:
+        print('✓ Skipped (a later block is cached)')
+    else:
+        df_prepared, hit = run_step(1, df)
+        print(f'✓ Data prepared: {len(df_prepared):,} records' + (' (cached)' if hit else ''))
 except Exception as e:
     print(f'✗ Data preparation failed: {e}')
     sys.exit(1)
 
 # Test train_model
 try:
-    from transformers.train_model import transform_data as train_model
     print('Training model...')
-    model_info = train_model(df_prepared)
-    print(f'✓ Model trained with intercept: {model_info["intercept"]:.2f}')
+    model_info, hit = run_step(2, df_prepared)
+    print(f'✓ Model trained with intercept: {model_info["intercept"]:.2f}' + (' (cached)' if hit else ''))
 except Exception as e:
     print(f'✗ Model training failed: {e}')
     sys.exit(1)
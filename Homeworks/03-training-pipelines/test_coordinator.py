@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Test parallel training with a single tracking writer.
+Uses synthetic trips and a throwaway tracking database; mlflow.db is not touched.
+"""
+
+import multiprocessing
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+sys.path.append('./taxi_training_pipeline')
+
+import mlflow
+
+from utils.coordinator import RunCoordinator
+from utils.registry import EXPERIMENT_NAME, MODEL_NAME, get_or_create_experiment, model_versions
+from utils.synthetic_trips import write_trips_parquet
+from utils.tracking import tracking_lock
+
+
+def hold_lock(tracking_uri, log_path):
+    with tracking_lock(tracking_uri):
+        with open(log_path, 'a') as f:
+            f.write('enter\n')
+        time.sleep(0.1)
+        with open(log_path, 'a') as f:
+            f.write('exit\n')
+
+
+def test_experiment_creation_is_idempotent():
+    with tempfile.TemporaryDirectory() as tmp:
+        tracking_uri = f"sqlite:///{os.path.join(tmp, 'mlflow.db')}"
+        ids = []
+        threads = [threading.Thread(target=lambda: ids.append(get_or_create_experiment('race', tracking_uri)))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        names = [e.name for e in mlflow.MlflowClient(tracking_uri=tracking_uri).search_experiments()]
+
+    assert len(ids) == 8 and len(set(ids)) == 1, f'Racing callers got different experiments: {ids}'
+    assert names.count('race') == 1, f'Experiment created more than once: {names}'
+    print(f"✓ 8 concurrent callers got experiment {ids[0]}")
+
+
+def test_lock_serializes_processes():
+    with tempfile.TemporaryDirectory() as tmp:
+        tracking_uri = f"sqlite:///{os.path.join(tmp, 'mlflow.db')}"
+        log_path = os.path.join(tmp, 'log.txt')
+        processes = [multiprocessing.Process(target=hold_lock, args=(tracking_uri, log_path)) for _ in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        with open(log_path) as f:
+            events = f.read().split()
+
+    assert events == ['enter', 'exit'] * 4, f'Writers overlapped: {events}'
+    print("✓ 4 processes took the tracking lock one at a time")
+
+
+def test_coordinator_trains_in_parallel_and_registers_serially():
+    with tempfile.TemporaryDirectory() as tmp:
+        tracking_uri = f"sqlite:///{os.path.join(tmp, 'mlflow.db')}"
+        mlflow.MlflowClient(tracking_uri=tracking_uri).create_experiment(
+            EXPERIMENT_NAME, artifact_location=os.path.join(tmp, 'artifacts'))
+        files = [write_trips_parquet(os.path.join(tmp, f'trips_{month}.parquet'), 20000, seed=40 + month,
+                                     month=month) for month in (1, 2)]
+        jobs = [{'file_path': path, 'sample_size': 10000} for path in files]
+        jobs.append({'file_path': os.path.join(tmp, 'missing.parquet')})
+
+        results = RunCoordinator(n_workers=2, tracking_uri=tracking_uri).run(jobs)
+        versions = model_versions(MODEL_NAME, tracking_uri)
+        client = mlflow.MlflowClient(tracking_uri=tracking_uri)
+        statuses = [client.get_run(result['run_id']).info.status for result in results[:2]]
+        sources = [client.get_run(result['run_id']).data.tags['job.file_path'] for result in results[:2]]
+        connection = sqlite3.connect(os.path.join(tmp, 'mlflow.db'))
+        journal_mode = connection.execute('PRAGMA journal_mode').fetchone()[0]
+        connection.close()
+
+    assert 'error' in results[2] and all('error' not in result for result in results[:2]), \
+        f'Unexpected job results: {results}'
+    assert len(versions) == 2, f'Expected 2 registered versions, got {len(versions)}'
+    assert statuses == ['FINISHED', 'FINISHED'], f'Runs ended as {statuses}'
+    assert sources == files, 'Runs are not tagged with their jobs'
+    assert journal_mode == 'wal', f'Tracking store is in {journal_mode} mode'
+    print(f"✓ 2 jobs registered as versions {sorted(v.version for v in versions)}, failing job reported")
+
+
+if __name__ == "__main__":
+    test_experiment_creation_is_idempotent()
+    test_lock_serializes_processes()
+    test_coordinator_trains_in_parallel_and_registers_serially()
+    print("\n✓ All coordinator tests passed!")
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Test time-aware cross-validation from per-fold sufficient statistics.
+Uses synthetic trips and a throwaway tracking database; mlflow.db is not touched.
+"""
+
+import os
+import sys
+import tempfile
+sys.path.append('./taxi_training_pipeline')
+
+import mlflow
+import numpy as np
+from sklearn.linear_model import LinearRegression
+
+from transformers.prepare_data import prepare_trips
+from utils.cross_validation import cross_validate, day_folds
+from utils.feature_encoding import ColumnarEncoder
+from utils.synthetic_trips import generate_trips
+
+
+def refit_rmse(train, test):
+    encoder = ColumnarEncoder()
+    X = encoder.fit_transform(train)
+    model = LinearRegression().fit(X.toarray(), train['duration'].values)
+    predictions = model.predict(encoder.transform(test).toarray())
+    return float(np.sqrt(np.mean((test['duration'].values - predictions) ** 2)))
+
+
+def test_folds_match_refitting_from_scratch():
+    trips = prepare_trips(generate_trips(15000, seed=81))
+    folds, days = day_folds(trips, n_folds=4)
+    assert all(first <= last for first, last in days) and \
+        all(days[k][1] < days[k + 1][0] for k in range(3)), 'Folds are not ordered blocks of days'
+
+    blocked = cross_validate(trips, n_folds=4, scheme='blocked', n_workers=2)
+    expanding = cross_validate(trips, n_folds=4, scheme='expanding')
+    for fold in blocked['folds']:
+        test = trips[folds == fold['fold']]
+        expected = refit_rmse(trips[folds != fold['fold']], test)
+        assert np.isclose(fold['rmse'], expected, rtol=1e-6), f"Fold {fold['fold']}: {fold['rmse']} != {expected}"
+    for fold in expanding['folds']:
+        expected = refit_rmse(trips[folds < fold['fold']], trips[folds == fold['fold']])
+        assert np.isclose(fold['rmse'], expected, rtol=1e-6), f"Fold {fold['fold']}: {fold['rmse']} != {expected}"
+
+    assert len(blocked['folds']) == 4 and [f['fold'] for f in expanding['folds']] == [1, 2, 3]
+    print(f"✓ 4 blocked and 3 expanding folds match refits "
+          f"(RMSE {blocked['mean_rmse']:.4f} / {expanding['mean_rmse']:.4f})")
+
+
+def test_block_logs_fold_rmse():
+    from transformers.cross_validate import transform_data as cross_validate_block
+    from utils.registry import EXPERIMENT_NAME
+
+    trips = prepare_trips(generate_trips(10000, seed=82))
+    with tempfile.TemporaryDirectory() as tmp:
+        tracking_uri = f"sqlite:///{os.path.join(tmp, 'mlflow.db')}"
+        client = mlflow.MlflowClient(tracking_uri=tracking_uri)
+        client.create_experiment(EXPERIMENT_NAME, artifact_location=os.path.join(tmp, 'artifacts'))
+
+        results = cross_validate_block(trips, n_folds=3, tracking_uri=tracking_uri)
+        history = client.get_metric_history(results['run_id'], 'fold_rmse')
+        run = client.get_run(results['run_id'])
+
+    assert [m.step for m in history] == [0, 1, 2], f'Unexpected fold steps: {[m.step for m in history]}'
+    assert [m.value for m in history] == [f['rmse'] for f in results['folds']], 'Logged RMSE differs'
+    assert np.isclose(run.data.metrics['cv_mean_rmse'], results['mean_rmse'])
+    print(f"✓ 3 fold RMSEs logged to run {results['run_id']}")
+
+
+if __name__ == "__main__":
+    test_folds_match_refitting_from_scratch()
+    test_block_logs_fold_rmse()
+    print("\n✓ All cross-validation tests passed!")
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Test the concurrent block DAG executor.
+Builds a small throwaway project of sleeping blocks; only the metadata of
+the real project is read.
+"""
+
+import os
+import sys
+import tempfile
+sys.path.append('./taxi_training_pipeline')
+
+from utils.dag import BlockError, DAGExecutor, _check_acyclic, load_pipelines, run_project
+
+
+BLOCK_TEMPLATE = '''
+import time
+
+if '{decorator}' not in globals():
+    from mage_ai.data_preparation.decorators import {decorator}
+if 'test' not in globals():
+    from mage_ai.data_preparation.decorators import test
+
+
+@{decorator}
+def run(*inputs, **kwargs):
+    time.sleep(kwargs.get('delay', 0.3))
+    return {{'name': '{uuid}', 'inputs': list(inputs)}}
+
+
+@test
+def test_output(output, *args) -> None:
+    time.sleep(0.2)
+    assert '{uuid}' not in {failing!r}, 'Test failed on purpose'
+'''
+
+PIPELINES = {
+    'taxi': [('load', 'data_loader', []), ('prepare', 'transformer', ['load']),
+             ('train', 'transformer', ['prepare']), ('register', 'data_exporter', ['train'])],
+    'titanic': [('load_titanic', 'data_loader', []), ('fill', 'transformer', ['load_titanic']),
+                ('export', 'data_exporter', ['fill'])],
+}
+
+
+def make_project(root, failing=()):
+    dirs = {'data_loader': 'data_loaders', 'transformer': 'transformers', 'data_exporter': 'data_exporters'}
+    for pipeline, blocks in PIPELINES.items():
+        os.makedirs(os.path.join(root, 'pipelines', pipeline))
+        lines = ['blocks:']
+        for uuid, block_type, upstream in blocks:
+            os.makedirs(os.path.join(root, dirs[block_type]), exist_ok=True)
+            with open(os.path.join(root, dirs[block_type], f"{uuid}.py"), 'w') as f:
+                f.write(BLOCK_TEMPLATE.format(decorator=block_type, uuid=uuid, failing=list(failing)))
+            lines += [f"- uuid: {uuid}", f"  type: {block_type}", f"  upstream_blocks: {upstream}"]
+        lines += [f"name: {pipeline}", f"uuid: {pipeline}"]
+        with open(os.path.join(root, 'pipelines', pipeline, 'metadata.yaml'), 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+    return root
+
+
+def test_branches_run_concurrently():
+    with tempfile.TemporaryDirectory() as tmp:
+        summary = run_project(make_project(tmp))
+
+    outputs = summary['outputs']
+    assert outputs['register']['inputs'][0] is outputs['train'], 'Output was copied between blocks'
+    assert outputs['export']['inputs'][0]['name'] == 'fill'
+    assert summary['critical_path'] == ['load', 'prepare', 'train', 'register']
+    # 7 blocks of 0.3s plus tests of 0.2s; the taxi chain alone is 1.2s
+    assert summary['sum_seconds'] > 2.0
+    assert summary['wall_seconds'] < summary['critical_path_seconds'] + 0.5, 'Run took longer than its critical path'
+    print(f"✓ {summary['sum_seconds']:.2f}s of blocks in {summary['wall_seconds']:.2f}s "
+          f"(critical path {summary['critical_path_seconds']:.2f}s)")
+
+
+def test_failed_test_fails_run():
+    with tempfile.TemporaryDirectory() as tmp:
+        make_project(tmp, failing=['fill'])
+        executor = DAGExecutor(tmp, load_pipelines(tmp))
+        try:
+            executor.run(only=['export'])
+            raise AssertionError('A failing @test did not fail the run')
+        except BlockError as e:
+            assert e.block == 'fill' and e.stage == 'test'
+    print("✓ A failing @test fails the run")
+
+
+def test_process_mode_and_cycle_detection():
+    with tempfile.TemporaryDirectory() as tmp:
+        make_project(tmp)
+        summary = DAGExecutor(tmp, load_pipelines(tmp, ['titanic']), mode='process').run({'delay': 0.05})
+        assert set(summary['outputs']) == {'load_titanic', 'fill', 'export'}
+
+        blocks = load_pipelines(tmp, ['titanic'])
+        blocks['load_titanic'].upstream.append('export')
+        try:
+            _check_acyclic(blocks)
+            raise AssertionError('Cycle was not detected')
+        except ValueError:
+            pass
+    print("✓ Process mode runs blocks, cycles are rejected")
+
+
+def test_project_metadata_builds_one_graph():
+    blocks = load_pipelines('taxi_training_pipeline')
+    assert blocks['register_model'].upstream == ['train_model']
+    assert blocks['export_titanic_clean'].upstream == ['fill_in_missing_values']
+    for block in blocks.values():
+        assert os.path.exists(block.path('taxi_training_pipeline')), f"Missing block file for {block.uuid}"
+    print(f"✓ Project graph has {len(blocks)} blocks from {len({p for b in blocks.values() for p in b.pipelines})} pipelines")
+
+
+if __name__ == "__main__":
+    test_branches_run_concurrently()
+    test_failed_test_fails_run()
+    test_process_mode_and_cycle_detection()
+    test_project_metadata_builds_one_graph()
+    print("\n✓ All DAG executor tests passed!")
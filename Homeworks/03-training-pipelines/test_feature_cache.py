@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Test the memory-mapped cache of encoded feature matrices.
+Uses synthetic trips in a temporary cache directory.
+"""
+
+import mmap
+import os
+import sys
+import tempfile
+sys.path.append('./taxi_training_pipeline')
+
+import numpy as np
+
+import utils.shared_matrix as shared_matrix
+from transformers.prepare_data import prepare_trips
+from utils.feature_cache import FeatureCache, encode_features
+from utils.feature_encoding import ColumnarEncoder
+from utils.synthetic_trips import generate_trips
+
+
+def is_mapped(array):
+    while array is not None:
+        if isinstance(array, (np.memmap, mmap.mmap)):
+            return True
+        array = getattr(array, 'base', None)
+    return False
+
+
+def test_hit_is_mapped_and_matches_encoding():
+    trips = prepare_trips(generate_trips(20000, seed=91))
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = FeatureCache(tmp)
+        X, y, encoder = encode_features(trips, cache=cache)
+        X_hit, y_hit, cached_encoder = encode_features(trips.reset_index(drop=True), cache=cache)
+        assert len(cache.entries()) == 1, 'Same data was encoded twice'
+
+        assert (X_hit != X).nnz == 0 and np.array_equal(y_hit, y), 'Cached matrix differs'
+        assert cached_encoder.feature_names_ == encoder.feature_names_, 'Cached vocabulary differs'
+        for array in (X_hit.data, X_hit.indices, X_hit.indptr, y_hit):
+            assert is_mapped(array), 'Cache hit copied the arrays'
+        # The restored encoder scores new rows like the fitted one
+        other = prepare_trips(generate_trips(500, seed=92))
+        assert (cached_encoder.transform(other) != encoder.transform(other)).nnz == 0
+
+        # Different rows or encoder config get their own entry
+        encode_features(trips.iloc[:-1], cache=cache)
+        encode_features(trips, categorical_features=['PULocationID'], cache=cache)
+        assert len(cache.entries()) == 3, 'Changed data or config reused an entry'
+    print(f"✓ {X.shape[0]:,} x {X.shape[1]} features mapped back from the cache")
+
+
+def test_eviction_by_size_drops_least_recently_used():
+    frames = [prepare_trips(generate_trips(5000, seed=seed)) for seed in (93, 94, 95)]
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = FeatureCache(tmp)
+        keys = []
+        for frame in frames:
+            encode_features(frame, cache=cache)
+            keys.append(cache.feature_key(frame, ColumnarEncoder()))
+        cache.get(keys[1])
+        os.utime(os.path.join(tmp, keys[0], 'meta.json'), (0, 0))
+        os.utime(os.path.join(tmp, keys[1], 'meta.json'), (1, 1))
+        cache.get(keys[0])
+
+        entry_size = max(meta['size'] for _, meta, _ in cache.entries())
+        evicted = cache.evict(2 * entry_size)
+        assert evicted == [keys[1]], f'Expected only the least recently used entry to go, got {evicted}'
+        assert cache.contains(keys[0]) and cache.contains(keys[2])
+
+        def mapped_entries():
+            return {os.path.relpath(path, tmp).split(os.sep)[0] for path in shared_matrix._opened
+                    if path.startswith(tmp + os.sep)}
+        assert keys[1] not in mapped_entries(), 'Evicted entry is still mapped'
+        assert keys[0] in mapped_entries()
+        cache.clear()
+        assert not mapped_entries(), 'Cleared entries are still mapped'
+    print(f"✓ Evicted 1 of 3 entries ({entry_size / 1e3:.0f} kB each) to fit the size limit")
+
+
+def test_csc_entries_are_mapped_as_csc():
+    trips = prepare_trips(generate_trips(10000, seed=96))
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = FeatureCache(tmp)
+        X_csr, _, _ = encode_features(trips, cache=cache)
+        X, _, _ = encode_features(trips, cache=cache, fmt='csc')
+        X_hit, _, _ = encode_features(trips, cache=cache, fmt='csc')
+        assert len(cache.entries()) == 2, 'CSR and CSC encodings share an entry'
+        assert X.format == X_hit.format == 'csc' and (X_hit != X_csr).nnz == 0
+        assert X_hit.tocsc(copy=False) is X_hit, 'Sweep would copy the cached matrix'
+        assert all(is_mapped(array) for array in (X_hit.data, X_hit.indices, X_hit.indptr))
+    print("✓ CSC encodings are cached and mapped back as CSC")
+
+
+def test_train_model_reuses_cached_features():
+    from transformers.train_model import transform_data as train_model
+
+    trips = prepare_trips(generate_trips(20000, seed=96))
+    with tempfile.TemporaryDirectory() as tmp:
+        first = train_model(trips, sample_size=10000, feature_cache_dir=tmp)
+        second = train_model(trips, sample_size=10000, feature_cache_dir=tmp)
+        n_entries = len(FeatureCache(tmp).entries())
+    plain = train_model(trips, sample_size=10000)
+
+    assert n_entries == 1, 'The second run encoded again'
+    assert np.isclose(first['intercept'], second['intercept']) and np.isclose(first['intercept'], plain['intercept'])
+    assert second['vectorizer'].feature_names_ == plain['vectorizer'].feature_names_
+    print(f"✓ Retraining on cached features gives the same model (intercept {second['intercept']:.4f})")
+
+
+if __name__ == "__main__":
+    test_hit_is_mapped_and_matches_encoding()
+    test_eviction_by_size_drops_least_recently_used()
+    test_csc_entries_are_mapped_as_csc()
+    test_train_model_reuses_cached_features()
+    print("\n✓ All feature cache tests passed!")
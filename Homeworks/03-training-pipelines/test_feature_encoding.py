@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Test that the columnar encoder reproduces DictVectorizer exactly.
+Runs on small in-memory frames, no parquet file needed.
+"""
+
+import sys
+import time
+sys.path.append('./taxi_training_pipeline')
+
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction import DictVectorizer
+
+from utils.feature_encoding import ColumnarEncoder
+
+
+def make_trips(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'PULocationID': rng.integers(1, 266, n_rows).astype(str),
+        'DOLocationID': rng.integers(1, 266, n_rows).astype(str),
+        'trip_distance': np.round(rng.exponential(3.0, n_rows), 2),
+        'duration': rng.uniform(1, 60, n_rows),
+    })
+
+
+def dict_vectorize(df):
+    records = df[['PULocationID', 'DOLocationID', 'trip_distance']].to_dict('records')
+    dv = DictVectorizer(sparse=True)
+    return dv, dv.fit_transform(records)
+
+
+def assert_same_csr(a, b):
+    assert a.shape == b.shape, f'Shape mismatch: {a.shape} vs {b.shape}'
+    assert np.array_equal(a.indptr, b.indptr), 'indptr differs'
+    assert np.array_equal(a.indices, b.indices), 'indices differ'
+    assert np.array_equal(a.data, b.data), 'data differs'
+
+
+def test_fit_transform_matches_dict_vectorizer():
+    df = make_trips(5000)
+    # Zero distances must stay explicit entries, as in DictVectorizer
+    df.loc[df.index[:10], 'trip_distance'] = 0.0
+
+    dv, X_expected = dict_vectorize(df)
+    encoder = ColumnarEncoder()
+    X = encoder.fit_transform(df)
+
+    assert encoder.feature_names_ == list(dv.feature_names_), 'Feature names differ'
+    assert encoder.vocabulary_ == dv.vocabulary_, 'Vocabulary differs'
+    assert_same_csr(X, X_expected)
+    print(f"✓ fit_transform matches DictVectorizer ({X.shape[1]} features)")
+
+
+def test_transform_drops_unseen_categories():
+    train, score = make_trips(2000, seed=1), make_trips(500, seed=2)
+    score.loc[score.index[:5], 'PULocationID'] = '999'
+
+    dv, _ = dict_vectorize(train)
+    encoder = ColumnarEncoder()
+    encoder.fit(train)
+
+    X_expected = dv.transform(score[['PULocationID', 'DOLocationID', 'trip_distance']].to_dict('records'))
+    assert_same_csr(encoder.transform(score), X_expected)
+    print("✓ transform matches DictVectorizer on unseen categories")
+
+
+def test_exported_vectorizer_is_usable():
+    df = make_trips(1000, seed=3)
+    encoder = ColumnarEncoder()
+    X = encoder.fit_transform(df)
+    dv = encoder.to_dict_vectorizer()
+
+    X_dv = dv.transform(df[['PULocationID', 'DOLocationID', 'trip_distance']].to_dict('records'))
+    assert_same_csr(X, X_dv)
+    print("✓ Exported DictVectorizer reproduces the encoder output")
+
+
+def test_categorical_input_matches_string_input():
+    df = make_trips(3000, seed=4)
+    lean = df.copy()
+    for col in ['PULocationID', 'DOLocationID']:
+        lean[col] = lean[col].astype(int).astype('category')
+
+    assert_same_csr(ColumnarEncoder().fit_transform(lean), ColumnarEncoder().fit_transform(df))
+    print("✓ Integer categorical IDs encode like their string form")
+
+
+def test_large_frame_speed():
+    df = make_trips(3_000_000, seed=5)
+    start = time.perf_counter()
+    X = ColumnarEncoder().fit_transform(df)
+    elapsed = time.perf_counter() - start
+    print(f"✓ Encoded {X.shape[0]:,} rows in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    test_fit_transform_matches_dict_vectorizer()
+    test_transform_drops_unseen_categories()
+    test_exported_vectorizer_is_usable()
+    test_categorical_input_matches_string_input()
+    test_large_frame_speed()
+    print("\n✓ All encoder tests passed!")
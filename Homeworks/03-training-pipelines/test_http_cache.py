@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Test the HTTP cache behind load_titanic.
+Serves a CSV from a local stand-in server, no internet needed.
+"""
+
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+sys.path.append('./taxi_training_pipeline')
+
+import pandas as pd
+
+from utils.http_cache import HTTPCache
+
+
+class CSVServer:
+    """
+    Local server for one CSV body with an ETag, counting full and 304 responses.
+    """
+
+    def __init__(self, body, delay=0.0):
+        self.body = body
+        self.delay = delay
+        self.full = 0
+        self.not_modified = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                etag = f'"{hash(server.body) & 0xffffffff:x}"'
+                time.sleep(server.delay)
+                if self.headers.get('If-None-Match') == etag:
+                    server.not_modified += 1
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    return
+                server.full += 1
+                self.send_response(200)
+                self.send_header('ETag', etag)
+                self.send_header('Content-Length', str(len(server.body)))
+                self.end_headers()
+                self.wfile.write(server.body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/titanic.csv"
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+CSV_V1 = b"PassengerId,Survived,Pclass,Age\n1,0,3,22\n2,1,1,38\n3,1,3,\n"
+CSV_V2 = CSV_V1 + b"4,1,1,35\n"
+
+
+def test_revalidation_and_change():
+    with CSVServer(CSV_V1) as server, tempfile.TemporaryDirectory() as tmp:
+        cache = HTTPCache(tmp)
+        first, status = cache.fetch(server.url)
+        assert status == 'downloaded' and len(first) == 3
+        second, status = cache.fetch(server.url)
+        assert status == 'not_modified' and server.full == 1 and server.not_modified == 1
+        pd.testing.assert_frame_equal(first, second)
+
+        server.body = CSV_V2
+        third, status = cache.fetch(server.url)
+        assert status == 'downloaded' and len(third) == 4
+    print("✓ Unchanged file revalidated with a 304, changed file downloaded again")
+
+
+def test_ttl_offline_and_unreachable_server():
+    with tempfile.TemporaryDirectory() as tmp:
+        with CSVServer(CSV_V1) as server:
+            url = server.url
+            HTTPCache(tmp).fetch(url)
+            _, status = HTTPCache(tmp, ttl=3600).fetch(url)
+            assert status == 'fresh' and server.full + server.not_modified == 1
+
+        # The server is gone: offline mode and revalidation both serve the cache
+        df, status = HTTPCache(tmp, offline=True).fetch(url)
+        assert status == 'offline' and len(df) == 3
+        _, status = HTTPCache(tmp, timeout=2).fetch(url)
+        assert status == 'stale'
+        try:
+            HTTPCache(tmp, offline=True).fetch(url + '?other')
+            raise AssertionError('Offline fetch of an uncached URL succeeded')
+        except FileNotFoundError:
+            pass
+    print("✓ TTL and offline mode skip the network")
+
+
+def test_concurrent_fetches_download_once():
+    with CSVServer(CSV_V1, delay=0.3) as server, tempfile.TemporaryDirectory() as tmp:
+        cache = HTTPCache(tmp)
+        with ThreadPoolExecutor(8) as pool:
+            results = list(pool.map(lambda _: cache.fetch(server.url), range(8)))
+        assert server.full + server.not_modified == 1, 'Concurrent fetches hit the server more than once'
+        assert sorted(status for _, status in results) == ['downloaded'] + ['fresh'] * 7
+    print("✓ 8 concurrent fetches made a single request")
+
+
+def test_load_titanic_uses_cache():
+    from data_loaders.load_titanic import load_data_from_api
+
+    with CSVServer(CSV_V1) as server, tempfile.TemporaryDirectory() as tmp:
+        df = load_data_from_api(url=server.url, http_cache_dir=tmp)
+        again = load_data_from_api(url=server.url, http_cache_dir=tmp, cache_ttl=60)
+        assert server.full == 1 and server.not_modified == 0
+        pd.testing.assert_frame_equal(df, again)
+    print("✓ load_titanic reads through the cache")
+
+
+if __name__ == "__main__":
+    test_revalidation_and_change()
+    test_ttl_offline_and_unreachable_server()
+    test_concurrent_fetches_download_once()
+    test_load_titanic_uses_cache()
+    print("\n✓ All HTTP cache tests passed!")
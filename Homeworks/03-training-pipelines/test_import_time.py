@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Test that blocks and scripts start without importing heavy packages they do not need.
+Every check imports in a fresh interpreter (utils/import_report.py).
+"""
+
+import os
+import sys
+sys.path.append('./taxi_training_pipeline')
+
+from utils.import_report import import_times
+
+
+# Block module -> packages it must not pull in at import time
+BLOCK_FORBIDDEN = {
+    'data_loaders.load_taxi_data': ('mage_ai', 'mlflow', 'sklearn'),
+    'data_loaders.load_titanic': ('mage_ai', 'mlflow', 'sklearn'),
+    'transformers.prepare_data': ('mage_ai', 'mlflow', 'sklearn'),
+    'transformers.train_model': ('mage_ai', 'mlflow', 'sklearn'),
+    'transformers.fill_in_missing_values': ('mage_ai', 'mlflow', 'sklearn'),
+    'transformers.sweep_models': ('mage_ai', 'mlflow'),
+    'data_exporters.export_titanic_clean': ('mage_ai', 'mlflow', 'sklearn'),
+    'data_exporters.register_model': ('mage_ai',),
+}
+
+
+def test_blocks_skip_mage_and_unused_heavy_packages():
+    for module, forbidden in BLOCK_FORBIDDEN.items():
+        total, packages = import_times(module)
+        loaded = [name for name in forbidden if name in packages]
+        assert not loaded, f"{module} imports {', '.join(loaded)}"
+        print(f"✓ {module:<40} {total:.3f}s")
+
+
+def test_pipeline_script_imports_nothing_heavy():
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    total, packages = import_times('run_complete_pipeline', project_dir=script_dir)
+    heavy = [name for name in ('pandas', 'numpy', 'requests', 'mlflow', 'sklearn') if name in packages]
+    assert not heavy, f"run_complete_pipeline imports {', '.join(heavy)} before doing any work"
+    print(f"✓ run_complete_pipeline imports in {total:.3f}s")
+
+
+if __name__ == "__main__":
+    test_blocks_skip_mage_and_unused_heavy_packages()
+    test_pipeline_script_imports_nothing_heavy()
+    print("\n✓ All import time tests passed!")
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Test the fitted median imputer behind fill_in_missing_values.
+Uses a synthetic Titanic-like frame, no download needed.
+"""
+
+import math
+import os
+import sys
+import tempfile
+sys.path.append('./taxi_training_pipeline')
+
+import numpy as np
+import pandas as pd
+
+from utils.imputation import MedianImputer, QuantileSketch
+
+
+def make_passengers(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    pclass = rng.choice([1, 2, 3], n_rows, p=[0.25, 0.2, 0.55])
+    df = pd.DataFrame({
+        'Age': rng.normal(45 - 7 * pclass, 12).round(),
+        'Fare': rng.lognormal(5 - pclass, 0.8).round(2),
+        'Parch': rng.integers(0, 4, n_rows),
+        'Pclass': pclass,
+        'SibSp': rng.integers(0, 3, n_rows),
+        'Survived': rng.integers(0, 2, n_rows),
+    })
+    df.loc[rng.random(n_rows) < 0.2, 'Age'] = np.nan
+    df.loc[rng.random(n_rows) < 0.01, 'Fare'] = np.nan
+    return df
+
+
+def reference_upper_median(df):
+    # The original list-and-sort implementation
+    out = df.copy()
+    for col in out.columns:
+        values = sorted(out[col].dropna().tolist())
+        out[[col]] = out[[col]].fillna(values[math.floor(len(values) / 2)])
+    return out
+
+
+def test_upper_median_matches_original():
+    from transformers.fill_in_missing_values import fill_missing_values_with_median
+
+    for n_rows in (891, 892):
+        df = make_passengers(n_rows, seed=n_rows)
+        filled = fill_missing_values_with_median(df.copy())
+        pd.testing.assert_frame_equal(filled, reference_upper_median(df), check_dtype=False)
+        assert df['Age'].isna().any(), 'Input was modified in place'
+
+    midpoint = MedianImputer(method='midpoint').fit(df)
+    assert midpoint.medians_['Age'] == df['Age'].median()
+    print("✓ Upper medians match the original implementation")
+
+
+def test_grouped_medians_and_fallback():
+    df = make_passengers(2000, seed=1)
+    imputer = MedianImputer(group_by='Pclass').fit(df)
+    filled = imputer.transform(df)
+    assert not filled.isna().any().any()
+    for pclass, rows in df.groupby('Pclass'):
+        expected = rows['Age'].quantile(0.5, interpolation='higher')
+        was_missing = rows['Age'].isna()
+        assert (filled.loc[was_missing[was_missing].index, 'Age'] == expected).all()
+    assert imputer.group_medians_[1]['Age'] > imputer.group_medians_[3]['Age']
+
+    unseen = pd.DataFrame({col: [np.nan] for col in df.columns}).assign(Pclass=4)
+    assert imputer.transform(unseen)['Age'].iloc[0] == imputer.medians_['Age']
+    print(f"✓ Per-class medians: {[imputer.group_medians_[c]['Age'] for c in (1, 2, 3)]}")
+
+
+def test_save_and_reuse_at_scoring_time():
+    from transformers.fill_in_missing_values import transform_df
+
+    train, score = make_passengers(1000, seed=2), make_passengers(300, seed=3)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'medians.json')
+        transform_df(train, imputer_path=path, group_by='Pclass')
+        fitted = MedianImputer(group_by='Pclass').fit(train)
+        loaded = MedianImputer.load(path)
+        scored = transform_df(score, imputer_path=path)
+
+    assert loaded.medians_ == fitted.medians_ and loaded.group_medians_ == fitted.group_medians_
+    pd.testing.assert_frame_equal(scored, fitted.transform(score))
+    print("✓ Scoring reuses the saved training medians")
+
+
+def test_approximate_medians_from_chunks():
+    df = make_passengers(50000, seed=4)
+    exact = MedianImputer(group_by='Pclass').fit(df)
+    chunks = (df.iloc[start:start + 7000] for start in range(0, len(df), 7000))
+    approx = MedianImputer(group_by='Pclass', approximate=True, relative_accuracy=0.01).fit(chunks)
+
+    for col, value in exact.medians_.items():
+        assert abs(approx.medians_[col] - value) <= 0.01 * abs(value) + 1e-12, col
+    for pclass, medians in exact.group_medians_.items():
+        assert abs(approx.group_medians_[pclass]['Fare'] - medians['Fare']) <= 0.01 * medians['Fare']
+
+    # Medians are read from the sketches on first use after partial_fit
+    streamed = MedianImputer(group_by='Pclass', approximate=True, relative_accuracy=0.01)
+    for start in range(0, len(df), 7000):
+        streamed.partial_fit(df.iloc[start:start + 7000])
+    assert streamed.medians_ is None
+    assert streamed.transform(df).equals(approx.transform(df)) and streamed.medians_ == approx.medians_
+
+    # Bucket count depends on the value range, not on the number of rows
+    sketch = QuantileSketch(0.01).update(np.random.default_rng(5).lognormal(3, 1, 200000))
+    assert len(sketch.positive) < 1000 and sketch.count == 200000
+    merged = QuantileSketch(0.01).update(df['Fare'][:100]).merge(QuantileSketch(0.01).update(df['Fare'][100:]))
+    assert merged.median() == QuantileSketch(0.01).update(df['Fare']).median()
+    print(f"✓ Approximate Fare median {approx.medians_['Fare']:.2f} vs exact {exact.medians_['Fare']:.2f}")
+
+
+if __name__ == "__main__":
+    test_upper_median_matches_original()
+    test_grouped_medians_and_fallback()
+    test_save_and_reuse_at_scoring_time()
+    test_approximate_medians_from_chunks()
+    print("\n✓ All imputation tests passed!")
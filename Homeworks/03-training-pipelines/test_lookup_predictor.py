@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Test that the lookup-table predictor reproduces model.predict(dv.transform(...)).
+Runs on synthetic trips, no parquet file or MLflow database needed.
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+sys.path.append('./taxi_training_pipeline')
+
+import numpy as np
+import pandas as pd
+
+from transformers.prepare_data import prepare_trips
+from transformers.train_model import train_on_sample
+from utils.lookup_predictor import LookupPredictor
+from utils.synthetic_trips import generate_trips
+
+
+def fit_model():
+    lr, dv, _ = train_on_sample(prepare_trips(generate_trips(20000, seed=11)), sample_size=20000)
+    return lr, dv
+
+
+def test_predictions_are_identical():
+    lr, dv = fit_model()
+    predictor = LookupPredictor.from_model(lr, dv)
+
+    # Different seed, so the trips include IDs missing from the vocabulary
+    trips = prepare_trips(generate_trips(50000, seed=12))
+    expected = lr.predict(dv.transform(trips[['PULocationID', 'DOLocationID', 'trip_distance']].to_dict('records')))
+
+    assert np.array_equal(predictor.predict(trips), expected), 'String IDs: predictions differ'
+    as_ints = {
+        'PULocationID': trips['PULocationID'].astype(int).to_numpy(),
+        'DOLocationID': trips['DOLocationID'].astype(int).to_numpy(),
+        'trip_distance': trips['trip_distance'].to_numpy(),
+    }
+    assert np.array_equal(predictor.predict(as_ints), expected), 'Integer IDs: predictions differ'
+    print(f"✓ {len(trips):,} lookup predictions identical to model.predict")
+
+
+def test_unseen_ids_contribute_nothing():
+    lr, dv = fit_model()
+    predictor = LookupPredictor.from_model(lr, dv)
+
+    trips = pd.DataFrame({
+        'PULocationID': ['9999', '-3', None, 'abc'],
+        'DOLocationID': [10**9, -1, 5000, 7000],
+        'trip_distance': [1.0, 2.0, 3.0, 4.0],
+    })
+    expected = lr.predict(dv.transform(trips.astype({'PULocationID': str, 'DOLocationID': str}).to_dict('records')))
+    assert np.array_equal(predictor.predict(trips), expected), 'Unseen IDs are not dropped'
+    print("✓ Unseen, missing and invalid IDs get zero weight")
+
+
+def test_saved_table_loads_without_sklearn():
+    lr, dv = fit_model()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = LookupPredictor.from_model(lr, dv).save(os.path.join(tmp, 'lookup_table.npz'))
+        script = (
+            "import sys, time; sys.path.append('./taxi_training_pipeline')\n"
+            "start = time.perf_counter()\n"
+            "from utils.lookup_predictor import LookupPredictor\n"
+            f"p = LookupPredictor.load({path!r})\n"
+            "print(p.predict({'PULocationID': [161], 'DOLocationID': [236], 'trip_distance': [2.5]})[0])\n"
+            "print((time.perf_counter() - start) * 1000)\n"
+            "assert 'sklearn' not in sys.modules and 'pandas' not in sys.modules\n"
+        )
+        result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True)
+
+    assert result.returncode == 0, result.stderr
+    prediction, load_ms = (float(line) for line in result.stdout.split())
+    expected = lr.predict(dv.transform([{'PULocationID': '161', 'DOLocationID': '236', 'trip_distance': 2.5}]))[0]
+    assert prediction == expected, f'{prediction} != {expected}'
+    print(f"✓ Saved table loads without sklearn or pandas in {load_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    test_predictions_are_identical()
+    test_unseen_ids_contribute_nothing()
+    test_saved_table_loads_without_sklearn()
+    print("\n✓ All lookup predictor tests passed!")
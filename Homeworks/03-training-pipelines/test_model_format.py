@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Test the compact, memory-mappable .txm model format.
+Runs on synthetic trips, no parquet file or MLflow database needed.
+"""
+
+import os
+import struct
+import sys
+import tempfile
+sys.path.append('./taxi_training_pipeline')
+
+import numpy as np
+import pandas as pd
+
+from transformers.prepare_data import prepare_trips
+from transformers.train_model import train_on_sample
+from utils.batch_scoring import PREDICTION_COLUMN, score_parquet
+from utils.model_format import FORMAT_VERSION, load_compact_model, write_compact_model
+from utils.synthetic_trips import generate_trips, write_trips_parquet
+
+
+def fit_model():
+    lr, dv, _ = train_on_sample(prepare_trips(generate_trips(20000, seed=21)), sample_size=20000)
+    return lr, dv
+
+
+def test_roundtrip_is_exact_and_zero_copy():
+    lr, dv = fit_model()
+    trips = prepare_trips(generate_trips(30000, seed=22))
+    records = trips[['PULocationID', 'DOLocationID', 'trip_distance']].to_dict('records')
+    expected = lr.predict(dv.transform(records))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'model.txm')
+        size = write_compact_model(path, lr, dv)
+        assert size == os.path.getsize(path), 'Reported size differs from the file size'
+
+        compact = load_compact_model(path)
+        assert not compact.coef.flags.owndata and not compact.coef.flags.writeable, 'Arrays were copied'
+        assert np.array_equal(compact.coef, lr.coef_), 'Coefficients differ'
+        assert compact.intercept == lr.intercept_, 'Intercept differs'
+        assert compact.feature_names == dv.feature_names_, 'Vocabulary differs'
+        assert np.array_equal(compact.predict(trips), expected), 'Lookup predictions differ'
+
+        model, vectorizer = compact.to_sklearn()
+        assert np.array_equal(model.predict(vectorizer.transform(records)), expected), \
+            'Rebuilt sklearn model differs'
+        del compact, model
+
+    print(f"✓ {size:,}-byte .txm file reproduces model.predict exactly")
+
+
+def test_newer_format_version_is_rejected():
+    lr, dv = fit_model()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'model.txm')
+        write_compact_model(path, lr, dv)
+        with open(path, 'r+b') as f:
+            f.seek(8)
+            f.write(struct.pack('<I', FORMAT_VERSION + 1))
+        try:
+            load_compact_model(path, use_mmap=False)
+        except ValueError as e:
+            print(f"✓ Newer format rejected: {e}")
+        else:
+            raise AssertionError('A newer format version was accepted')
+
+
+def test_workers_score_from_mapped_file():
+    lr, dv = fit_model()
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = os.path.join(tmp, 'model.txm')
+        write_compact_model(model_path, lr, dv)
+        trips_path = write_trips_parquet(os.path.join(tmp, 'trips.parquet'), 40000, seed=23,
+                                         row_group_size=8000)
+
+        pickled = score_parquet(trips_path, os.path.join(tmp, 'a.parquet'), lr, dv, n_workers=2)
+        mapped = score_parquet(trips_path, os.path.join(tmp, 'b.parquet'), model_path=model_path, n_workers=2)
+        a = pd.read_parquet(pickled['output_path'])[PREDICTION_COLUMN].to_numpy()
+        b = pd.read_parquet(mapped['output_path'])[PREDICTION_COLUMN].to_numpy()
+
+    assert np.array_equal(a, b), 'Memory-mapped scoring differs from the pickled model'
+    print(f"✓ {mapped['rows']:,} trips scored by {mapped['workers']} workers from the mapped model")
+
+
+if __name__ == "__main__":
+    test_roundtrip_is_exact_and_zero_copy()
+    test_newer_format_version_is_rejected()
+    test_workers_score_from_mapped_file()
+    print("\n✓ All model format tests passed!")
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Test the atomic parquet exporter behind export_titanic_clean.
+Writes to temporary directories only.
+"""
+
+import os
+import sys
+import tempfile
+sys.path.append('./taxi_training_pipeline')
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from utils.parquet_export import export_parquet
+
+
+def make_clean_passengers(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Age': rng.normal(30, 12, n_rows).round(),
+        'Fare': rng.lognormal(3, 1, n_rows).round(2),
+        'Parch': rng.integers(0, 4, n_rows),
+        'Pclass': rng.choice([1, 2, 3], n_rows),
+        'SibSp': rng.integers(0, 3, n_rows),
+        'Survived': rng.integers(0, 2, n_rows),
+    })
+
+
+def test_chunked_export_roundtrip_with_schema():
+    from data_exporters.export_titanic_clean import TITANIC_CLEAN_SCHEMA
+
+    df = make_clean_passengers(10000, seed=1)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'titanic_clean.parquet')
+        summary = export_parquet(df, path, schema=TITANIC_CLEAN_SCHEMA, chunk_rows=3000)
+        parquet_file = pq.ParquetFile(path)
+        assert parquet_file.metadata.num_row_groups == 4, 'Frame was not written in chunks'
+        assert parquet_file.schema_arrow.equals(TITANIC_CLEAN_SCHEMA)
+        assert parquet_file.metadata.row_group(0).column(0).compression == 'ZSTD'
+        pd.testing.assert_frame_equal(pd.read_parquet(path), df)
+        assert summary['rows'] == len(df) and os.listdir(tmp) == ['titanic_clean.parquet']
+    print(f"✓ {summary['rows']:,} rows in 4 row groups, {summary['bytes']:,} bytes")
+
+
+def test_partitioned_export_replaces_previous():
+    df = make_clean_passengers(5000, seed=2)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'by_class')
+        export_parquet(df.iloc[:100], path, partition_by='Pclass')
+        summary = export_parquet(df, path, partition_by='Pclass', chunk_rows=1500)
+        assert sorted(os.listdir(path)) == ['Pclass=1', 'Pclass=2', 'Pclass=3']
+        assert summary['files'] == 3 and sorted(os.listdir(tmp)) == ['by_class']
+
+        back = pd.read_parquet(path)
+        back['Pclass'] = back['Pclass'].astype('int64')
+        back = back.sort_values(list(df.columns)).reset_index(drop=True)[df.columns]
+        expected = df.sort_values(list(df.columns)).reset_index(drop=True)
+        pd.testing.assert_frame_equal(back, expected)
+    print("✓ Partitioned export replaced the previous one")
+
+
+def test_export_switches_between_file_and_directory():
+    df = make_clean_passengers(2000, seed=5)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'titanic_clean.parquet')
+        export_parquet(df, path)
+        export_parquet(df, path, partition_by='Pclass')
+        assert os.path.isdir(path) and sorted(os.listdir(tmp)) == ['titanic_clean.parquet']
+        assert len(pd.read_parquet(path)) == len(df)
+
+        export_parquet(df, path)
+        assert os.path.isfile(path) and sorted(os.listdir(tmp)) == ['titanic_clean.parquet']
+        pd.testing.assert_frame_equal(pd.read_parquet(path), df)
+    print("✓ A file export replaces a partitioned one and the other way round")
+
+
+def test_failed_export_keeps_previous_file():
+    df = make_clean_passengers(1000, seed=3)
+    schema = pa.schema([('Age', pa.float64()), ('Fare', pa.float64()), ('Parch', pa.int64()),
+                        ('Pclass', pa.int64()), ('SibSp', pa.int64()), ('Survived', pa.int64())])
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'titanic_clean.parquet')
+        export_parquet(df, path, schema=schema)
+
+        def chunks():
+            yield df.iloc[:500]
+            yield df.iloc[500:].assign(Parch='not a number')
+        try:
+            export_parquet(chunks(), path, schema=schema)
+            raise AssertionError('Export of a chunk that does not match the schema succeeded')
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            pass
+        assert os.listdir(tmp) == ['titanic_clean.parquet'], 'Temporary file left behind'
+        pd.testing.assert_frame_equal(pd.read_parquet(path), df)
+    print("✓ A failed export leaves the previous file untouched")
+
+
+def test_export_block_writes_parquet():
+    from data_exporters.export_titanic_clean import export_data_to_file
+
+    df = make_clean_passengers(800, seed=4)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'titanic_clean.parquet')
+        export_data_to_file(df, filepath=path)
+        pd.testing.assert_frame_equal(pd.read_parquet(path), df)
+    print("✓ export_titanic_clean writes parquet")
+
+
+if __name__ == "__main__":
+    test_chunked_export_roundtrip_with_schema()
+    test_partitioned_export_replaces_previous()
+    test_export_switches_between_file_and_directory()
+    test_failed_export_keeps_previous_file()
+    test_export_block_writes_parquet()
+    print("\n✓ All parquet export tests passed!")
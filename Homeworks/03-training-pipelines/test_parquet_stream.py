@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Test that streaming a parquet file with ParquetChunks keeps the same trips
+as reading it whole and running prepare_trips.
+Writes to temporary directories only.
+"""
+
+import os
+import sys
+import tempfile
+sys.path.append('./taxi_training_pipeline')
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from transformers.prepare_data import prepare_trips
+from utils.parquet_stream import TRIP_COLUMNS, ParquetChunks
+
+
+def make_trips(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    pickup = (np.datetime64('2023-03-01T00:00:00', 'ns')
+              + rng.integers(0, 31 * 86400 * 10 ** 9, n_rows).astype('timedelta64[ns]'))
+    # Nanosecond durations around and between the 1 and 60 minute bounds
+    nanos = rng.integers(-60, 2 * 3600, n_rows) * 10 ** 9 + rng.integers(0, 10 ** 9, n_rows)
+    edges = np.array([60, 3600], dtype=np.int64) * 10 ** 9
+    nanos[:8] = np.concatenate([edges - 1, edges, edges + 1, edges + 500])
+    return pd.DataFrame({
+        'tpep_pickup_datetime': pickup,
+        'tpep_dropoff_datetime': pickup + nanos.astype('timedelta64[ns]'),
+        'trip_distance': np.round(rng.uniform(0.1, 20, n_rows), 2),
+        'PULocationID': rng.integers(1, 266, n_rows),
+        'DOLocationID': rng.integers(1, 266, n_rows),
+    })
+
+
+def test_streamed_trips_match_prepare_trips():
+    trips = make_trips(20000, seed=41)
+    with tempfile.TemporaryDirectory() as tmp:
+        for unit in ['ns', 'us']:
+            path = os.path.join(tmp, f"trips_{unit}.parquet")
+            table = pa.Table.from_pandas(trips.astype({
+                'tpep_pickup_datetime': f"datetime64[{unit}]",
+                'tpep_dropoff_datetime': f"datetime64[{unit}]",
+            }), preserve_index=False)
+            pq.write_table(table, path, row_group_size=6000, version='2.6')
+            assert pq.read_schema(path).field('tpep_pickup_datetime').type.unit == unit
+
+            df = pd.read_parquet(path)
+            expected = df.loc[prepare_trips(df).index, TRIP_COLUMNS].reset_index(drop=True)
+            chunks = ParquetChunks(path, chunk_rows=2500, duration_range=(1, 60))
+            streamed = pd.concat(list(chunks), ignore_index=True)
+
+            pd.testing.assert_frame_equal(streamed, expected)
+            print(f"✓ {len(streamed):,} of {len(trips):,} {unit} trips kept by both")
+
+
+if __name__ == "__main__":
+    test_streamed_trips_match_prepare_trips()
+    print("\n✓ All parquet stream tests passed!")
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Test the micro-batching prediction server against an in-memory model.
+Starts the server on a free local port; no MLflow database needed.
+"""
+
+import asyncio
+import json
+import sys
+sys.path.append('./taxi_training_pipeline')
+
+import numpy as np
+
+from prediction_server import MicroBatcher, PredictionServer, TripPredictor, parse_trips
+from transformers.prepare_data import prepare_trips
+from transformers.train_model import train_on_sample
+from utils.synthetic_trips import generate_trips
+
+
+async def request(port, method, path, payload=None):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    body = json.dumps(payload).encode() if payload is not None else b''
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b'\r\n\r\n')
+    return int(head.split()[1]), json.loads(body)
+
+
+async def run_server_checks(predictor, trips):
+    batcher = MicroBatcher(predictor.predict, max_batch_size=32, max_wait_ms=20)
+    server = await PredictionServer(batcher, port=0).start()
+    try:
+        responses = await asyncio.gather(*[
+            request(server.port, 'POST', '/predict', trip) for trip in trips
+        ])
+        bad_status, _ = await request(server.port, 'POST', '/predict', {'PULocationID': 1})
+        _, metrics = await request(server.port, 'GET', '/metrics')
+    finally:
+        await server.stop()
+    return responses, bad_status, metrics
+
+
+def test_concurrent_requests_are_batched():
+    lr, dv, _ = train_on_sample(prepare_trips(generate_trips(20000, seed=5)), sample_size=20000)
+    predictor = TripPredictor(lr, dv)
+
+    trips = [
+        {'PULocationID': int(pu), 'DOLocationID': str(do), 'trip_distance': float(d)}
+        for pu, do, d in zip(range(1, 101), range(100, 0, -1), np.linspace(0.5, 20, 100))
+    ]
+    expected = lr.predict(dv.transform([
+        {'PULocationID': str(t['PULocationID']), 'DOLocationID': t['DOLocationID'],
+         'trip_distance': t['trip_distance']} for t in trips
+    ]))
+
+    responses, bad_status, metrics = asyncio.run(run_server_checks(predictor, trips))
+
+    assert all(status == 200 for status, _ in responses), 'A prediction request failed'
+    predictions = [body['predictions'][0] for _, body in responses]
+    assert np.allclose(predictions, expected), 'Served predictions differ from model.predict'
+    assert bad_status == 400, f'Missing fields should be a 400, got {bad_status}'
+    assert metrics['requests'] == len(trips), f"Unexpected request count {metrics['requests']}"
+    assert metrics['batches'] < len(trips), 'Concurrent requests were not batched'
+    assert metrics['latency_p99_ms'] >= metrics['latency_p50_ms'] > 0, 'Latency percentiles missing'
+    print(f"✓ {len(trips)} concurrent requests served in {metrics['batches']} batches "
+          f"(p50 {metrics['latency_p50_ms']:.1f} ms, p99 {metrics['latency_p99_ms']:.1f} ms)")
+
+
+async def run_mixed_batch(predictor, payloads):
+    # A long wait puts every request in one batch
+    batcher = MicroBatcher(predictor.predict, max_batch_size=64, max_wait_ms=200)
+    server = await PredictionServer(batcher, port=0).start()
+    try:
+        return await asyncio.gather(*[request(server.port, 'POST', '/predict', p) for p in payloads])
+    finally:
+        await server.stop()
+
+
+def test_bad_request_fails_alone():
+    for bad in ({'PULocationID': [1], 'DOLocationID': 2, 'trip_distance': 1.0},
+                {'PULocationID': 1.5, 'DOLocationID': 2, 'trip_distance': 1.0},
+                {'PULocationID': 1, 'DOLocationID': 2, 'trip_distance': float('nan')},
+                {'PULocationID': 1, 'DOLocationID': 2, 'trip_distance': 'inf'}):
+        try:
+            parse_trips(json.dumps(bad))
+            raise AssertionError(f'{bad} was accepted')
+        except ValueError:
+            pass
+
+    lr, dv, _ = train_on_sample(prepare_trips(generate_trips(5000, seed=6)), sample_size=5000)
+    predictor = TripPredictor(lr, dv)
+    good = {'PULocationID': 1, 'DOLocationID': 2, 'trip_distance': 1.0}
+    responses = asyncio.run(run_mixed_batch(predictor, [good, {**good, 'PULocationID': [1]}, good]))
+    assert [status for status, _ in responses] == [200, 400, 200], responses
+
+    # A request the parser lets through but predict rejects only fails itself
+    def flaky_predict(trips):
+        if any(trip['trip_distance'] > 100 for trip in trips):
+            raise ValueError('distance out of range')
+        return predictor.predict(trips)
+    responses = asyncio.run(run_mixed_batch(
+        type('Predictor', (), {'predict': staticmethod(flaky_predict)}),
+        [good, {**good, 'trip_distance': 500}, good]))
+    assert [status for status, _ in responses] == [200, 400, 200], responses
+    print("✓ Invalid requests get a 400 without failing their batch")
+
+
+if __name__ == "__main__":
+    test_concurrent_requests_are_batched()
+    test_bad_request_fails_alone()
+    print("\n✓ All prediction server tests passed!")
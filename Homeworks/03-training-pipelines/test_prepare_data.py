@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Test that the memory-lean prepare_trips_lean matches prepare_trips.
+Runs on synthetic frames, no parquet file needed.
+"""
+
+import sys
+sys.path.append('./taxi_training_pipeline')
+
+import numpy as np
+import pandas as pd
+
+from transformers.prepare_data import prepare_trips, prepare_trips_lean
+from transformers.train_model import train_on_sample
+
+
+def make_raw_trips(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    pickup = np.datetime64('2023-03-01T00:00:00', 's') + rng.integers(0, 31 * 86400, n_rows).astype('timedelta64[s]')
+    # Mostly 1-60 minute trips, plus zero, negative and multi-hour outliers
+    seconds = np.exp(rng.normal(np.log(660), 0.7, n_rows))
+    short = rng.random(n_rows) < 0.02
+    seconds[short] = rng.uniform(-120, 59, short.sum())
+    seconds[rng.random(n_rows) < 0.01] = 5 * 3600
+    pu = rng.integers(1, 120, n_rows)
+    do = rng.integers(1, 120, n_rows)
+    return pd.DataFrame({
+        'VendorID': rng.integers(1, 3, n_rows),
+        'tpep_pickup_datetime': pickup.astype('datetime64[us]'),
+        'tpep_dropoff_datetime': (pickup + seconds.astype('int64').astype('timedelta64[s]')).astype('datetime64[us]'),
+        'trip_distance': np.round(np.clip(seconds, 0, None) / 3600 * rng.uniform(5, 20, n_rows), 2),
+        'PULocationID': pu,
+        'DOLocationID': do,
+        'fare_amount': np.round(rng.uniform(3, 60, n_rows), 2),
+    })
+
+
+def test_lean_keeps_the_same_trips():
+    trips = make_raw_trips(50000, seed=61)
+    full = prepare_trips(trips)
+    lean = prepare_trips_lean(trips)
+
+    assert len(lean) == len(full), f'{len(lean):,} lean rows, {len(full):,} rows'
+    assert lean.index.equals(full.index), 'Different trips were kept'
+    assert np.allclose(lean['duration'], full['duration'], rtol=1e-6), 'Durations differ'
+    assert (lean['PULocationID'].astype(str).to_numpy() == full['PULocationID'].to_numpy()).all()
+    assert lean.memory_usage(deep=True).sum() < full.memory_usage(deep=True).sum(), 'Lean frame is not smaller'
+    print(f"✓ {len(lean):,} of {len(trips):,} trips kept by both, same durations")
+
+
+def test_lean_trains_the_same_model():
+    trips = make_raw_trips(30000, seed=62)
+    lr, dv, _ = train_on_sample(prepare_trips(trips), sample_size=len(trips))
+    lean_lr, lean_dv, _ = train_on_sample(prepare_trips_lean(trips), sample_size=len(trips))
+
+    assert sorted(lean_dv.feature_names_) == sorted(dv.feature_names_), 'Different features'
+    # Compare predictions, not weights: the one-hot columns are collinear and
+    # ordered differently, so equivalent fits can split weight differently
+    records = prepare_trips(make_raw_trips(5000, seed=63))[['PULocationID', 'DOLocationID', 'trip_distance']]
+    records = records.to_dict('records')
+    predictions = lr.predict(dv.transform(records))
+    lean_predictions = lean_lr.predict(lean_dv.transform(records))
+    # float32 distance and duration in the lean frame
+    assert np.allclose(lean_predictions, predictions, atol=1e-3), 'Models predict differently'
+    print("✓ Same predictions from models trained on either frame")
+
+
+if __name__ == "__main__":
+    test_lean_keeps_the_same_trips()
+    test_lean_trains_the_same_model()
+    print("\n✓ All prepare_data tests passed!")
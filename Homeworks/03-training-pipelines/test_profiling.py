@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Test the per-block profiler used by run_complete_pipeline --profile.
+Profiles a dummy block; writes to temporary directories only.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+sys.path.append('./taxi_training_pipeline')
+
+from utils.profiling import BlockProfiler
+
+
+def dummy_block(rows, delay=0.2, allocate_mb=32):
+    buffer = bytearray(allocate_mb * 1024 ** 2)
+    time.sleep(delay)
+    del buffer
+    return [row for row in rows if row % 2 == 0]
+
+
+def test_run_records_time_rows_and_memory():
+    profiler = BlockProfiler(trace_memory=True)
+    result = profiler.run('dummy_block', dummy_block, list(range(1000)), delay=0.2)
+    record = profiler.records[0]
+
+    assert result == list(range(0, 1000, 2)), 'Block result was not passed through'
+    assert record['block'] == 'dummy_block' and len(profiler.records) == 1
+    assert 0.2 <= record['wall_seconds'] < 1.0, f"wall_seconds {record['wall_seconds']}"
+    assert record['cpu_seconds'] < record['wall_seconds'], 'Sleeping was counted as CPU time'
+    assert record['rows_in'] == 1000 and record['rows_out'] == 500
+    assert record['rows_per_second'] == 1000 / record['wall_seconds']
+    assert record['tracemalloc_peak_mb'] >= 32, f"tracemalloc peak {record['tracemalloc_peak_mb']} MB"
+    assert record['peak_rss_mb'] > 0 and record['peak_rss_increase_mb'] >= 0
+    print(f"✓ {record['wall_seconds']:.2f}s, {record['rows_in']} rows, "
+          f"{record['tracemalloc_peak_mb']:.0f} MB traced peak recorded")
+
+
+def test_failed_block_is_not_recorded():
+    profiler = BlockProfiler(trace_memory=True)
+    try:
+        profiler.run('broken', lambda rows: 1 / 0, [1])
+        raise AssertionError('Block error was swallowed')
+    except ZeroDivisionError:
+        pass
+    assert profiler.records == []
+    # tracemalloc was stopped, so the next block can be profiled
+    profiler.run('dummy_block', dummy_block, [1, 2], delay=0, allocate_mb=1)
+    assert len(profiler.records) == 1
+    print("✓ A failing block raises and leaves no record")
+
+
+def test_report_and_metrics():
+    with tempfile.TemporaryDirectory() as tmp:
+        profiler = BlockProfiler(cprofile_dir=os.path.join(tmp, 'cprofile'))
+        profiler.run('prepare_data', dummy_block, list(range(100)), delay=0.05, allocate_mb=1)
+        profiler.run('train_model', dummy_block, list(range(10)), delay=0.05, allocate_mb=1)
+        path = profiler.write_report(os.path.join(tmp, 'reports', 'pipeline_profile.json'))
+        with open(path) as f:
+            report = json.load(f)
+        assert os.path.exists(report['blocks'][0]['cprofile']), 'cProfile dump missing'
+
+    assert [block['block'] for block in report['blocks']] == ['prepare_data', 'train_model']
+    assert report['trace_memory'] is False and report['blocks'][0]['tracemalloc_peak_mb'] is None
+    assert abs(report['total_wall_seconds'] - sum(b['wall_seconds'] for b in report['blocks'])) < 1e-9
+    assert {'wall_seconds', 'cpu_seconds', 'peak_rss_mb', 'rows_in', 'rows_out'} <= set(report['blocks'][1])
+
+    metrics = profiler.metrics(blocks=['train_model'])
+    assert metrics['train_model.rows_in'] == 10.0 and 'prepare_data.wall_seconds' not in metrics
+    assert all(isinstance(value, float) for value in metrics.values())
+    assert 'train_model.tracemalloc_peak_mb' not in metrics, 'None fields became metrics'
+    print(f"✓ Report has {len(report['blocks'])} blocks; {len(metrics)} metrics for train_model")
+
+
+if __name__ == "__main__":
+    test_run_records_time_rows_and_memory()
+    test_failed_block_is_not_recorded()
+    test_report_and_metrics()
+    print("\n✓ All profiling tests passed!")
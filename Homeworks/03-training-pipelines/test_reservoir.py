@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Test the single-pass reservoir sampler.
+Uses synthetic trips, in memory and from a temporary parquet file.
+"""
+
+import sys
+import tempfile
+sys.path.append('./taxi_training_pipeline')
+
+import numpy as np
+import pandas as pd
+
+from transformers.prepare_data import prepare_trips
+from utils.parquet_stream import ParquetChunks
+from utils.reservoir import ReservoirSampler, sample_stream, stratum_quota
+from utils.synthetic_trips import generate_trips, write_trips_parquet
+
+
+def test_sample_does_not_depend_on_chunking():
+    trips = prepare_trips(generate_trips(30000, seed=101)).reset_index(drop=True)
+    whole, n_rows = sample_stream(trips, 5000, seed=7)
+    assert n_rows == len(trips) and len(whole) == 5000
+    for chunk_rows in (1000, 4096, 29999):
+        chunked, _ = sample_stream(trips, 5000, seed=7, chunk_rows=chunk_rows)
+        assert chunked.index.equals(whole.index), f"chunk_rows={chunk_rows} picked other rows"
+        pd.testing.assert_frame_equal(chunked, trips.loc[whole.index])
+
+    other, _ = sample_stream(trips, 5000, seed=8)
+    assert not other.index.equals(whole.index), 'Seed does not change the sample'
+    everything, _ = sample_stream(trips, len(trips) + 1, seed=7)
+    assert len(everything) == len(trips)
+    print(f"✓ Same {len(whole):,} rows drawn for every chunking")
+
+
+def test_sample_is_uniform():
+    n_rows, size, repeats = 2000, 200, 300
+    frame = pd.DataFrame({'row': np.arange(n_rows)})
+    hits = np.zeros(n_rows)
+    for seed in range(repeats):
+        hits[sample_stream(frame, size, seed=seed, chunk_rows=300)[0]['row']] += 1
+    expected = repeats * size / n_rows
+    # Every row is drawn at the rate of a uniform sample, and halves are balanced
+    assert abs(hits.mean() - expected) < 1e-9
+    assert abs(hits[:n_rows // 2].sum() / hits.sum() - 0.5) < 0.02
+    assert hits.std() < 2 * np.sqrt(expected)
+    print(f"✓ Rows drawn {hits.mean():.1f} +/- {hits.std():.1f} times out of {repeats}")
+
+
+def test_stratified_sample_from_parquet():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_trips_parquet(f"{tmp}/trips.parquet", 40000, seed=102, row_group_size=7000)
+        chunks = ParquetChunks(path, chunk_rows=3000)
+        sample, n_rows = sample_stream(chunks, 3000, seed=3, stratify_by='PULocationID')
+        trips = pd.read_parquet(path, columns=chunks.columns)
+
+    assert n_rows == len(trips) and len(sample) == 3000
+    counts = trips['PULocationID'].value_counts()
+    drawn = sample['PULocationID'].value_counts().reindex(counts.index, fill_value=0)
+    quota = stratum_quota(counts.to_numpy(), 3000)
+    # Small locations are kept whole; busy ones get the quota, some one more
+    extra = drawn - np.minimum(counts, quota)
+    assert extra.min() == 0 and extra.max() <= 1
+    assert (extra[counts <= quota] == 0).all()
+    pd.testing.assert_frame_equal(sample, trips.loc[sample.index])
+
+    in_memory, _ = sample_stream(trips, 3000, seed=3, stratify_by='PULocationID', chunk_rows=11000)
+    assert in_memory.index.equals(sample.index), 'Stratified sample depends on chunking'
+    print(f"✓ Stratified sample covers {sample['PULocationID'].nunique()} locations, quota {quota}")
+
+
+def test_memory_is_bounded_by_sample_and_chunk():
+    trips = prepare_trips(generate_trips(30000, seed=103)).reset_index(drop=True)
+    sampler = ReservoirSampler(500, seed=1, stratify_by='PULocationID')
+    n_strata = trips['PULocationID'].nunique()
+    for start in range(0, len(trips), 2000):
+        sampler.update(trips.iloc[start:start + 2000])
+        assert len(sampler._sample) <= 500 + n_strata
+    assert len(sampler.result()) == 500
+    print("✓ Never kept more than the sample plus one row per location")
+
+
+def test_train_model_sample_is_reproducible():
+    from transformers.train_model import transform_data as train_model
+
+    trips = prepare_trips(generate_trips(20000, seed=104))
+    first = train_model(trips, sample_size=5000, seed=11)
+    second = train_model(trips.reset_index(drop=True), sample_size=5000, seed=11)
+    stratified = train_model(trips, sample_size=5000, seed=11, stratify_by='PULocationID')
+    assert np.isclose(first['intercept'], second['intercept'])
+    assert stratified['training_samples'] == 5000
+    print(f"✓ Seeded sample trains the same model (intercept {first['intercept']:.4f})")
+
+
+if __name__ == "__main__":
+    test_sample_does_not_depend_on_chunking()
+    test_sample_is_uniform()
+    test_stratified_sample_from_parquet()
+    test_memory_is_bounded_by_sample_and_chunk()
+    test_train_model_sample_is_reproducible()
+    print("\n✓ All reservoir sampler tests passed!")
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Test the local run summary index.
+Uses a throwaway tracking database; mlflow.db is not touched.
+"""
+
+import os
+import sys
+import tempfile
+import time
+sys.path.append('./taxi_training_pipeline')
+
+import mlflow
+from mlflow.entities import Metric, Param
+
+from utils.run_index import RunIndex
+
+
+def log_run(client, experiment_id, intercept, status='FINISHED', base_version=None):
+    run = client.create_run(experiment_id)
+    params = [Param('training_mode', 'incremental' if base_version else 'full'),
+              Param('training_samples', '1000')]
+    if base_version is not None:
+        params.append(Param('base_model_version', str(base_version)))
+    client.log_batch(run.info.run_id, metrics=[Metric('intercept', intercept, 0, 0), Metric('model_size', 1234, 0, 0)],
+                     params=params)
+    if status != 'RUNNING':
+        client.set_terminated(run.info.run_id, status=status)
+    return run.info.run_id
+
+
+def test_incremental_sync_and_queries():
+    with tempfile.TemporaryDirectory() as tmp:
+        tracking_uri = f"sqlite:///{os.path.join(tmp, 'mlflow.db')}"
+        client = mlflow.MlflowClient(tracking_uri=tracking_uri)
+        experiment_id = client.create_experiment('taxi-duration-prediction')
+        other_id = client.create_experiment('other')
+        client.create_registered_model('taxi-duration-model')
+
+        for i in range(50):
+            log_run(client, other_id, float(i))
+        version = None
+        for i in range(3):
+            run_id = log_run(client, experiment_id, 20.0 + i, base_version=version)
+            version = client.create_model_version('taxi-duration-model', source='/tmp', run_id=run_id).version
+        running = log_run(client, experiment_id, 30.0, status='RUNNING')
+
+        index = RunIndex(os.path.join(tmp, 'index.db'), tracking_uri)
+        first = index.sync()
+        assert first == {'runs': 54, 'versions': 3}, f'Unexpected first sync: {first}'
+        assert index.latest_run('taxi-duration-prediction')['status'] == 'RUNNING'
+
+        client.set_terminated(running)
+        log_run(client, other_id, 99.0)
+        second = index.sync()
+        assert second['runs'] < 5 and second['versions'] == 0, f'Sync was not incremental: {second}'
+
+        start = time.perf_counter()
+        experiments = {row['name']: row['n_runs'] for row in index.experiments()}
+        latest = index.latest_run('taxi-duration-prediction')
+        versions = index.versions('taxi-duration-model')
+        lineage = [row['version'] for row in index.lineage(name='taxi-duration-model')]
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        index.close()
+
+    assert experiments == {'taxi-duration-prediction': 4, 'other': 51, 'Default': 0}, experiments
+    assert latest['run_id'] == running and latest['status'] == 'FINISHED', 'Finished run not refreshed'
+    assert [v['version'] for v in versions] == [3, 2, 1] and versions[0]['intercept'] == 22.0
+    assert lineage == [3, 2, 1], f'Unexpected lineage: {lineage}'
+    print(f"✓ {second['runs']} runs fetched on resync, 4 queries in {elapsed_ms:.1f} ms")
+
+
+def test_registration_updates_index():
+    from data_exporters.register_model import export_data
+    from transformers.prepare_data import prepare_trips
+    from transformers.train_model import transform_data as train_model
+    from utils.registry import EXPERIMENT_NAME, MODEL_NAME
+    from utils.synthetic_trips import generate_trips
+
+    model_info = train_model(prepare_trips(generate_trips(20000, seed=61)))
+    with tempfile.TemporaryDirectory() as tmp:
+        tracking_uri = f"sqlite:///{os.path.join(tmp, 'mlflow.db')}"
+        mlflow.MlflowClient(tracking_uri=tracking_uri).create_experiment(
+            EXPERIMENT_NAME, artifact_location=os.path.join(tmp, 'artifacts'))
+        result = export_data(model_info, tracking_uri=tracking_uri)
+
+        with RunIndex(tracking_uri=tracking_uri) as index:
+            latest = index.latest_run(EXPERIMENT_NAME)
+            versions = index.versions(MODEL_NAME)
+
+    assert latest['run_id'] == result['run_id'] and latest['status'] == 'FINISHED', 'Run not indexed'
+    assert latest['model_size'] == result['model_size'], 'Model size not indexed'
+    assert len(versions) == 1 and versions[0]['run_id'] == result['run_id'], 'Version not indexed'
+    print(f"✓ Registered run indexed without a sync (model size {latest['model_size']:,} bytes)")
+
+
+if __name__ == "__main__":
+    test_incremental_sync_and_queries()
+    test_registration_updates_index()
+    print("\n✓ All run index tests passed!")
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Test that out-of-core training via sufficient statistics matches LinearRegression.
+Runs on synthetic frames, no parquet file needed.
+"""
+
+import sys
+import tempfile
+sys.path.append('./taxi_training_pipeline')
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+
+from utils.feature_encoding import ColumnarEncoder
+from utils.parquet_stream import ParquetChunks
+from utils.sufficient_stats import LinearStats, accumulate_stats
+
+
+def make_trips(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    pu = rng.integers(1, 120, n_rows)
+    do = rng.integers(1, 120, n_rows)
+    distance = np.round(rng.exponential(3.0, n_rows), 2)
+    # A few extreme distances, like the real data has
+    distance[rng.integers(0, n_rows, 5)] = 50000.0
+    duration = 5 + 0.05 * pu - 0.03 * do + 2.0 * np.minimum(distance, 30) + rng.normal(0, 3, n_rows)
+    return pd.DataFrame({
+        'PULocationID': pu.astype(str),
+        'DOLocationID': do.astype(str),
+        'trip_distance': distance,
+        'duration': duration,
+    })
+
+
+def reference_fit(df):
+    encoder = ColumnarEncoder()
+    X = encoder.fit_transform(df)
+    # Dense fit goes through scipy lstsq, i.e. the exact minimum-norm solution
+    return LinearRegression().fit(X.toarray(), df['duration'].values), encoder
+
+
+def test_solve_matches_linear_regression():
+    df = make_trips(20000)
+    expected, encoder = reference_fit(df)
+
+    stats = LinearStats()
+    for start in range(0, len(df), 3000):
+        stats.update(df.iloc[start:start + 3000])
+    model, dv = stats.solve()
+
+    assert dv.feature_names_ == encoder.feature_names_, 'Vocabulary differs'
+    assert np.isclose(model.intercept_, expected.intercept_, rtol=1e-8, atol=1e-8), \
+        f'Intercept {model.intercept_} != {expected.intercept_}'
+    assert np.allclose(model.coef_, expected.coef_, rtol=1e-6, atol=1e-6), 'Coefficients differ'
+
+    X = encoder.transform(df)
+    assert np.allclose(model.predict(X), expected.predict(X.toarray()), atol=1e-6), 'Predictions differ'
+    print(f"✓ Chunked solve matches LinearRegression (intercept {model.intercept_:.6f})")
+
+
+def test_merge_is_order_independent():
+    df = make_trips(10000, seed=1)
+    whole = LinearStats().update(df)
+    merged = LinearStats().update(df.iloc[6000:]).merge(LinearStats().update(df.iloc[:6000]))
+
+    model_a, dv_a = whole.solve()
+    model_b, dv_b = merged.solve()
+    assert dv_a.feature_names_ == dv_b.feature_names_, 'Vocabulary differs after merge'
+    assert np.allclose(model_a.coef_, model_b.coef_, atol=1e-8), 'Merge changed the fit'
+    print("✓ Merged statistics give the same fit")
+
+
+def test_process_pool_over_parquet():
+    df = make_trips(60000, seed=2)
+    start = pd.Timestamp('2023-03-01')
+    df['tpep_pickup_datetime'] = start + pd.to_timedelta(np.arange(len(df)), unit='s')
+    df['tpep_dropoff_datetime'] = df['tpep_pickup_datetime'] + pd.to_timedelta(df['duration'] * 60, unit='s')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = f"{tmp}/trips.parquet"
+        df.to_parquet(path, row_group_size=10000)
+        source = ParquetChunks(path, columns=['PULocationID', 'DOLocationID', 'trip_distance', 'duration'],
+                               chunk_rows=4000)
+        serial = accumulate_stats(source).solve()[0]
+        parallel = accumulate_stats(source, n_workers=3).solve()[0]
+
+    assert np.isclose(serial.intercept_, parallel.intercept_), 'Parallel fit differs'
+    print(f"✓ Process-pool accumulation matches serial ({parallel.intercept_:.4f})")
+
+
+def test_state_roundtrip_and_incremental_update():
+    march, april = make_trips(8000, seed=3), make_trips(6000, seed=4)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        state = LinearStats().update(march)
+        state.sources.append('2023-03')
+        restored = LinearStats.load(state.save(f"{tmp}/state.npz"))
+
+    new_month = LinearStats().update(april)
+    new_month.sources.append('2023-04')
+    incremental, _ = restored.merge(new_month).solve()
+    expected, _ = LinearStats().update(pd.concat([march, april])).solve()
+
+    assert restored.sources == ['2023-03', '2023-04'], f'Unexpected sources {restored.sources}'
+    assert np.allclose(incremental.coef_, expected.coef_, atol=1e-8), 'Incremental fit differs'
+    print("✓ Saved state plus one new month matches a fit on both months")
+
+
+def test_subtract_and_rss_match_direct_fit():
+    df = make_trips(12000, seed=5)
+    head, tail = df.iloc[:9000], df.iloc[9000:]
+    total = LinearStats().update(head).update(tail)
+    tail_stats = LinearStats().update(tail)
+
+    remaining = total.copy().subtract(tail_stats)
+    assert total.n_samples == 12000, 'copy() shares state with the original'
+    expected, encoder = reference_fit(head)
+    model, dv = remaining.solve()
+    assert dv.feature_names_ == encoder.feature_names_, 'Subtracted features were not dropped'
+    assert np.allclose(model.coef_, expected.coef_, atol=1e-6), 'Fit after subtract differs'
+
+    # Out-of-sample error of the head model on the tail rows, without the rows
+    X_tail = encoder.transform(tail)
+    direct = float(np.sum((tail['duration'].values - expected.predict(X_tail.toarray())) ** 2))
+    rss = remaining.rss(remaining.coefficients(), tail_stats)
+    assert np.isclose(rss, direct, rtol=1e-8), f'RSS {rss} != {direct}'
+    print(f"✓ Subtracted stats refit and RSS from stats match a direct fit (RSS {rss:,.1f})")
+
+
+if __name__ == "__main__":
+    test_solve_matches_linear_regression()
+    test_merge_is_order_independent()
+    test_process_pool_over_parquet()
+    test_state_roundtrip_and_incremental_update()
+    test_subtract_and_rss_match_direct_fit()
+    print("\n✓ All sufficient statistics tests passed!")
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Test batched MLflow logging and the background uploader.
+Uses a throwaway tracking database; mlflow.db is not touched.
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+sys.path.append('./taxi_training_pipeline')
+
+import mlflow
+
+from transformers.prepare_data import prepare_trips
+from transformers.train_model import transform_data as train_model
+from utils.registry import (
+    COMPACT_MODEL_PATH, EXPERIMENT_NAME, MODEL_NAME, TRAINING_STATE_FILE, TRAINING_STATE_PATH,
+    download_version_artifact, load_lookup_predictor, load_training_state, model_versions, register_run_artifact,
+)
+from utils.synthetic_trips import generate_trips
+from utils.profiling import BlockProfiler
+from utils.tracking import BackgroundUploader, BatchedRunLogger, tracking_lock, wait_for_uploads
+
+
+class RecordingClient:
+    def __init__(self):
+        self.calls = []
+
+    def log_batch(self, run_id, metrics=(), params=(), tags=()):
+        self.calls.append((len(metrics), len(params), len(tags)))
+
+
+def test_logger_respects_batch_limits():
+    client = RecordingClient()
+    logger = BatchedRunLogger(client, 'run')
+    logger.log_params({f"p{i}": i for i in range(150)})
+    logger.log_metrics({f"m{i}": i for i in range(1500)})
+    logger.set_tag('source', 'test')
+
+    calls = logger.flush()
+    assert calls == len(client.calls) == 2, f'Expected 2 log_batch calls, got {client.calls}'
+    assert all(params <= 100 and tags <= 100 and metrics + params + tags <= 1000
+               for metrics, params, tags in client.calls), f'Batch limits exceeded: {client.calls}'
+    assert sum(metrics for metrics, _, _ in client.calls) == 1500, 'Metrics were lost'
+    assert logger.flush() == 0, 'Flushing an empty logger should not call MLflow'
+    print(f"✓ 1,651 values written in {calls} log_batch calls")
+
+
+def test_uploader_is_ordered_and_bounded():
+    uploader = BackgroundUploader(max_pending=2)
+    release = threading.Event()
+    done = []
+
+    def job(i):
+        release.wait()
+        done.append(i)
+        return i
+
+    # One job running plus max_pending queued; the next submit has to wait
+    futures = [uploader.submit(job, i) for i in range(3)]
+    blocked = threading.Thread(target=lambda: futures.append(uploader.submit(job, 3)))
+    blocked.start()
+    time.sleep(0.2)
+    assert blocked.is_alive(), 'submit() did not block on a full queue'
+
+    release.set()
+    blocked.join()
+    failing = uploader.submit(lambda: 1 / 0)
+    uploader.flush()
+    assert done == [0, 1, 2, 3], f'Jobs ran out of order: {done}'
+    assert [f.result() for f in futures] == [0, 1, 2, 3]
+    assert isinstance(failing.exception(), ZeroDivisionError), 'Job error was not reported'
+    uploader.close()
+    print("✓ Uploader runs jobs in order, applies back-pressure and reports failures")
+
+
+def test_background_registration():
+    from data_exporters.register_model import export_data
+
+    model_info = train_model(prepare_trips(generate_trips(20000, seed=31)))
+    with tempfile.TemporaryDirectory() as tmp:
+        tracking_uri = f"sqlite:///{os.path.join(tmp, 'mlflow.db')}"
+        client = mlflow.MlflowClient(tracking_uri=tracking_uri)
+        client.create_experiment(EXPERIMENT_NAME, artifact_location=os.path.join(tmp, 'artifacts'))
+
+        result = export_data(model_info, tracking_uri=tracking_uri, background_upload=True)
+        assert result['upload_pending'], 'Upload was not queued'
+        wait_for_uploads()
+
+        run = client.get_run(result['run_id'])
+        versions = model_versions(MODEL_NAME, tracking_uri)
+        artifacts = {artifact.path for artifact in client.list_artifacts(result['run_id'])}
+        txm_size = os.path.getsize(client.download_artifacts(result['run_id'], 'model_compact/model.txm', tmp))
+
+    assert run.info.status == 'FINISHED', f'Run ended as {run.info.status}'
+    assert run.data.params['training_samples'] == str(model_info['training_samples'])
+    assert len(versions) == 1 and versions[0].run_id == result['run_id'], 'Model was not registered'
+    assert 'model_compact' in artifacts, f'Missing artifacts: {artifacts}'
+    assert not {'model', 'model_bundle', 'lookup_table'} & artifacts, f'Model written more than once: {artifacts}'
+    assert run.data.metrics['model_size'] == txm_size, 'model_size is not the size of the .txm file'
+    print(f"✓ Background upload registered version {versions[0].version} with {sorted(artifacts)}")
+
+
+def test_profiler_metrics_are_batched_under_the_lock():
+    profiler = BlockProfiler()
+    profiler.records = [{'block': f"block_{i}", 'wall_seconds': 0.5, 'rows_in': i} for i in range(600)]
+    with tempfile.TemporaryDirectory() as tmp:
+        tracking_uri = f"sqlite:///{os.path.join(tmp, 'mlflow.db')}"
+        client = mlflow.MlflowClient(tracking_uri=tracking_uri)
+        experiment_id = client.create_experiment(EXPERIMENT_NAME, artifact_location=os.path.join(tmp, 'artifacts'))
+        run_id = client.create_run(experiment_id).info.run_id
+
+        calls = []
+
+        def log():
+            calls.append(profiler.log_to_mlflow(run_id, tracking_uri=tracking_uri))
+
+        with tracking_lock(tracking_uri):
+            thread = threading.Thread(target=log)
+            thread.start()
+            time.sleep(0.3)
+            assert calls == [], 'Profiler metrics were written without the tracking lock'
+        thread.join()
+        metrics = client.get_run(run_id).data.metrics
+
+    assert calls == [2], f'Expected 2 log_batch calls for 1,200 metrics, got {calls}'
+    assert len(metrics) == 1200 and metrics['block_7.rows_in'] == 7.0
+    print(f"✓ {len(metrics):,} profiler metrics written in {calls[0]} batches under the tracking lock")
+
+
+def test_loaders_never_fall_back_to_older_versions():
+    from data_exporters.register_model import export_data
+
+    model_info = train_model(prepare_trips(generate_trips(20000, seed=32)))
+    with tempfile.TemporaryDirectory() as tmp:
+        tracking_uri = f"sqlite:///{os.path.join(tmp, 'mlflow.db')}"
+        client = mlflow.MlflowClient(tracking_uri=tracking_uri)
+        experiment_id = client.create_experiment(EXPERIMENT_NAME, artifact_location=os.path.join(tmp, 'artifacts'))
+
+        # Version 1 has the .txm file
+        export_data(model_info, tracking_uri=tracking_uri)
+        # Version 2 the way the original register_model logged it: an MLflow sklearn model only
+        new_run = client.create_run(experiment_id).info.run_id
+        staging_dir = os.path.join(tmp, 'staging', 'model')
+        os.makedirs(staging_dir)
+        with open(os.path.join(staging_dir, 'MLmodel'), 'w') as f:
+            f.write('flavors: {}\n')
+        client.log_artifacts(new_run, os.path.dirname(staging_dir))
+        register_run_artifact(new_run, 'model', tracking_uri=tracking_uri)
+
+        try:
+            load_lookup_predictor(tracking_uri=tracking_uri)
+            raise AssertionError('Fell back to a version older than the newest')
+        except ValueError as e:
+            assert 'version 2' in str(e) and COMPACT_MODEL_PATH in str(e), str(e)
+        predictor, version = load_lookup_predictor(version=1, tracking_uri=tracking_uri)
+        assert str(version.version) == '1'
+        path, version = download_version_artifact(f"{COMPACT_MODEL_PATH}/model.txm", tmp, version=1,
+                                                  tracking_uri=tracking_uri)
+        assert os.path.exists(path) and str(version.version) == '1'
+
+    trips = prepare_trips(generate_trips(1000, seed=33))
+    expected = model_info['model'].predict(model_info['vectorizer'].transform(
+        trips[['PULocationID', 'DOLocationID', 'trip_distance']].to_dict('records')))
+    assert abs(predictor.predict(trips) - expected).max() < 1e-6, 'Version 1 predicts differently'
+    print("✓ Loaders use the requested version's own artifact and fail clearly when it is missing")
+
+
+def test_training_state_errors_are_not_skipped():
+    def failing_download(**kwargs):
+        raise PermissionError(kwargs['artifact_path'])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tracking_uri = f"sqlite:///{os.path.join(tmp, 'mlflow.db')}"
+        client = mlflow.MlflowClient(tracking_uri=tracking_uri)
+        experiment_id = client.create_experiment(EXPERIMENT_NAME, artifact_location=os.path.join(tmp, 'artifacts'))
+        assert load_training_state(tracking_uri=tracking_uri) == (None, None)
+
+        # Version 1 has a training state, version 2 has none
+        state_dir = os.path.join(tmp, 'staging', TRAINING_STATE_PATH)
+        os.makedirs(state_dir)
+        with open(os.path.join(state_dir, TRAINING_STATE_FILE), 'wb') as f:
+            f.write(b'state')
+        for staged in (True, False):
+            run_id = client.create_run(experiment_id).info.run_id
+            if staged:
+                client.log_artifacts(run_id, os.path.join(tmp, 'staging'))
+            register_run_artifact(run_id, TRAINING_STATE_PATH, tracking_uri=tracking_uri)
+
+        download = mlflow.artifacts.download_artifacts
+        mlflow.artifacts.download_artifacts = failing_download
+        try:
+            load_training_state(tracking_uri=tracking_uri)
+            raise AssertionError('A failed download was skipped like a missing training state')
+        except PermissionError:
+            pass
+        finally:
+            mlflow.artifacts.download_artifacts = download
+    print("✓ Versions without training state are skipped, download errors are raised")
+
+if __name__ == "__main__":
+    test_logger_respects_batch_limits()
+    test_uploader_is_ordered_and_bounded()
+    test_background_registration()
+    test_profiler_metrics_are_batched_under_the_lock()
+    test_loaders_never_fall_back_to_older_versions()
+    test_training_state_errors_are_not_skipped()
+    print("\n✓ All tracking tests passed!")